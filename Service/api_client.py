@@ -5,8 +5,11 @@ API Client for sending monitoring data to the backend
 import requests
 import json
 import logging
+import threading
 from datetime import datetime
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
+from report_queue import ReportQueue
+from report_spool import ReportSpool
 
 class APIClient:
     def __init__(self, base_url: str = "http://localhost:8000", api_key: Optional[str] = None):
@@ -14,6 +17,13 @@ class APIClient:
         self.api_key = api_key
         self.session = requests.Session()
         self.logger = logging.getLogger(__name__)
+        self.report_queue = None
+        self.spool = None
+        self._credentials = None
+        self._replay_thread = None
+        self._replay_stop = threading.Event()
+        self._replay_interval = 10.0
+        self._auth_rejected = False  # token refused and no credentials to log in again
         
         # Set headers
         if self.api_key:
@@ -29,6 +39,7 @@ class APIClient:
     def set_auth_token(self, token: str):
         """Set authentication token"""
         self.api_key = token
+        self._auth_rejected = False
         self.session.headers.update({
             'Authorization': f'Bearer {token}'
         })
@@ -47,6 +58,7 @@ class APIClient:
             if response.status_code == 200:
                 data = response.json()
                 self.set_auth_token(data['access_token'])
+                self._credentials = (username, password)
                 self.logger.info("Successfully authenticated with API")
                 return True
             else:
@@ -57,6 +69,32 @@ class APIClient:
             self.logger.error(f"Login error: {e}")
             return False
     
+    def refresh_token(self) -> bool:
+        """Exchange the current token for a fresh one before it expires"""
+        try:
+            response = self.session.post(f"{self.base_url}/api/v1/auth/refresh")
+            
+            if response.status_code == 200:
+                self.set_auth_token(response.json()['access_token'])
+                return True
+            else:
+                # An expired or revoked token cannot be refreshed; only a new token or login helps
+                self._auth_rejected = response.status_code == 401
+                self.logger.error(f"Token refresh failed: {response.text}")
+                return False
+                
+        except Exception as e:
+            self.logger.error(f"Token refresh error: {e}")
+            return False
+    
+    def _reauthenticate(self) -> bool:
+        """Log in again with stored credentials, or refresh an api_key token"""
+        if self._credentials:
+            return self.login(*self._credentials)
+        if self.api_key:
+            return self.refresh_token()
+        return True
+    
     def send_malware_report(self, report_data: Dict[str, Any]) -> bool:
         """Send malware detection report to API"""
         try:
@@ -114,6 +152,118 @@ class APIClient:
             self.logger.error(f"Error sending network report: {e}")
             return False
     
+    def send_reports_bulk(self, report_type: str, reports: List[Dict[str, Any]]) -> bool:
+        """Send a batch of reports of one type to the bulk endpoint"""
+        try:
+            response = self.session.post(
+                f"{self.base_url}/api/v1/{report_type}/bulk",
+                json=reports
+            )
+            
+            if response.status_code == 201:
+                data = response.json()
+                if data.get('failed'):
+                    self.logger.warning(f"{data['failed']} of {data['received']} {report_type} reports rejected: {data.get('errors')}")
+                self.logger.debug(f"Sent {len(reports)} {report_type} reports: {data.get('created')} new rows, "
+                                  f"{data.get('folded', 0)} folded into existing rows")
+                return True
+            else:
+                self.logger.error(f"Failed to send {report_type} reports: {response.text}")
+                return False
+                
+        except Exception as e:
+            self.logger.error(f"Error sending {report_type} reports: {e}")
+            return False
+    
+    def enable_spool(self, directory: str, max_bytes: int = 100 * 1024 * 1024, retry_interval: float = 10.0):
+        """Spool undeliverable reports to disk and replay them once the API is reachable again"""
+        if self.spool is None:
+            self.spool = ReportSpool(directory, max_bytes=max_bytes)
+        self._replay_interval = retry_interval
+        
+        if self._replay_thread is None or not self._replay_thread.is_alive():
+            self._replay_stop.clear()
+            self._replay_thread = threading.Thread(target=self._replay_loop, name='report-spool-replay', daemon=True)
+            self._replay_thread.start()
+    
+    def _deliver_reports(self, report_type: str, reports: List[Dict[str, Any]]) -> bool:
+        """Send a batch of reports, spooling it to disk if it cannot be delivered"""
+        if self.spool is None:
+            return self.send_reports_bulk(report_type, reports)
+        
+        # Keep delivery in order: while a backlog exists new reports go behind it
+        if self.spool.has_pending() or not self.send_reports_bulk(report_type, reports):
+            self.spool.append(report_type, reports)
+        return True
+    
+    def _replay_loop(self):
+        """Background loop that drains the spool whenever the API is reachable"""
+        while not self._replay_stop.wait(self._replay_interval):
+            if self._auth_rejected or not self.spool.has_pending() or not self.test_connection():
+                continue
+            
+            # The token may have expired while the API was down; an api_key client can only refresh a live one
+            if not self._reauthenticate():
+                if self._auth_rejected:
+                    self.logger.error("API token rejected and no credentials to log in with; "
+                                      "spool replay paused until a new token is set")
+                continue
+            
+            try:
+                replayed = self.spool.replay(self.send_reports_bulk, self.report_queue.batch_size if self.report_queue else 200)
+                if replayed:
+                    self.logger.info(f"Replayed {replayed} spooled reports")
+            except Exception as e:
+                self.logger.error(f"Error replaying spooled reports: {e}")
+    
+    def start_batching(self, max_size: int = 10000, batch_size: int = 200,
+                       flush_interval: float = 2.0, overflow_policy: str = 'drop_oldest'):
+        """Start the background report queue; queue_*_report calls return immediately afterwards"""
+        if self.report_queue is None:
+            self.report_queue = ReportQueue(
+                self._deliver_reports,
+                max_size=max_size,
+                batch_size=batch_size,
+                flush_interval=flush_interval,
+                overflow_policy=overflow_policy
+            )
+        self.report_queue.start()
+    
+    def stop_batching(self):
+        """Flush pending reports and stop the background report queue"""
+        if self.report_queue is not None:
+            self.report_queue.stop()
+        if self.spool is not None:
+            self._replay_stop.set()
+            self.spool.close()
+    
+    def queue_report(self, report_type: str, report_data: Dict[str, Any]) -> bool:
+        """Queue a report for batched delivery, sending it directly if batching is off"""
+        if self.report_queue is None or not self.report_queue.running:
+            return self._deliver_reports(report_type, [report_data])
+        return self.report_queue.put(report_type, report_data)
+    
+    def queue_malware_report(self, report_data: Dict[str, Any]) -> bool:
+        """Queue malware detection report"""
+        return self.queue_report('malware', report_data)
+    
+    def queue_web_report(self, report_data: Dict[str, Any]) -> bool:
+        """Queue web activity report"""
+        return self.queue_report('web', report_data)
+    
+    def queue_network_report(self, report_data: Dict[str, Any]) -> bool:
+        """Queue network monitoring report"""
+        return self.queue_report('network', report_data)
+    
+    def get_queue_metrics(self) -> Optional[Dict[str, Any]]:
+        """Get report queue and spool metrics (None when batching is off)"""
+        if self.report_queue is None:
+            return None
+        metrics = self.report_queue.get_metrics()
+        if self.spool is not None:
+            metrics['spool'] = self.spool.get_metrics()
+        return metrics
+    
     def get_user_id(self, username: str) -> Optional[int]:
         """Get user ID by username"""
         try:
@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmarks for the monitoring hot paths
+"""
+
+import argparse
+import hashlib
+import ipaddress
+import os
+import random
+import re
+import shutil
+import string
+import tempfile
+import socket
+import threading
+import time
+import dns.message
+import dns.rdatatype
+import dns.reversename
+import dns.rrset
+from port_scanner import AsyncPortScanner
+from dns_resolver import PTRResolver
+from file_hasher import FileHasher
+from domain_matcher import DomainMatcher
+from domain_rules import DomainRules, SUSPICIOUS_PATTERNS
+
+def bench_port_scan(args):
+    """Scan a port range on localhost with a few local listeners open"""
+    listeners = []
+    for _ in range(3):
+        listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        listener.bind(('127.0.0.1', 0))
+        listener.listen(128)
+        listeners.append(listener)
+    listening_ports = sorted(l.getsockname()[1] for l in listeners)
+
+    scanner = AsyncPortScanner(concurrency=args.concurrency, timeout=args.timeout)
+    ports = range(args.start_port, args.end_port + 1)
+
+    start_time = time.perf_counter()
+    open_ports, results = scanner.scan_sync('127.0.0.1', ports)
+    elapsed = time.perf_counter() - start_time
+
+    found = [port for port in listening_ports if port in open_ports]
+    print(f"Probed {len(results)} ports in {elapsed:.2f}s ({len(results) / elapsed:,.0f} probes/s)")
+    print(f"Local listeners {listening_ports}, detected {found}")
+
+    for listener in listeners:
+        listener.close()
+
+def bench_range_scan(args):
+    """Sweep a CIDR block (loopback by default) and stream per-host results"""
+    scanner = AsyncPortScanner(concurrency=args.concurrency, timeout=args.timeout)
+    ports = args.ports
+
+    hosts = 0
+    probes = 0
+    start_time = time.perf_counter()
+    for host, open_ports, results in scanner.scan_hosts_sync(args.cidr, ports, args.chunk_size):
+        hosts += 1
+        probes += len(results)
+    elapsed = time.perf_counter() - start_time
+
+    print(f"Scanned {hosts} hosts x {len(ports)} ports in {elapsed:.2f}s ({probes / elapsed:,.0f} probes/s)")
+
+def start_stub_dns_server(delay):
+    """Answer every PTR query with host-<ip>.example after a fixed delay; returns the UDP port"""
+    server = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    server.bind(('127.0.0.1', 0))
+
+    def answer(data, client):
+        query = dns.message.from_wire(data)
+        response = dns.message.make_response(query)
+        question = query.question[0]
+        if question.rdtype == dns.rdatatype.PTR:
+            ip = dns.reversename.to_address(question.name)
+            target = f"host-{ip.replace('.', '-').replace(':', '-')}.example."
+            response.answer.append(dns.rrset.from_text(question.name, 300, 'IN', 'PTR', target))
+        time.sleep(delay)
+        server.sendto(response.to_wire(), client)
+
+    def serve():
+        while True:
+            data, client = server.recvfrom(4096)
+            threading.Thread(target=answer, args=(data, client), daemon=True).start()
+
+    threading.Thread(target=serve, daemon=True).start()
+    return server.getsockname()[1]
+
+def bench_reverse_dns(args):
+    """Resolve a batch of IPs against a local stub server with a fixed per-query delay"""
+    port = start_stub_dns_server(args.delay)
+    ips = [str(ip) for ip in list(ipaddress.ip_network(args.cidr).hosts())[:args.count]]
+
+    for workers in (1, args.workers):
+        resolver = PTRResolver(max_workers=workers, timeout=args.timeout, nameservers=['127.0.0.1'], port=port)
+        start_time = time.perf_counter()
+        results = resolver.resolve_many(ips)
+        elapsed = time.perf_counter() - start_time
+        resolved = sum(1 for hostname in results.values() if hostname)
+        print(f"{workers:>4} workers: resolved {resolved}/{len(ips)} in {elapsed:.2f}s "
+              f"({len(ips) / elapsed:,.0f} lookups/s)")
+        resolver.shutdown()
+
+def bench_hash(args):
+    """Compare the original 4KB single-threaded hashing loop with FileHasher"""
+    directory = tempfile.mkdtemp(prefix='hash-bench-')
+    try:
+        file_paths = []
+        for i in range(args.files):
+            file_path = os.path.join(directory, f'file{i}.bin')
+            with open(file_path, 'wb') as f:
+                f.write(os.urandom(args.size_mb * 1024 * 1024))
+            file_paths.append(file_path)
+        total_mb = args.files * args.size_mb
+
+        start_time = time.perf_counter()
+        for file_path in file_paths:
+            hash_md5 = hashlib.md5()
+            hash_sha256 = hashlib.sha256()
+            with open(file_path, 'rb') as f:
+                for chunk in iter(lambda: f.read(4096), b""):
+                    hash_md5.update(chunk)
+                    hash_sha256.update(chunk)
+        elapsed = time.perf_counter() - start_time
+        print(f"4KB serial loop: {total_mb} MB in {elapsed:.2f}s ({total_mb / elapsed:,.0f} MB/s)")
+
+        hasher = FileHasher(workers=args.workers, buffer_size=args.buffer_kb * 1024)
+        start_time = time.perf_counter()
+        hasher.hash_files(file_paths)
+        elapsed = time.perf_counter() - start_time
+        print(f"FileHasher ({args.workers} workers, {args.buffer_kb}KB buffers): {total_mb} MB in {elapsed:.2f}s "
+              f"({total_mb / elapsed:,.0f} MB/s)")
+        hasher.shutdown()
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+def bench_domain_match(args):
+    """Compare the substring any() loop with the reversed-label trie on a synthetic feed"""
+    rng = random.Random(42)
+
+    def random_label():
+        return ''.join(rng.choices(string.ascii_lowercase, k=rng.randint(5, 12)))
+
+    domains = [f"{random_label()}.{rng.choice(['com', 'net', 'org', 'ru', 'tk'])}" for _ in range(args.domains)]
+    listed = rng.sample(domains, args.hostnames // 2)
+    hostnames = [f"www.{domain}" for domain in listed]
+    hostnames += [f"{random_label()}.{random_label()}.com" for _ in range(args.hostnames - len(hostnames))]
+
+    start_time = time.perf_counter()
+    matcher = DomainMatcher(domains)
+    print(f"Built trie of {len(matcher):,} domains in {time.perf_counter() - start_time:.2f}s")
+
+    suspicious_domains = set(domains)
+    sample = rng.sample(hostnames, min(args.loop_sample, len(hostnames)))
+    start_time = time.perf_counter()
+    loop_hits = sum(1 for hostname in sample if any(domain in hostname.lower() for domain in suspicious_domains))
+    loop_per_host = (time.perf_counter() - start_time) / len(sample)
+
+    start_time = time.perf_counter()
+    trie_hits = sum(1 for hostname in hostnames if matcher.match(hostname))
+    trie_per_host = (time.perf_counter() - start_time) / len(hostnames)
+
+    print(f"any() loop: {loop_per_host * 1e6:,.1f} us/hostname ({loop_hits}/{len(sample)} matched)")
+    print(f"trie:       {trie_per_host * 1e6:,.2f} us/hostname ({trie_hits}/{len(hostnames)} matched)")
+    print(f"Speedup: {loop_per_host / trie_per_host:,.0f}x")
+
+def bench_web_rules(args):
+    """Compare WebMonitor's per-rule loops with the compiled DomainRules on synthetic rule lists"""
+    rng = random.Random(42)
+
+    def random_label(low=4, high=10):
+        return ''.join(rng.choices(string.ascii_lowercase, k=rng.randint(low, high)))
+
+    legitimate = [f"{random_label()}.{rng.choice(['com', 'net', 'org', 'io'])}" for _ in range(args.rules)]
+    keywords = [random_label(5, 9) for _ in range(args.rules)]
+    tlds = [f".{random_label(2, 4)}" for _ in range(args.rules // 10)]
+    domains = [f"{random_label()}.{random_label()}.{rng.choice(['com', 'tk', 'ml', 'xyz'])}" for _ in range(args.domains)]
+    domains[::10] = [f"cdn.{domain}" for domain in rng.sample(legitimate, len(domains[::10]))]
+    domains[5::10] = [f"{keyword}.example.com" for keyword in rng.sample(keywords, len(domains[5::10]))]
+
+    def loop_checks(domain):
+        for legit_domain in legitimate:
+            if legit_domain in domain:
+                return 'legitimate'
+        domain_lower = domain.lower()
+        indicators = [keyword for keyword in keywords if keyword in domain_lower]
+        indicators += [tld for tld in tlds if domain.endswith(tld)]
+        if re.match(r'^\d+\.\d+\.\d+\.\d+$', domain):
+            indicators.append('ip')
+        indicators += [pattern.pattern for pattern in SUSPICIOUS_PATTERNS if re.search(pattern.pattern, domain_lower)]
+        return indicators
+
+    def compiled_checks(domain):
+        if rules.is_legitimate(domain):
+            return 'legitimate'
+        domain_lower = domain.lower()
+        indicators = rules.matching_keywords(domain_lower) + rules.matching_tlds(domain)
+        if rules.is_ip_address(domain):
+            indicators.append('ip')
+        return indicators + rules.matching_patterns(domain_lower)
+
+    start_time = time.perf_counter()
+    rules = DomainRules(legitimate, keywords, tlds)
+    print(f"Compiled {rules.rule_count:,} rules in {time.perf_counter() - start_time:.2f}s")
+
+    sample = rng.sample(domains, min(args.loop_sample, len(domains)))
+    start_time = time.perf_counter()
+    loop_results = [loop_checks(domain) for domain in sample]
+    loop_per_domain = (time.perf_counter() - start_time) / len(sample)
+
+    start_time = time.perf_counter()
+    for domain in domains:
+        compiled_checks(domain)
+    compiled_per_domain = (time.perf_counter() - start_time) / len(domains)
+
+    mismatches = sum(1 for domain, result in zip(sample, loop_results) if compiled_checks(domain) != result)
+    print(f"Per-rule loops: {loop_per_domain * 1e6:,.1f} us/domain")
+    print(f"Compiled rules: {compiled_per_domain * 1e6:,.1f} us/domain ({mismatches} mismatches on {len(sample)} domains)")
+    print(f"Speedup: {loop_per_domain / compiled_per_domain:,.0f}x")
+
+def main():
+    parser = argparse.ArgumentParser(description='Security Monitor micro-benchmarks')
+    subparsers = parser.add_subparsers(dest='benchmark', required=True)
+
+    port_scan = subparsers.add_parser('port-scan', help='Async port scanner throughput')
+    port_scan.add_argument('--start-port', type=int, default=1)
+    port_scan.add_argument('--end-port', type=int, default=65535)
+    port_scan.add_argument('--concurrency', type=int, default=500)
+    port_scan.add_argument('--timeout', type=float, default=1.0)
+    port_scan.set_defaults(func=bench_port_scan)
+
+    range_scan = subparsers.add_parser('range-scan', help='Multi-host CIDR sweep throughput')
+    range_scan.add_argument('--cidr', default='127.0.0.0/16')
+    range_scan.add_argument('--ports', nargs='+', type=int, default=[22, 80, 443, 3389, 8080])
+    range_scan.add_argument('--concurrency', type=int, default=500)
+    range_scan.add_argument('--timeout', type=float, default=1.0)
+    range_scan.add_argument('--chunk-size', type=int, default=256)
+    range_scan.set_defaults(func=bench_range_scan)
+
+    reverse_dns = subparsers.add_parser('reverse-dns', help='Concurrent PTR resolver against a local stub server')
+    reverse_dns.add_argument('--cidr', default='203.0.113.0/24')
+    reverse_dns.add_argument('--count', type=int, default=100)
+    reverse_dns.add_argument('--delay', type=float, default=0.05, help='Stub server delay per query in seconds')
+    reverse_dns.add_argument('--workers', type=int, default=32)
+    reverse_dns.add_argument('--timeout', type=float, default=2.0)
+    reverse_dns.set_defaults(func=bench_reverse_dns)
+
+    hash_files = subparsers.add_parser('hash', help='File hashing throughput')
+    hash_files.add_argument('--files', type=int, default=8)
+    hash_files.add_argument('--size-mb', type=int, default=64)
+    hash_files.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    hash_files.add_argument('--buffer-kb', type=int, default=1024)
+    hash_files.set_defaults(func=bench_hash)
+
+    domain_match = subparsers.add_parser('domain-match', help='Threat-intel domain matching')
+    domain_match.add_argument('--domains', type=int, default=100000)
+    domain_match.add_argument('--hostnames', type=int, default=10000)
+    domain_match.add_argument('--loop-sample', type=int, default=200, help='Hostnames timed with the slow any() loop')
+    domain_match.set_defaults(func=bench_domain_match)
+
+    web_rules = subparsers.add_parser('web-rules', help='WebMonitor domain rule evaluation')
+    web_rules.add_argument('--rules', type=int, default=10000, help='Legitimate domains and keywords each')
+    web_rules.add_argument('--domains', type=int, default=10000)
+    web_rules.add_argument('--loop-sample', type=int, default=200, help='Domains timed with the per-rule loops')
+    web_rules.set_defaults(func=bench_web_rules)
+
+    args = parser.parse_args()
+    args.func(args)
+
+if __name__ == "__main__":
+    main()
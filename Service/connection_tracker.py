@@ -0,0 +1,79 @@
+"""
+Connection Tracker
+Turns per-cycle connection snapshots into opened, closed and aggregated heartbeat events
+"""
+
+import time
+import threading
+from collections import defaultdict
+from typing import Any, Dict, Hashable, List, Tuple
+
+class ConnectionTracker:
+    def __init__(self, heartbeat_interval: float = 300):
+        self.heartbeat_interval = heartbeat_interval  # seconds between reports of still-open connections; 0 disables
+        self._lock = threading.Lock()
+        self._active = {}  # source -> {key: [latest record, first_seen, last_seen]}
+        self._last_heartbeat = {}  # source -> monotonic time of its last heartbeat
+
+        # Metrics
+        self._observations = 0
+        self._events = defaultdict(int)
+
+    def update(self, source: str, observations: Dict[Hashable, Dict[str, Any]]) -> List[Tuple[str, Hashable, Dict[str, Any]]]:
+        """Diff a source's connections against its last cycle into (event, key, record) tuples"""
+        now = time.monotonic()
+        events = []
+        with self._lock:
+            active = self._active.setdefault(source, {})
+            self._observations += len(observations)
+
+            for key in [key for key in active if key not in observations]:
+                record, first_seen, last_seen = active.pop(key)
+                # Closed some time after it was last seen, so this is the observed lifetime
+                events.append(('closed', key, dict(record, event='closed', duration=round(last_seen - first_seen, 3))))
+
+            for key, record in observations.items():
+                entry = active.get(key)
+                if entry is None:
+                    active[key] = [record, now, now]
+                    events.append(('opened', key, dict(record, event='opened')))
+                else:
+                    entry[0] = record
+                    entry[2] = now
+
+            last_heartbeat = self._last_heartbeat.setdefault(source, now)
+            if self.heartbeat_interval and now - last_heartbeat >= self.heartbeat_interval:
+                self._last_heartbeat[source] = now
+                events.extend(self._heartbeats(active, now))
+
+            for event, _, _ in events:
+                self._events[event] += 1
+        return events
+
+    def _heartbeats(self, active, now: float) -> List[Tuple[str, Hashable, Dict[str, Any]]]:
+        """Aggregate open connections by (domain, port) into one record each"""
+        groups = {}
+        for record, first_seen, _ in active.values():
+            key = (record.get('domain'), record.get('port'))
+            group = groups.get(key)
+            if group is None:
+                groups[key] = [record, first_seen, 1]
+            else:
+                group[1] = min(group[1], first_seen)
+                group[2] += 1
+        return [('heartbeat', key, dict(record, event='heartbeat', connection_count=count,
+                                        duration=round(now - first_seen, 3)))
+                for key, (record, first_seen, count) in groups.items()]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get open connection counts and how many reports the deltas avoided"""
+        with self._lock:
+            reported = sum(self._events.values())
+            return {
+                'active': {source: len(active) for source, active in self._active.items()},
+                'observations': self._observations,
+                'opened': self._events['opened'],
+                'closed': self._events['closed'],
+                'heartbeats': self._events['heartbeat'],
+                'reports_avoided': max(0, self._observations - reported)
+            }
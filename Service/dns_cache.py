@@ -0,0 +1,193 @@
+"""
+Reverse DNS Cache
+Bounded LRU cache of IP -> hostname lookups with positive/negative TTLs and optional persistence
+"""
+
+import os
+import json
+import socket
+import threading
+import time
+import logging
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional
+
+class ReverseDNSCache:
+    def __init__(self, max_size: int = 10000, positive_ttl: float = 3600, negative_ttl: float = 300,
+                 persist_file: Optional[str] = None, persist_interval: float = 300, resolver=None):
+        self.max_size = max_size
+        self.positive_ttl = positive_ttl
+        self.negative_ttl = negative_ttl
+        self.persist_file = persist_file
+        self.persist_interval = persist_interval
+        self.resolver = resolver  # e.g. PTRResolver; socket.gethostbyaddr when None
+        self.logger = logging.getLogger(__name__)
+
+        self._lock = threading.Lock()
+        self._cache = OrderedDict()  # ip -> (hostname or None, expires_at wall-clock)
+        self._dirty = False
+        self._last_save = time.monotonic()
+
+        # Metrics
+        self._hits = 0
+        self._negative_hits = 0
+        self._misses = 0
+        self._expired = 0
+        self._evictions = 0
+        self._lookup_time = 0.0
+
+        if self.persist_file:
+            self.load()
+
+    def _lookup(self, ip: str) -> Optional[str]:
+        """Resolve a PTR record; None when the address has no usable name"""
+        if self.resolver is not None:
+            return self.resolver.resolve(ip)
+        try:
+            return socket.gethostbyaddr(ip)[0].rstrip('.') or None
+        except (socket.herror, socket.gaierror, socket.timeout, OSError, UnicodeError):
+            return None
+
+    def _store(self, ip: str, hostname: Optional[str], expires_at: float):
+        self._cache[ip] = (hostname, expires_at)
+        self._cache.move_to_end(ip)
+        while len(self._cache) > self.max_size:
+            self._cache.popitem(last=False)
+            self._evictions += 1
+        self._dirty = True
+
+    def get(self, ip: str) -> Any:
+        """Return the cached hostname, None for a cached miss, or KeyError if the entry is absent or stale"""
+        with self._lock:
+            entry = self._cache.get(ip)
+            if entry is None:
+                raise KeyError(ip)
+            hostname, expires_at = entry
+            if expires_at <= time.time():
+                del self._cache[ip]
+                self._expired += 1
+                raise KeyError(ip)
+            self._cache.move_to_end(ip)
+            if hostname is None:
+                self._negative_hits += 1
+            else:
+                self._hits += 1
+            return hostname
+
+    def put(self, ip: str, hostname: Optional[str]):
+        """Cache a lookup result, using the negative TTL for failed lookups"""
+        ttl = self.positive_ttl if hostname else self.negative_ttl
+        with self._lock:
+            self._store(ip, hostname or None, time.time() + ttl)
+
+    def resolve(self, ip: str) -> Optional[str]:
+        """Get the hostname for an IP, resolving and caching it on a miss"""
+        try:
+            return self.get(ip)
+        except KeyError:
+            pass
+
+        start_time = time.perf_counter()
+        hostname = self._lookup(ip)
+        elapsed = time.perf_counter() - start_time
+
+        self.put(ip, hostname)
+        self._record_misses(1, elapsed)
+        return hostname
+
+    def _record_misses(self, count: int, elapsed: float):
+        with self._lock:
+            self._misses += count
+            self._lookup_time += elapsed
+            save_due = (self.persist_file and self._dirty and
+                        time.monotonic() - self._last_save >= self.persist_interval)
+        if save_due:
+            self.save()
+
+    def prefetch(self, ips: Iterable[str]):
+        """Resolve all uncached IPs concurrently so the per-connection lookups that follow are cache hits"""
+        missing = []
+        now = time.time()
+        with self._lock:
+            for ip in set(ips):
+                entry = self._cache.get(ip)
+                if entry is None or entry[1] <= now:
+                    missing.append(ip)
+        if not missing:
+            return
+
+        start_time = time.perf_counter()
+        if self.resolver is not None:
+            results = self.resolver.resolve_many(missing)
+        else:
+            results = {ip: self._lookup(ip) for ip in missing}
+        elapsed = time.perf_counter() - start_time
+
+        for ip, hostname in results.items():
+            self.put(ip, hostname)
+        self._record_misses(len(results), elapsed)
+
+    def hostname_or_ip(self, ip: str) -> str:
+        """Get the hostname for an IP, falling back to the IP itself"""
+        return self.resolve(ip) or ip
+
+    def load(self):
+        """Load unexpired entries from the persist file"""
+        try:
+            with open(self.persist_file, 'r') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"Could not load DNS cache from {self.persist_file}: {e}")
+            return
+
+        now = time.time()
+        loaded = 0
+        with self._lock:
+            # Entries are saved oldest first, so replaying them restores LRU order
+            for ip, (hostname, expires_at) in data.get('entries', {}).items():
+                if expires_at > now:
+                    self._store(ip, hostname, expires_at)
+                    loaded += 1
+            self._dirty = False
+        self.logger.info(f"Loaded {loaded} cached reverse DNS entries from {self.persist_file}")
+
+    def save(self):
+        """Atomically write unexpired entries to the persist file"""
+        if not self.persist_file:
+            return
+        now = time.time()
+        with self._lock:
+            entries = {ip: entry for ip, entry in self._cache.items() if entry[1] > now}
+            self._dirty = False
+            self._last_save = time.monotonic()
+
+        try:
+            directory = os.path.dirname(self.persist_file)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = self.persist_file + '.tmp'
+            with open(tmp_path, 'w') as f:
+                json.dump({'saved_at': now, 'entries': entries}, f)
+            os.replace(tmp_path, self.persist_file)
+        except OSError as e:
+            self.logger.error(f"Error saving DNS cache to {self.persist_file}: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache size and hit-rate counters"""
+        resolver_stats = self.resolver.get_stats() if self.resolver is not None else None
+        with self._lock:
+            lookups = self._hits + self._negative_hits + self._misses
+            return {
+                'size': len(self._cache),
+                'max_size': self.max_size,
+                'hits': self._hits,
+                'negative_hits': self._negative_hits,
+                'misses': self._misses,
+                'expired': self._expired,
+                'evictions': self._evictions,
+                'hit_rate': round((self._hits + self._negative_hits) / lookups, 4) if lookups else 0.0,
+                'avg_lookup_ms': round(self._lookup_time / self._misses * 1000, 2) if self._misses else 0.0,
+                'resolver': resolver_stats
+            }
@@ -0,0 +1,107 @@
+"""
+Concurrent PTR Resolver
+Reverse lookups on a bounded dnspython worker pool with per-query timeouts and in-flight coalescing
+"""
+
+import socket
+import threading
+import logging
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Dict, Iterable, List, Optional
+import dns.exception
+import dns.resolver
+import dns.reversename
+
+class PTRResolver:
+    def __init__(self, max_workers: int = 32, timeout: float = 2.0,
+                 nameservers: Optional[List[str]] = None, port: int = 53):
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.logger = logging.getLogger(__name__)
+
+        try:
+            self._resolver = dns.resolver.Resolver(configure=not nameservers)
+        except dns.resolver.NoResolverConfiguration:
+            self.logger.warning("No system resolver configuration, falling back to socket.gethostbyaddr")
+            self._resolver = None
+        if self._resolver is not None:
+            if nameservers:
+                self._resolver.nameservers = list(nameservers)
+            self._resolver.port = port
+            self._resolver.lifetime = timeout
+            self._resolver.timeout = timeout
+
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='ptr-resolver')
+        self._lock = threading.Lock()
+        self._inflight = {}  # ip -> Future
+
+        # Metrics
+        self._queries = 0
+        self._coalesced = 0
+        self._timeouts = 0
+        self._failures = 0
+
+    def _query(self, ip: str) -> Optional[str]:
+        """Run one PTR query; None when the address has no name or the query failed"""
+        try:
+            if self._resolver is None:
+                return socket.gethostbyaddr(ip)[0].rstrip('.') or None
+            answer = self._resolver.resolve(dns.reversename.from_address(ip), 'PTR')
+            return str(answer[0].target).rstrip('.') or None
+        except (dns.resolver.NXDOMAIN, dns.resolver.NoAnswer, socket.herror):
+            return None
+        except dns.exception.Timeout:
+            with self._lock:
+                self._timeouts += 1
+            self.logger.debug(f"PTR lookup for {ip} timed out after {self.timeout}s")
+            return None
+        except (dns.exception.DNSException, OSError, ValueError) as e:
+            with self._lock:
+                self._failures += 1
+            self.logger.debug(f"PTR lookup for {ip} failed: {e}")
+            return None
+
+    def _finish(self, ip: str, future: Future):
+        with self._lock:
+            if self._inflight.get(ip) is future:
+                del self._inflight[ip]
+
+    def submit(self, ip: str) -> Future:
+        """Start a lookup, sharing the pending query if one for the same IP is already running"""
+        with self._lock:
+            future = self._inflight.get(ip)
+            if future is not None:
+                self._coalesced += 1
+                return future
+            future = self._executor.submit(self._query, ip)
+            self._inflight[ip] = future
+            self._queries += 1
+        future.add_done_callback(lambda f: self._finish(ip, f))
+        return future
+
+    def resolve(self, ip: str) -> Optional[str]:
+        """Resolve a single IP"""
+        return self.submit(ip).result()
+
+    def resolve_many(self, ips: Iterable[str]) -> Dict[str, Optional[str]]:
+        """Resolve IPs concurrently; total latency is bounded by the slowest single query"""
+        futures = {ip: self.submit(ip) for ip in set(ips)}
+        wait(futures.values())
+        return {ip: future.result() for ip, future in futures.items()}
+
+    def shutdown(self):
+        """Stop the worker pool"""
+        self._executor.shutdown(wait=False)
+
+    def get_stats(self):
+        """Get query, coalescing and timeout counters"""
+        with self._lock:
+            return {
+                'queries': self._queries,
+                'coalesced': self._coalesced,
+                'timeouts': self._timeouts,
+                'failures': self._failures,
+                'in_flight': len(self._inflight),
+                'max_workers': self.max_workers,
+                'timeout': self.timeout
+            }
@@ -0,0 +1,76 @@
+"""
+Domain Matcher
+Reversed-label trie for exact and parent-domain matches against threat-intel domain lists
+"""
+
+import ipaddress
+from typing import Iterable, List, Optional
+
+_TERMINAL = ''  # labels are never empty, so '' marks the end of a listed domain
+
+def normalize_domain(domain: str) -> str:
+    """Lowercase a domain and strip wildcard prefixes and the root dot"""
+    domain = domain.strip().lower().rstrip('.')
+    if domain.startswith('*.'):
+        domain = domain[2:]
+    return domain.lstrip('.')
+
+def parse_domain_list(text: str) -> List[str]:
+    """Extract domains from plain, hosts-file ("0.0.0.0 evil.com") or tab-separated feed lines"""
+    domains = []
+    for line in text.splitlines():
+        line = line.split('#', 1)[0].strip()
+        if not line:
+            continue
+        for token in line.split():
+            try:
+                ipaddress.ip_address(token)
+                continue
+            except ValueError:
+                pass
+            if '.' in token and any(c.isalpha() for c in token):
+                domains.append(normalize_domain(token))
+                break
+    return domains
+
+class DomainMatcher:
+    def __init__(self, domains: Iterable[str] = ()):
+        self._root = {}
+        self._count = 0
+        for domain in domains:
+            self.add(domain)
+
+    def __len__(self):
+        return self._count
+
+    def add(self, domain: str):
+        """Add a domain; it then matches itself and every subdomain"""
+        labels = normalize_domain(domain).split('.')
+        if not labels[0]:
+            return
+        node = self._root
+        for label in reversed(labels):
+            node = node.setdefault(label, {})
+        if _TERMINAL not in node:
+            node[_TERMINAL] = True
+            self._count += 1
+
+    def match(self, hostname: str) -> Optional[str]:
+        """Return the listed domain that hostname equals or falls under, if any"""
+        if not hostname:
+            return None
+        labels = hostname.lower().rstrip('.').split('.')
+        node = self._root
+        depth = 0
+        for label in reversed(labels):
+            node = node.get(label)
+            if node is None:
+                return None
+            depth += 1
+            if _TERMINAL in node:
+                # The shortest listed parent wins; everything beneath it is covered anyway
+                return '.'.join(labels[-depth:])
+        return None
+
+    def __contains__(self, hostname: str) -> bool:
+        return self.match(hostname) is not None
@@ -0,0 +1,195 @@
+"""
+Domain Rules
+Web monitor rule lists compiled once into an Aho-Corasick automaton, suffix sets and precompiled regexes,
+and an LRU of per-domain verdicts keyed by rule-set version
+"""
+
+import re
+import threading
+from collections import OrderedDict, defaultdict, deque
+from typing import Any, Dict, Iterable, List, Set
+
+IP_ADDRESS_PATTERN = re.compile(r'^\d+\.\d+\.\d+\.\d+$')
+SUSPICIOUS_PATTERNS = [re.compile(pattern) for pattern in (
+    r'[0-9]{8,}',  # Long number sequences
+    r'[a-f0-9]{32,}',  # Hash-like names
+    r'[a-z]{1,3}\.[a-z]{2,4}$',  # Very short domains
+    r'.*\.tk$',  # .tk domains
+    r'.*\.ml$',  # .ml domains
+)]
+
+class LiteralAutomaton:
+    """Aho-Corasick automaton finding which of many literal strings occur in a text in one pass"""
+
+    def __init__(self, patterns: Iterable[str]):
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [()]
+        self._empty = False  # '' occurs in every text
+
+        for pattern in set(patterns):
+            if not pattern:
+                self._empty = True
+                continue
+            state = 0
+            for char in pattern:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][char] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append(())
+                state = next_state
+            self._out[state] = (pattern,)
+
+        # Breadth-first, so each state's failure target is finished before its children need it
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, child in self._goto[state].items():
+                queue.append(child)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(char, 0)
+                self._out[child] += self._out[self._fail[child]]
+
+    def __len__(self):
+        return len(self._goto)
+
+    def search(self, text: str) -> bool:
+        """Check whether any pattern occurs in text"""
+        if self._empty:
+            return True
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if out[state]:
+                return True
+        return False
+
+    def find_all(self, text: str) -> Set[str]:
+        """Get every pattern that occurs in text"""
+        found = {''} if self._empty else set()
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if out[state]:
+                found.update(out[state])
+        return found
+
+class DomainRules:
+    def __init__(self, legitimate_domains: Iterable[str], suspicious_keywords: Iterable[str],
+                 suspicious_tlds: Iterable[str]):
+        legitimate_domains = set(legitimate_domains)
+        # Legitimate domains keep their substring semantics ("google.com" also covers "google.com.au")
+        self.legitimate = LiteralAutomaton(legitimate_domains)
+
+        # List positions keep indicators in config order, repeated entries included
+        self._keyword_positions = self._positions(suspicious_keywords)
+        self.keywords = LiteralAutomaton(self._keyword_positions)
+
+        self._tld_positions = self._positions(suspicious_tlds)
+        self._tld_lengths = sorted({len(tld) for tld in self._tld_positions})
+
+        self.rule_count = (len(self._keyword_positions) + len(self._tld_positions) +
+                           len(legitimate_domains) + len(SUSPICIOUS_PATTERNS) + 1)
+
+    @staticmethod
+    def _positions(values: Iterable[str]) -> Dict[str, List[int]]:
+        positions = defaultdict(list)
+        for i, value in enumerate(values):
+            positions[value].append(i)
+        return dict(positions)
+
+    @staticmethod
+    def _ordered(found: Iterable[str], positions: Dict[str, List[int]]) -> List[str]:
+        return [value for _, value in sorted((i, value) for value in found for i in positions[value])]
+
+    def is_legitimate(self, domain: str) -> bool:
+        return self.legitimate.search(domain)
+
+    def matching_keywords(self, domain_lower: str) -> List[str]:
+        """Suspicious keywords contained in the domain, in config order"""
+        found = self.keywords.find_all(domain_lower)
+        return self._ordered(found, self._keyword_positions) if found else []
+
+    def matching_tlds(self, domain: str) -> List[str]:
+        """Suspicious TLDs the domain ends with, in config order"""
+        found = []
+        length = len(domain)
+        for tld_length in self._tld_lengths:
+            if tld_length > length:
+                break
+            suffix = domain[length - tld_length:]
+            if suffix in self._tld_positions:
+                found.append(suffix)
+        return self._ordered(found, self._tld_positions) if found else []
+
+    def is_ip_address(self, domain: str) -> bool:
+        return IP_ADDRESS_PATTERN.match(domain) is not None
+
+    def matching_patterns(self, domain_lower: str) -> List[str]:
+        return [pattern.pattern for pattern in SUSPICIOUS_PATTERNS if pattern.search(domain_lower)]
+
+    def get_stats(self) -> Dict[str, int]:
+        """Get rule and automaton sizes"""
+        return {
+            'rules': self.rule_count,
+            'legitimate_states': len(self.legitimate),
+            'keyword_states': len(self.keywords)
+        }
+
+class VerdictCache:
+    def __init__(self, max_size: int = 10000):
+        self.max_size = max_size
+        self._cache = OrderedDict()  # (domain, ruleset version) -> analysis
+        self._lock = threading.Lock()
+
+        # Metrics
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def get(self, domain: str, version: int) -> Dict[str, Any]:
+        """Get a copy of the cached analysis; raises KeyError on a miss"""
+        key = (domain, version)
+        with self._lock:
+            analysis = self._cache.get(key)
+            if analysis is None:
+                self._misses += 1
+                raise KeyError(domain)
+            self._cache.move_to_end(key)
+            self._hits += 1
+        # Callers attach analyses to reports, so hand out copies rather than the cached dict
+        return dict(analysis, indicators=list(analysis['indicators']))
+
+    def put(self, domain: str, version: int, analysis: Dict[str, Any]):
+        key = (domain, version)
+        with self._lock:
+            self._cache[key] = dict(analysis, indicators=list(analysis['indicators']))
+            self._cache.move_to_end(key)
+            # Entries from older rule-set versions are never hit again and age out first
+            while len(self._cache) > self.max_size:
+                self._cache.popitem(last=False)
+                self._evictions += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache size and hit-rate counters"""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                'size': len(self._cache),
+                'max_size': self.max_size,
+                'hits': self._hits,
+                'misses': self._misses,
+                'evictions': self._evictions,
+                'hit_rate': round(self._hits / lookups, 4) if lookups else 0.0
+            }
@@ -0,0 +1,113 @@
+"""
+File Hasher
+MD5/SHA256 hashing with large reusable read buffers, fanned out over a thread pool
+"""
+
+import os
+import hashlib
+import threading
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, Optional
+
+class FileHasher:
+    def __init__(self, workers: int = 4, buffer_size: int = 1024 * 1024, max_bytes: Optional[int] = None):
+        self.workers = max(1, workers)
+        self.buffer_size = buffer_size
+        self.max_bytes = max_bytes  # hash only this many leading bytes of larger files
+        self.logger = logging.getLogger(__name__)
+
+        # hashlib releases the GIL while digesting, so threads hash files in parallel
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='file-hasher')
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+        # Metrics
+        self._files = 0
+        self._bytes = 0
+        self._partial = 0
+        self._errors = 0
+        self._wall_time = 0.0
+
+    def _buffer(self) -> memoryview:
+        view = getattr(self._local, 'view', None)
+        if view is None:
+            view = self._local.view = memoryview(bytearray(self.buffer_size))
+        return view
+
+    def _hash(self, file_path: str) -> Optional[Dict[str, Any]]:
+        view = self._buffer()
+        md5 = hashlib.md5()
+        sha256 = hashlib.sha256()
+        remaining = self.max_bytes
+        total = 0
+        try:
+            with open(file_path, 'rb', buffering=0) as f:
+                if hasattr(os, 'posix_fadvise'):
+                    os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+                while remaining is None or remaining > 0:
+                    chunk = view if remaining is None or remaining >= len(view) else view[:remaining]
+                    n = f.readinto(chunk)
+                    if not n:
+                        break
+                    data = chunk[:n]
+                    md5.update(data)
+                    sha256.update(data)
+                    total += n
+                    if remaining is not None:
+                        remaining -= n
+                partial = remaining == 0 and f.read(1) != b''
+        except OSError as e:
+            with self._lock:
+                self._errors += 1
+            self.logger.error(f"Error calculating hash for {file_path}: {e}")
+            return None
+
+        with self._lock:
+            self._files += 1
+            self._bytes += total
+            self._partial += partial
+        return {
+            'md5': md5.hexdigest(),
+            'sha256': sha256.hexdigest(),
+            'bytes_hashed': total,
+            'partial': partial
+        }
+
+    def hash_file(self, file_path: str) -> Optional[Dict[str, Any]]:
+        """Hash one file; the result carries 'partial' when max_bytes cut it short"""
+        start_time = time.perf_counter()
+        result = self._hash(file_path)
+        with self._lock:
+            self._wall_time += time.perf_counter() - start_time
+        return result
+
+    def hash_files(self, file_paths: Iterable[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """Hash many files concurrently"""
+        file_paths = list(file_paths)
+        if not file_paths:
+            return {}
+        start_time = time.perf_counter()
+        if len(file_paths) == 1 or self.workers == 1:
+            results = {file_path: self._hash(file_path) for file_path in file_paths}
+        else:
+            results = dict(zip(file_paths, self._executor.map(self._hash, file_paths)))
+        with self._lock:
+            self._wall_time += time.perf_counter() - start_time
+        return results
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hashing volume and throughput"""
+        with self._lock:
+            return {
+                'files': self._files,
+                'bytes': self._bytes,
+                'partial': self._partial,
+                'errors': self._errors,
+                'workers': self.workers,
+                'throughput_mb_s': round(self._bytes / self._wall_time / (1024 * 1024), 1) if self._wall_time else 0.0
+            }
@@ -0,0 +1,167 @@
+"""
+inotify File Watcher
+Recursive directory watches through libc's inotify via ctypes (Linux only)
+"""
+
+import os
+import sys
+import errno
+import select
+import struct
+import ctypes
+import ctypes.util
+import logging
+from typing import Iterable, Set, Tuple
+
+# <sys/inotify.h>
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = (IN_CLOSE_WRITE | IN_MOVED_TO | IN_MOVED_FROM | IN_CREATE | IN_DELETE |
+              IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR)
+
+EVENT_HEADER = struct.Struct('iIII')  # wd, mask, cookie, len
+
+_libc = None
+
+def _load_libc():
+    global _libc
+    if _libc is None:
+        _libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+    return _libc
+
+def inotify_available() -> bool:
+    """Check whether inotify can be used on this host"""
+    if not sys.platform.startswith('linux'):
+        return False
+    try:
+        return hasattr(_load_libc(), 'inotify_init1')
+    except OSError:
+        return False
+
+class InotifyWatcher:
+    def __init__(self, paths: Iterable[str]):
+        self.logger = logging.getLogger(__name__)
+        self._libc = _load_libc()
+        self._fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, f"inotify_init1 failed: {os.strerror(err)}")
+
+        self._poller = select.poll()
+        self._poller.register(self._fd, select.POLLIN)
+        self._watches = {}  # wd -> directory path
+        self.roots = list(paths)
+        self.overflows = 0
+
+        for root in self.roots:
+            if os.path.isdir(root):
+                self.add_tree(root, strict=True)
+
+    def _add_watch(self, directory: str, strict: bool = False) -> bool:
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), WATCH_MASK)
+        if wd < 0:
+            err = ctypes.get_errno()
+            if err == errno.ENOSPC:
+                message = f"inotify watch limit reached adding {directory}; raise fs.inotify.max_user_watches"
+                if strict:
+                    raise OSError(err, message)
+                self.logger.warning(message)
+            elif err not in (errno.ENOENT, errno.ENOTDIR, errno.EACCES):
+                self.logger.warning(f"Could not watch {directory}: {os.strerror(err)}")
+            return False
+        self._watches[wd] = directory
+        return True
+
+    def add_tree(self, directory: str, strict: bool = False) -> Set[str]:
+        """Watch a directory and all subdirectories; returns files already inside it"""
+        existing = set()
+        for root, dirs, files in os.walk(directory):
+            if not self._add_watch(root, strict):
+                dirs[:] = []
+                continue
+            existing.update(os.path.join(root, name) for name in files)
+        return existing
+
+    def read_events(self, timeout: float = 1.0) -> Tuple[Set[str], Set[str], bool]:
+        """Wait for events; returns (changed_files, removed_paths, overflowed)"""
+        changed, removed = set(), set()
+        if not self._poller.poll(timeout * 1000):
+            return changed, removed, False
+
+        overflowed = False
+        while True:
+            try:
+                data = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            if not data:
+                break
+
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+                offset += EVENT_HEADER.size
+                name = data[offset:offset + length].rstrip(b'\0')
+                offset += length
+
+                if mask & IN_Q_OVERFLOW:
+                    overflowed = True
+                    continue
+                if mask & IN_IGNORED:
+                    self._watches.pop(wd, None)
+                    continue
+
+                directory = self._watches.get(wd)
+                if directory is None:
+                    continue
+                if mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+                    # A directory moved within the tree was re-watched under its new path already
+                    if not os.path.isdir(directory):
+                        self._libc.inotify_rm_watch(self._fd, wd)
+                    continue
+                if not name:
+                    continue
+                path = os.path.join(directory, os.fsdecode(name))
+
+                if mask & IN_ISDIR:
+                    if mask & (IN_CREATE | IN_MOVED_TO):
+                        # Files may land in a new directory before its watch exists
+                        changed.update(self.add_tree(path))
+                    elif mask & (IN_DELETE | IN_MOVED_FROM):
+                        removed.add(path)
+                elif mask & (IN_CLOSE_WRITE | IN_MOVED_TO):
+                    changed.add(path)
+                    removed.discard(path)
+                elif mask & (IN_DELETE | IN_MOVED_FROM):
+                    removed.add(path)
+                    changed.discard(path)
+
+        if overflowed:
+            self.overflows += 1
+            self.logger.warning("inotify event queue overflowed, a full rescan is required")
+        return changed, removed, overflowed
+
+    def close(self):
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+            self._watches.clear()
+
+    def get_stats(self):
+        """Get watch and overflow counters"""
+        return {
+            'watches': len(self._watches),
+            'overflows': self.overflows
+        }
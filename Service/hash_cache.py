@@ -0,0 +1,144 @@
+"""
+File Hash Cache
+Persistent SQLite index of scanned files keyed by (device, inode, size, mtime_ns)
+"""
+
+import os
+import json
+import sqlite3
+import threading
+import logging
+from typing import Any, Dict, Iterable, Optional
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    dev INTEGER NOT NULL,
+    inode INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    md5 TEXT,
+    sha256 TEXT,
+    score INTEGER NOT NULL DEFAULT 0,
+    indicators TEXT,
+    malware_detected INTEGER NOT NULL DEFAULT 0,
+    ruleset TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_files_identity ON files (dev, inode, size, mtime_ns);
+"""
+
+def file_identity(st: os.stat_result):
+    """Identity of a file's contents as far as the filesystem can tell without reading it"""
+    return (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns)
+
+class FileHashCache:
+    def __init__(self, db_path: str, ruleset: str = ''):
+        self.db_path = db_path
+        self.ruleset = ruleset  # results scored under a different ruleset are rescored from cached hashes
+        self.logger = logging.getLogger(__name__)
+
+        self._lock = threading.Lock()
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(SCHEMA)
+
+        # path -> (identity, ruleset); the whole index stays in memory so unchanged files cost one dict lookup
+        self._index = {}
+        self._pending = []
+
+        # Metrics
+        self._skipped = 0
+        self._scanned = 0
+        self._rehash_avoided = 0
+        self._pruned = 0
+
+        self._load()
+
+    def _load(self):
+        with self._lock:
+            for path, dev, inode, size, mtime_ns, ruleset in self._conn.execute(
+                    'SELECT path, dev, inode, size, mtime_ns, ruleset FROM files'):
+                self._index[path] = ((dev, inode, size, mtime_ns), ruleset)
+        self.logger.info(f"Loaded {len(self._index)} cached file hashes from {self.db_path}")
+
+    def is_unchanged(self, path: str, st: os.stat_result) -> bool:
+        """Check whether a file was already scanned at this path, with these contents and this ruleset"""
+        cached = self._index.get(path)
+        if cached is not None and cached == (file_identity(st), self.ruleset):
+            self._skipped += 1
+            return True
+        return False
+
+    def get_hashes(self, st: os.stat_result) -> Optional[Dict[str, str]]:
+        """Get stored hashes for identical contents, e.g. after a rename or ruleset change"""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT md5, sha256 FROM files WHERE dev = ? AND inode = ? AND size = ? AND mtime_ns = ? '
+                'AND md5 IS NOT NULL LIMIT 1', file_identity(st)).fetchone()
+        if row is None:
+            return None
+        self._rehash_avoided += 1
+        return {'md5': row[0], 'sha256': row[1]}
+
+    def update(self, path: str, st: os.stat_result, file_info: Dict[str, Any]):
+        """Record a scan result; written to disk on the next commit()"""
+        identity = file_identity(st)
+        hashes = file_info.get('hashes') or {}
+        if hashes.get('partial'):
+            hashes = {}  # truncated digests must not be reused as full-file hashes
+        self._pending.append((
+            path, *identity, hashes.get('md5'), hashes.get('sha256'),
+            file_info.get('suspicious_score', 0), json.dumps(file_info.get('indicators', [])),
+            int(bool(file_info.get('malware_detected'))), self.ruleset
+        ))
+        self._index[path] = (identity, self.ruleset)
+        self._scanned += 1
+
+    def prune(self, root: str, seen_paths: Iterable[str]):
+        """Forget files under root that were not seen in the latest walk"""
+        seen = set(seen_paths)
+        prefix = os.path.join(root, '')
+        self.forget([path for path in self._index if path.startswith(prefix) and path not in seen])
+
+    def forget(self, paths: Iterable[str]):
+        """Drop entries for deleted or moved files"""
+        gone = [path for path in paths if self._index.pop(path, None) is not None]
+        if not gone:
+            return
+        with self._lock:
+            self._conn.executemany('DELETE FROM files WHERE path = ?', ((path,) for path in gone))
+            self._conn.commit()
+        self._pruned += len(gone)
+
+    def commit(self):
+        """Write pending scan results in one transaction"""
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, []
+        try:
+            with self._lock:
+                self._conn.executemany(
+                    'INSERT OR REPLACE INTO files (path, dev, inode, size, mtime_ns, md5, sha256, score, '
+                    'indicators, malware_detected, ruleset) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', pending)
+                self._conn.commit()
+        except sqlite3.Error as e:
+            self.logger.error(f"Error writing file hash cache: {e}")
+
+    def close(self):
+        self.commit()
+        with self._lock:
+            self._conn.close()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get index size and skip counters"""
+        return {
+            'entries': len(self._index),
+            'skipped': self._skipped,
+            'scanned': self._scanned,
+            'rehash_avoided': self._rehash_avoided,
+            'pruned': self._pruned
+        }
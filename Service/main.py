@@ -10,6 +10,9 @@ import time
 from network_monitor import NetworkMonitor
 from malware_detector import MalwareDetector
 from web_monitor import WebMonitor
+from system_snapshot import SnapshotProvider
+from dns_cache import ReverseDNSCache
+from dns_resolver import PTRResolver
 
 def get_user_credentials():
     """Get username and password from user input"""
@@ -34,9 +37,17 @@ def get_user_credentials():
 def main():
     """Main function to run the network monitor"""
     parser = argparse.ArgumentParser(description='Real-time Network Monitor')
-    parser.add_argument('--host', default='localhost', help='Host to monitor (default: localhost)')
+    parser.add_argument('--host', nargs='+', default=['localhost'],
+                        help='Hosts, comma-separated lists or CIDR blocks to monitor (default: localhost)')
     parser.add_argument('--ports', nargs='+', type=int, help='Specific ports to monitor')
     parser.add_argument('--interval', type=int, default=30, help='Scan interval in seconds (default: 30)')
+    parser.add_argument('--concurrency', type=int, help='Maximum concurrent port probes')
+    parser.add_argument('--snapshot-freshness', type=float, default=5,
+                        help='Seconds a shared system snapshot is reused across monitors (default: 5)')
+    parser.add_argument('--dns-cache-file', default='dns_cache.json',
+                        help='File the shared reverse DNS cache is persisted to (default: dns_cache.json)')
+    parser.add_argument('--dns-workers', type=int, default=32, help='Concurrent reverse DNS queries (default: 32)')
+    parser.add_argument('--dns-timeout', type=float, default=2, help='Per-query reverse DNS timeout in seconds (default: 2)')
     parser.add_argument('--duration', type=int, help='Monitoring duration in seconds')
     parser.add_argument('--config', help='Configuration file path')
     parser.add_argument('--output', default='network_report.json', help='Output report file')
@@ -56,10 +67,15 @@ def main():
     if not args.no_auth:
         username, password = get_user_credentials()
     
-    # Create monitor instances
-    network_monitor = NetworkMonitor(args.config)
-    malware_detector = MalwareDetector(args.malware_config)
-    web_monitor = WebMonitor(args.web_config)
+    # Create monitor instances sharing one system snapshot per cycle
+    snapshot_provider = SnapshotProvider(args.snapshot_freshness)
+    dns_cache = ReverseDNSCache(
+        persist_file=args.dns_cache_file,
+        resolver=PTRResolver(max_workers=args.dns_workers, timeout=args.dns_timeout)
+    )
+    network_monitor = NetworkMonitor(args.config, snapshot_provider)
+    malware_detector = MalwareDetector(args.malware_config, snapshot_provider, dns_cache)
+    web_monitor = WebMonitor(args.web_config, snapshot_provider, dns_cache)
     
     # Update API credentials if provided
     if username and password:
@@ -83,6 +99,8 @@ def main():
         network_monitor.config['common_ports'] = args.ports
     if args.interval:
         network_monitor.config['scan_interval'] = args.interval
+    if args.concurrency:
+        network_monitor.config['scan_concurrency'] = args.concurrency
     if args.output:
         network_monitor.config['output_file'] = args.output
     if args.log:
@@ -131,7 +149,7 @@ def main():
             print("Starting Network Monitoring Only")
             print("=" * 50)
             print(f"User: {username if username else 'No authentication'}")
-            print(f"Monitoring on {args.host}")
+            print(f"Monitoring on {', '.join(args.host)}")
             print(f"Ports: {network_monitor.config['common_ports']}")
             print("Press Ctrl+C to stop monitoring")
             print("-" * 50)
@@ -153,7 +171,7 @@ def main():
             print("Starting Comprehensive Security Monitoring")
             print("=" * 50)
             print(f"User: {username if username else 'No authentication'}")
-            print(f"Network monitoring on {args.host}")
+            print(f"Network monitoring on {', '.join(args.host)}")
             print(f"Monitoring ports: {network_monitor.config['common_ports']}")
             print("Malware detection active")
             print("Web activity monitoring active")
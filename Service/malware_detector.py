@@ -9,17 +9,24 @@ import json
 import time
 import threading
 import psutil
-import socket
-import requests
 from datetime import datetime, timedelta
 from collections import defaultdict, deque
 import logging
 import re
 from pathlib import Path
 from api_client import APIClient
+from system_snapshot import SnapshotProvider
+from dns_cache import ReverseDNSCache
+from dns_resolver import PTRResolver
+from hash_cache import FileHashCache
+from file_watcher import InotifyWatcher, inotify_available
+from file_hasher import FileHasher
+from signature_store import SignatureStore, convert_json
+from domain_matcher import DomainMatcher
+from threat_intel import ThreatIntelFeeds
 
 class MalwareDetector:
-    def __init__(self, config_file=None):
+    def __init__(self, config_file=None, snapshot_provider=None, dns_cache=None):
         self.logger = self._setup_logging()
         self.running = False
         self.suspicious_files = []
@@ -30,6 +37,7 @@ class MalwareDetector:
         self.network_connections = deque(maxlen=1000)
         self.api_client = APIClient()
         self.alerted_files = {}  # Track recently alerted files
+        self.download_watcher = None
         
         # Configuration
         self.config = {
@@ -43,7 +51,11 @@ class MalwareDetector:
             'suspicious_extensions': ['.exe', '.bat', '.cmd', '.scr', '.pif', '.com', '.vbs', '.js', '.jar'],
             'max_file_size': 100 * 1024 * 1024,  # 100MB
             'malware_db_file': 'malware_signatures.json',
+            'signature_store_file': 'malware_signatures.sig',  # binary store built from malware_db_file; None to use JSON only
             'threat_intelligence_url': 'https://raw.githubusercontent.com/malwaredomains/malwaredomains/master/malwaredomains.txt',
+            'threat_intelligence_feeds': [],  # extra feed URLs, file:// URLs or local paths merged with the URL above
+            'threat_intelligence_cache_dir': 'threat_intel_cache',
+            'threat_intelligence_refresh_interval': 3600,  # seconds between conditional feed refreshes
             'suspicious_domains': set(),
             'alert_threshold': 5,
             'log_file': 'malware_detector.log',
@@ -51,18 +63,69 @@ class MalwareDetector:
             'api_username': 'admin',
             'api_password': 'admin123',
             'alert_cooldown': 300,  # 5 minutes cooldown
-            'min_suspicious_score': 3  # Minimum score to trigger alert
+            'api_batch_size': 200,  # reports per bulk request
+            'api_flush_interval': 2,  # seconds before a partial batch is flushed
+            'api_queue_size': 10000,  # max reports held in memory
+            'api_queue_policy': 'drop_oldest',  # or 'block'
+            'api_spool_enabled': True,  # persist undeliverable reports to disk
+            'api_spool_dir': 'spool/malware',
+            'api_spool_max_bytes': 100 * 1024 * 1024,  # 100MB
+            'api_spool_retry_interval': 10,  # seconds between reconnect attempts
+            'min_suspicious_score': 3,  # Minimum score to trigger alert
+            'snapshot_freshness': 5,  # seconds a system snapshot is reused
+            'dns_cache_size': 10000,  # reverse DNS entries kept in memory
+            'dns_positive_ttl': 3600,  # seconds a resolved hostname is reused
+            'dns_negative_ttl': 300,  # seconds a failed lookup is remembered
+            'dns_cache_file': 'dns_cache.json',
+            'dns_workers': 32,  # concurrent reverse DNS queries
+            'dns_timeout': 2,  # seconds per reverse DNS query
+            'dns_nameservers': [],  # empty uses the system resolver configuration
+            'hash_cache_enabled': True,  # skip files unchanged since their last scan
+            'hash_cache_file': 'file_hash_cache.db',
+            'download_watch_mode': 'auto',  # 'inotify', 'poll', or 'auto' (inotify when available)
+            'hash_workers': min(4, os.cpu_count() or 1),  # files hashed in parallel
+            'hash_buffer_size': 1024 * 1024,  # bytes per read
+            'hash_max_bytes': None,  # hash only the first N bytes of larger files (None hashes everything)
+            'hash_batch_size': 256  # changed files collected before hashing them together
         }
         
         if config_file and os.path.exists(config_file):
             self._load_config(config_file)
         
+        self.snapshot_provider = snapshot_provider or SnapshotProvider(self.config['snapshot_freshness'])
+        self.dns_cache = dns_cache or ReverseDNSCache(
+            max_size=self.config['dns_cache_size'],
+            positive_ttl=self.config['dns_positive_ttl'],
+            negative_ttl=self.config['dns_negative_ttl'],
+            persist_file=self.config['dns_cache_file'],
+            resolver=PTRResolver(
+                max_workers=self.config['dns_workers'],
+                timeout=self.config['dns_timeout'],
+                nameservers=self.config['dns_nameservers']
+            )
+        )
+        self.file_hasher = FileHasher(
+            workers=self.config['hash_workers'],
+            buffer_size=self.config['hash_buffer_size'],
+            max_bytes=self.config['hash_max_bytes']
+        )
         self._load_malware_signatures()
+        self.static_domains = set(self.config['suspicious_domains'])
+        self.domain_matcher = DomainMatcher(self.static_domains)
+        self.threat_intel = ThreatIntelFeeds(
+            [self.config['threat_intelligence_url'], *self.config['threat_intelligence_feeds']],
+            cache_dir=self.config['threat_intelligence_cache_dir'],
+            refresh_interval=self.config['threat_intelligence_refresh_interval']
+        )
         self._load_threat_intelligence()
+        self.hash_cache = None
+        if self.config['hash_cache_enabled']:
+            self._init_hash_cache()
         
         # Initialize API connection
         if self.config['api_enabled']:
             self._init_api_connection()
+            self._start_api_queue()
     
     def _setup_logging(self):
         """Setup logging for malware detection"""
@@ -85,8 +148,29 @@ class MalwareDetector:
         except Exception as e:
             self.logger.error(f"Error loading config: {e}")
     
+    def _load_signature_store(self):
+        """Open the memory-mapped signature store, rebuilding it when the JSON database is newer"""
+        json_file = self.config['malware_db_file']
+        store_file = self.config['signature_store_file']
+        if os.path.exists(json_file) and (not os.path.exists(store_file) or
+                                          os.path.getmtime(json_file) > os.path.getmtime(store_file)):
+            result = convert_json(json_file, store_file)
+            self.logger.info(f"Converted {json_file} to {store_file} ({result['skipped']} invalid signatures skipped)")
+        if not os.path.exists(store_file):
+            return False
+        self.malware_signatures = SignatureStore(store_file)
+        self.logger.info(f"Loaded {len(self.malware_signatures)} malware signatures from {store_file}")
+        return True
+    
     def _load_malware_signatures(self):
         """Load malware signatures from database"""
+        if self.config['signature_store_file']:
+            try:
+                if self._load_signature_store():
+                    return
+            except Exception as e:
+                self.logger.error(f"Error loading signature store, falling back to JSON: {e}")
+        
         try:
             if os.path.exists(self.config['malware_db_file']):
                 with open(self.config['malware_db_file'], 'r') as f:
@@ -96,18 +180,44 @@ class MalwareDetector:
         except Exception as e:
             self.logger.error(f"Error loading malware signatures: {e}")
     
+    def _scan_ruleset(self):
+        """Fingerprint of everything a file score depends on besides its contents and name"""
+        signatures = []
+        for signature_file in (self.config['malware_db_file'], self.config['signature_store_file']):
+            try:
+                st = os.stat(signature_file)
+                signatures.append([st.st_size, st.st_mtime_ns])
+            except (OSError, TypeError):
+                signatures.append(None)
+        ruleset = json.dumps([signatures, sorted(self.config['suspicious_extensions']), self.config['max_file_size']])
+        return hashlib.sha1(ruleset.encode('utf-8')).hexdigest()
+    
+    def _init_hash_cache(self):
+        """Open the persistent file hash cache"""
+        try:
+            self.hash_cache = FileHashCache(self.config['hash_cache_file'], self._scan_ruleset())
+        except Exception as e:
+            self.logger.error(f"Error opening file hash cache, scanning without it: {e}")
+            self.hash_cache = None
+    
     def _load_threat_intelligence(self):
-        """Load threat intelligence from external sources"""
+        """Load cached threat intelligence now and refresh the feeds in the background"""
         try:
-            # Load known malicious domains
-            response = requests.get(self.config['threat_intelligence_url'], timeout=10)
-            if response.status_code == 200:
-                domains = response.text.strip().split('\n')
-                self.config['suspicious_domains'] = set(domain.strip() for domain in domains if domain.strip())
-                self.logger.info(f"Loaded {len(self.config['suspicious_domains'])} suspicious domains")
+            cached = self.threat_intel.load_cached()
+            if cached:
+                self._apply_threat_intelligence(cached)
+            self.threat_intel.start(self._apply_threat_intelligence)
         except Exception as e:
             self.logger.warning(f"Could not load threat intelligence: {e}")
     
+    def _apply_threat_intelligence(self, feed_domains):
+        """Swap in a matcher built from the configured and feed domains"""
+        domains = self.static_domains | feed_domains
+        # Build the new matcher fully before swapping it in, so lookups never see a partial list
+        self.domain_matcher = DomainMatcher(domains)
+        self.config['suspicious_domains'] = domains
+        self.logger.info(f"Loaded {len(domains)} suspicious domains")
+    
     def _init_api_connection(self):
         """Initialize API connection"""
         try:
@@ -118,13 +228,28 @@ class MalwareDetector:
         except Exception as e:
             self.logger.error(f"API connection error: {e}")
     
+    def _start_api_queue(self):
+        """Start batched background delivery of API reports"""
+        if self.config['api_spool_enabled']:
+            self.api_client.enable_spool(
+                self.config['api_spool_dir'],
+                max_bytes=self.config['api_spool_max_bytes'],
+                retry_interval=self.config['api_spool_retry_interval']
+            )
+        self.api_client.start_batching(
+            max_size=self.config['api_queue_size'],
+            batch_size=self.config['api_batch_size'],
+            flush_interval=self.config['api_flush_interval'],
+            overflow_policy=self.config['api_queue_policy']
+        )
+    
     def _send_to_api(self, report_data):
         """Send report data to API"""
         if not self.config['api_enabled']:
             return
         
         try:
-            self.api_client.send_malware_report(report_data)
+            self.api_client.queue_malware_report(report_data)
         except Exception as e:
             self.logger.error(f"Error sending to API: {e}")
     
@@ -141,25 +266,10 @@ class MalwareDetector:
     
     def calculate_file_hash(self, file_path):
         """Calculate MD5 and SHA256 hashes of a file"""
-        try:
-            hash_md5 = hashlib.md5()
-            hash_sha256 = hashlib.sha256()
-            
-            with open(file_path, "rb") as f:
-                for chunk in iter(lambda: f.read(4096), b""):
-                    hash_md5.update(chunk)
-                    hash_sha256.update(chunk)
-            
-            return {
-                'md5': hash_md5.hexdigest(),
-                'sha256': hash_sha256.hexdigest()
-            }
-        except Exception as e:
-            self.logger.error(f"Error calculating hash for {file_path}: {e}")
-            return None
+        return self.file_hasher.hash_file(file_path)
     
-    def scan_file(self, file_path):
-        """Scan a single file for malware indicators"""
+    def scan_file(self, file_path, hashes=None):
+        """Scan a single file for malware indicators; pass known hashes to skip re-reading the file"""
         try:
             if not os.path.exists(file_path):
                 return None
@@ -184,8 +294,13 @@ class MalwareDetector:
                 file_info['indicators'].append(f"Large file size: {file_info['size']} bytes")
             
             # Calculate and check hashes
-            hashes = self.calculate_file_hash(file_path)
-            if hashes:
+            if hashes is None:
+                hashes = self.calculate_file_hash(file_path)
+            if hashes and hashes.get('partial'):
+                # Digests of a truncated read cannot match full-file signatures
+                file_info['hashes'] = hashes
+                file_info['indicators'].append(f"Only the first {hashes['bytes_hashed']} bytes were hashed")
+            elif hashes:
                 file_info['hashes'] = hashes
                 
                 # Check against known malware signatures
@@ -215,49 +330,148 @@ class MalwareDetector:
             self.logger.error(f"Error scanning file {file_path}: {e}")
             return None
     
+    def _needs_scan(self, file_path, seen_paths=None):
+        """Return (stat, cached_hashes) for a file that must be scanned, or None to skip it"""
+        if not self.hash_cache:
+            return None, None
+        try:
+            st = os.stat(file_path)
+        except OSError:
+            return None
+        if seen_paths is not None:
+            seen_paths.append(file_path)
+        # Unchanged files were fully handled on a previous pass
+        if self.hash_cache.is_unchanged(file_path, st):
+            return None
+        return st, self.hash_cache.get_hashes(st)
+    
+    def _scan_downloads(self, file_paths, seen_paths=None):
+        """Scan downloaded files, hashing them in parallel, and report suspicious ones"""
+        pending = []
+        for file_path in file_paths:
+            needed = self._needs_scan(file_path, seen_paths)
+            if needed is not None:
+                pending.append((file_path, *needed))
+            if len(pending) >= self.config['hash_batch_size']:
+                self._scan_pending(pending)
+                pending = []
+        self._scan_pending(pending)
+    
+    def _scan_pending(self, pending):
+        """Hash files without cached hashes concurrently, then score them in order"""
+        hashed = self.file_hasher.hash_files(file_path for file_path, st, hashes in pending if hashes is None)
+        for file_path, st, hashes in pending:
+            if hashes is None:
+                hashes = hashed.get(file_path) or {}  # {} keeps scan_file from re-reading a file that failed
+            self._report_file(file_path, st, self.scan_file(file_path, hashes))
+    
+    def _report_file(self, file_path, st, file_info):
+        """Record a scan result and alert if the file is suspicious"""
+        if file_info and self.hash_cache:
+            self.hash_cache.update(file_path, st, file_info)
+        
+        if file_info and file_info['suspicious_score'] >= self.config['min_suspicious_score'] and self._should_alert_file(file_path):
+            self.suspicious_files.append(file_info)
+            self.logger.warning(f"Suspicious file detected: {file_path}")
+            self.logger.warning(f"Score: {file_info['suspicious_score']}, Indicators: {file_info['indicators']}")
+            
+            # Send to API; digests of a capped read are not the file's hashes, so none are reported
+            hashes = file_info.get('hashes', {})
+            if hashes.get('partial'):
+                hashes = {}
+            api_data = {
+                'file_path': file_info['path'],
+                'file_name': os.path.basename(file_info['path']),
+                'file_size': file_info['size'],
+                'file_hash_md5': hashes.get('md5'),
+                'file_hash_sha256': hashes.get('sha256'),
+                'suspicious_score': file_info['suspicious_score'],
+                'malware_detected': file_info.get('malware_detected', False),
+                'indicators': json.dumps(file_info['indicators']),
+                'status': 'detected'
+            }
+            self._send_to_api(api_data)
+            
+            if file_info.get('malware_detected'):
+                self.logger.critical(f"MALWARE DETECTED: {file_path}")
+    
     def monitor_downloads(self):
         """Monitor download directories for new files"""
         for download_path in self.config['download_paths']:
             if os.path.exists(download_path):
+                seen_paths = []
                 try:
-                    for root, dirs, files in os.walk(download_path):
-                        for file in files:
-                            file_path = os.path.join(root, file)
-                            file_info = self.scan_file(file_path)
-                            
-                            if file_info and file_info['suspicious_score'] >= self.config['min_suspicious_score'] and self._should_alert_file(file_path):
-                                self.suspicious_files.append(file_info)
-                                self.logger.warning(f"Suspicious file detected: {file_path}")
-                                self.logger.warning(f"Score: {file_info['suspicious_score']}, Indicators: {file_info['indicators']}")
-                                
-                                # Send to API
-                                api_data = {
-                                    'file_path': file_info['path'],
-                                    'file_name': os.path.basename(file_info['path']),
-                                    'file_size': file_info['size'],
-                                    'file_hash_md5': file_info.get('hashes', {}).get('md5'),
-                                    'file_hash_sha256': file_info.get('hashes', {}).get('sha256'),
-                                    'suspicious_score': file_info['suspicious_score'],
-                                    'malware_detected': file_info.get('malware_detected', False),
-                                    'indicators': json.dumps(file_info['indicators']),
-                                    'status': 'detected'
-                                }
-                                self._send_to_api(api_data)
-                                
-                                if file_info.get('malware_detected'):
-                                    self.logger.critical(f"MALWARE DETECTED: {file_path}")
-                                
+                    self._scan_downloads(
+                        (os.path.join(root, file) for root, dirs, files in os.walk(download_path) for file in files),
+                        seen_paths
+                    )
+                    
+                    if self.hash_cache:
+                        self.hash_cache.prune(download_path, seen_paths)
                 except Exception as e:
                     self.logger.error(f"Error monitoring {download_path}: {e}")
+                finally:
+                    if self.hash_cache:
+                        self.hash_cache.commit()
+    
+    def _start_download_watcher(self):
+        """Start event-driven download monitoring; returns None when polling should be used instead"""
+        mode = self.config['download_watch_mode']
+        if mode == 'poll':
+            return None
+        if not inotify_available():
+            if mode == 'inotify':
+                self.logger.warning("inotify is not available on this platform, polling download directories")
+            return None
+        
+        try:
+            watcher = InotifyWatcher([path for path in self.config['download_paths'] if os.path.isdir(path)])
+        except OSError as e:
+            self.logger.warning(f"Could not watch download directories, polling instead: {e}")
+            return None
+        
+        self.download_watcher = watcher
+        thread = threading.Thread(target=self.watch_downloads, args=(watcher,), daemon=True)
+        thread.start()
+        self.logger.info(f"Watching download directories with inotify ({watcher.get_stats()['watches']} directories)")
+        return thread
+    
+    def watch_downloads(self, watcher):
+        """Scan files as soon as they are written, with a full rescan whenever the event queue overflows"""
+        try:
+            # Catch up on anything written before the watches existed
+            self.monitor_downloads()
+            
+            while self.running:
+                changed, removed, overflowed = watcher.read_events(timeout=1.0)
+                if overflowed:
+                    self.monitor_downloads()
+                    continue
+                
+                if removed and self.hash_cache:
+                    for path in removed:
+                        self.hash_cache.forget([path])
+                        self.hash_cache.prune(path, ())
+                
+                self._scan_downloads(file_path for file_path in changed if os.path.isfile(file_path))
+                
+                if self.hash_cache:
+                    self.hash_cache.commit()
+        except Exception as e:
+            self.logger.error(f"Error watching download directories, falling back to polling: {e}")
+        finally:
+            watcher.close()
     
     def analyze_network_connections(self):
         """Analyze network connections for suspicious activity"""
         try:
-            connections = psutil.net_connections(kind='inet')
             suspicious_connections = []
+            snapshot = self.snapshot_provider.get()
+            connections = [conn for conn in snapshot.established() if conn.raddr]
+            self.dns_cache.prefetch(conn.raddr.ip for conn in connections)
             
             for conn in connections:
-                if conn.raddr and conn.status == 'ESTABLISHED':
+                if conn.raddr:
                     remote_ip = conn.raddr.ip
                     remote_port = conn.raddr.port
                     
@@ -269,19 +483,19 @@ class MalwareDetector:
                             'local': f"{conn.laddr.ip}:{conn.laddr.port}",
                             'remote': f"{remote_ip}:{remote_port}",
                             'pid': conn.pid,
-                            'process': psutil.Process(conn.pid).name() if conn.pid else None
+                            'process': snapshot.process_name(conn.pid)
                         })
                     
                     # Check for connections to suspicious domains
                     try:
-                        hostname = socket.gethostbyaddr(remote_ip)[0]
-                        if any(domain in hostname.lower() for domain in self.config['suspicious_domains']):
+                        hostname = self.dns_cache.resolve(remote_ip)
+                        if hostname and self.domain_matcher.match(hostname):
                             suspicious_connections.append({
                                 'type': 'suspicious_domain',
                                 'local': f"{conn.laddr.ip}:{conn.laddr.port}",
                                 'remote': f"{hostname} ({remote_ip}:{remote_port})",
                                 'pid': conn.pid,
-                                'process': psutil.Process(conn.pid).name() if conn.pid else None
+                                'process': snapshot.process_name(conn.pid)
                             })
                     except:
                         pass
@@ -321,32 +535,32 @@ class MalwareDetector:
         """Detect suspicious process behavior"""
         try:
             suspicious_processes = []
-            processes = list(psutil.process_iter(['pid', 'name', 'exe', 'cmdline', 'create_time']))
+            snapshot = self.snapshot_provider.get()
+            processes = snapshot.processes
             
-            for proc in processes:
+            for proc_info in processes:
                 try:
-                    proc_info = proc.info
-                    
                     # Check for processes with suspicious names
                     suspicious_names = [
                         'svchost.exe', 'explorer.exe', 'winlogon.exe', 'csrss.exe',
                         'lsass.exe', 'services.exe', 'smss.exe'
                     ]
                     
-                    if proc_info['name'] and proc_info['name'].lower() in suspicious_names:
+                    if proc_info.name and proc_info.name.lower() in suspicious_names:
                         # Check if multiple instances exist
-                        same_name_procs = [p for p in processes if p.info['name'] == proc_info['name']]
+                        same_name_procs = [p for p in processes if p.name == proc_info.name]
                         if len(same_name_procs) > 3:
                             suspicious_processes.append({
                                 'type': 'multiple_system_processes',
-                                'process': proc_info['name'],
+                                'process': proc_info.name,
                                 'count': len(same_name_procs),
-                                'pids': [p.info['pid'] for p in same_name_procs]
+                                'pids': [p.pid for p in same_name_procs]
                             })
                     
                     # Check for processes with suspicious command lines
-                    if proc_info['cmdline']:
-                        cmdline = ' '.join(proc_info['cmdline']).lower()
+                    proc_cmdline = snapshot.cmdline(proc_info.pid)
+                    if proc_cmdline:
+                        cmdline = ' '.join(proc_cmdline).lower()
                         suspicious_patterns = [
                             'powershell -enc',  # Encoded PowerShell
                             'cmd /c',  # Command execution
@@ -360,8 +574,8 @@ class MalwareDetector:
                             if pattern in cmdline:
                                 suspicious_processes.append({
                                     'type': 'suspicious_command',
-                                    'process': proc_info['name'],
-                                    'pid': proc_info['pid'],
+                                    'process': proc_info.name,
+                                    'pid': proc_info.pid,
                                     'command': cmdline,
                                     'pattern': pattern
                                 })
@@ -380,10 +594,13 @@ class MalwareDetector:
         self.running = True
         self.logger.info("Starting malware detection")
         
+        watcher_thread = self._start_download_watcher()
+        
         try:
             while self.running:
-                # Monitor downloads
-                self.monitor_downloads()
+                # Monitor downloads, unless inotify is already delivering them
+                if watcher_thread is None or not watcher_thread.is_alive():
+                    self.monitor_downloads()
                 
                 # Analyze network connections
                 network_threats = self.analyze_network_connections()
@@ -408,6 +625,8 @@ class MalwareDetector:
             self.logger.error(f"Error during malware detection: {e}")
         finally:
             self.running = False
+            self.api_client.stop_batching()
+            self.dns_cache.save()
     
     def get_detection_report(self):
         """Get current detection report"""
@@ -417,9 +636,18 @@ class MalwareDetector:
             'threat_indicators': dict(self.threat_indicators),
             'malware_signatures_count': len(self.malware_signatures),
             'suspicious_domains_count': len(self.config['suspicious_domains']),
-            'total_network_connections': len(self.network_connections)
+            'total_network_connections': len(self.network_connections),
+            'api_queue': self.api_client.get_queue_metrics(),
+            'dns_cache': self.dns_cache.get_stats(),
+            'hash_cache': self.hash_cache.get_stats() if self.hash_cache else None,
+            'file_hasher': self.file_hasher.get_stats(),
+            'download_watcher': self.download_watcher.get_stats() if self.download_watcher else None,
+            'threat_intelligence_feeds': self.threat_intel.get_stats()
         }
     
     def stop(self):
         """Stop malware detection"""
         self.running = False
+        self.threat_intel.stop()
+        self.api_client.stop_batching()
+        self.dns_cache.save()
@@ -4,9 +4,7 @@ Monitors network ports, analyzes traffic, and detects network activity
 """
 
 import socket
-import threading
 import time
-import psutil
 import logging
 import sys
 from datetime import datetime
@@ -14,9 +12,11 @@ from collections import defaultdict, deque
 import json
 import os
 from api_client import APIClient
+from port_scanner import AsyncPortScanner, expand_targets, is_single_target
+from system_snapshot import SnapshotProvider
 
 class NetworkMonitor:
-    def __init__(self, config_file=None):
+    def __init__(self, config_file=None, snapshot_provider=None):
         self.running = False
         self.monitored_ports = set()
         self.port_status = {}
@@ -31,21 +31,36 @@ class NetworkMonitor:
             'scan_interval': 30,  # seconds
             'common_ports': [21, 22, 23, 25, 53, 80, 110, 143, 443, 993, 995, 3389, 5432, 3306, 6379],
             'alert_threshold': 10,  # connections per minute
+            'scan_concurrency': 500,  # max in-flight connect probes
+            'scan_timeout': 1.0,  # seconds per connect probe
+            'scan_chunk_size': 256,  # hosts scanned together when sweeping ranges
+            'snapshot_freshness': 5,  # seconds a system snapshot is reused
             'log_file': 'network_monitor.log',
             'output_file': 'network_report.json',
             'api_enabled': True,
             'api_username': 'admin',
             'api_password': 'admin123',
             'alert_cooldown': 300,  # 5 minutes cooldown
+            'api_batch_size': 200,  # reports per bulk request
+            'api_flush_interval': 2,  # seconds before a partial batch is flushed
+            'api_queue_size': 10000,  # max reports held in memory
+            'api_queue_policy': 'drop_oldest',  # or 'block'
+            'api_spool_enabled': True,  # persist undeliverable reports to disk
+            'api_spool_dir': 'spool/network',
+            'api_spool_max_bytes': 100 * 1024 * 1024,  # 100MB
+            'api_spool_retry_interval': 10,  # seconds between reconnect attempts
             'report_open_ports_only': True  # Only report open ports to reduce noise
         }
         
         if config_file and os.path.exists(config_file):
             self._load_config(config_file)
         
+        self.snapshot_provider = snapshot_provider or SnapshotProvider(self.config['snapshot_freshness'])
+        
         # Initialize API connection
         if self.config['api_enabled']:
             self._init_api_connection()
+            self._start_api_queue()
     
     def _setup_logging(self):
         """Setup logging configuration"""
@@ -78,13 +93,28 @@ class NetworkMonitor:
         except Exception as e:
             self.logger.error(f"API connection error: {e}")
     
+    def _start_api_queue(self):
+        """Start batched background delivery of API reports"""
+        if self.config['api_spool_enabled']:
+            self.api_client.enable_spool(
+                self.config['api_spool_dir'],
+                max_bytes=self.config['api_spool_max_bytes'],
+                retry_interval=self.config['api_spool_retry_interval']
+            )
+        self.api_client.start_batching(
+            max_size=self.config['api_queue_size'],
+            batch_size=self.config['api_batch_size'],
+            flush_interval=self.config['api_flush_interval'],
+            overflow_policy=self.config['api_queue_policy']
+        )
+    
     def _send_to_api(self, report_data):
         """Send report data to API"""
         if not self.config['api_enabled']:
             return
         
         try:
-            self.api_client.send_network_report(report_data)
+            self.api_client.queue_network_report(report_data)
         except Exception as e:
             self.logger.error(f"Error sending to API: {e}")
     
@@ -112,57 +142,56 @@ class NetworkMonitor:
             self.logger.debug(f"Error scanning port {port}: {e}")
             return False
     
+    def _get_scanner(self):
+        """Create a port scanner from the current configuration"""
+        return AsyncPortScanner(
+            concurrency=self.config['scan_concurrency'],
+            timeout=self.config['scan_timeout']
+        )
+    
     def scan_ports(self, host='localhost', ports=None):
-        """Scan multiple ports on a host"""
+        """Scan multiple ports on a host.
+        
+        host may also be a CIDR block or a list of hosts; the result is then
+        ({host: open_ports}, {host: results}) instead of (open_ports, results).
+        """
         if ports is None:
             ports = self.config['common_ports']
         
-        open_ports = []
-        threads = []
-        results = {}
-        
-        def scan_worker(port):
-            is_open = self.scan_port(host, port)
-            results[port] = is_open
-            if is_open:
-                open_ports.append(port)
-        
-        # Create threads for concurrent scanning
-        for port in ports:
-            thread = threading.Thread(target=scan_worker, args=(port,))
-            threads.append(thread)
-            thread.start()
-        
-        # Wait for all threads to complete
-        for thread in threads:
-            thread.join()
+        if is_single_target(host):
+            return self._get_scanner().scan_sync(next(expand_targets(host)), ports)
         
+        open_ports = {}
+        results = {}
+        for target_host, host_open_ports, host_results in self.scan_targets(host, ports):
+            open_ports[target_host] = host_open_ports
+            results[target_host] = host_results
         return open_ports, results
     
+    def scan_targets(self, targets, ports=None):
+        """Stream (host, open_ports, results) for hosts, host lists and CIDR blocks"""
+        if ports is None:
+            ports = self.config['common_ports']
+        
+        return self._get_scanner().scan_hosts_sync(targets, ports, self.config['scan_chunk_size'])
+    
     def get_network_connections(self):
         """Get current network connections"""
         connections = []
         try:
-            for conn in psutil.net_connections(kind='inet'):
-                if conn.status == 'ESTABLISHED':
-                    try:
-                        process_name = None
-                        if conn.pid:
-                            try:
-                                process_name = psutil.Process(conn.pid).name()
-                            except (psutil.NoSuchProcess, psutil.AccessDenied):
-                                process_name = "Unknown"
-                        
-                        connections.append({
-                            'local_addr': f"{conn.laddr.ip}:{conn.laddr.port}" if conn.laddr else None,
-                            'remote_addr': f"{conn.raddr.ip}:{conn.raddr.port}" if conn.raddr else None,
-                            'status': conn.status,
-                            'pid': conn.pid,
-                            'process_name': process_name
-                        })
-                    except Exception as e:
-                        self.logger.debug(f"Error processing connection: {e}")
-                        continue
+            snapshot = self.snapshot_provider.get()
+            for conn in snapshot.established():
+                try:
+                    connections.append({
+                        'local_addr': f"{conn.laddr.ip}:{conn.laddr.port}" if conn.laddr else None,
+                        'remote_addr': f"{conn.raddr.ip}:{conn.raddr.port}" if conn.raddr else None,
+                        'status': conn.status,
+                        'pid': conn.pid,
+                        'process_name': snapshot.process_name(conn.pid)
+                    })
+                except Exception as e:
+                    self.logger.debug(f"Error processing connection: {e}")
+                    continue
         except Exception as e:
             self.logger.error(f"Error getting network connections: {e}")
         
@@ -172,7 +201,8 @@ class NetworkMonitor:
         """Get network interface statistics"""
         stats = {}
         try:
-            for interface, addrs in psutil.net_if_addrs().items():
+            snapshot = self.snapshot_provider.get()
+            for interface, addrs in snapshot.net_if_addrs.items():
                 if interface != 'lo':  # Skip loopback
                     stats[interface] = {
                         'addresses': [addr.address for addr in addrs if addr.family == socket.AF_INET],
@@ -181,8 +211,7 @@ class NetworkMonitor:
                     }
             
             # Get I/O statistics
-            io_stats = psutil.net_io_counters(pernic=True)
-            for interface, io in io_stats.items():
+            for interface, io in snapshot.net_io_counters.items():
                 if interface in stats:
                     stats[interface].update({
                         'bytes_sent': io.bytes_sent,
@@ -232,10 +261,40 @@ class NetworkMonitor:
             'alerts': alerts
         }
     
+    def _process_scan_results(self, host, open_ports, port_results, single_host=True):
+        """Update port status and report open ports for one scanned host"""
+        for port, is_open in port_results.items():
+            # Sweeps over many hosts keep only open ports to bound memory
+            status_key = port if single_host else f"{host}:{port}"
+            if single_host or is_open:
+                self.port_status[status_key] = {
+                    'open': is_open,
+                    'last_checked': datetime.now().isoformat()
+                }
+            else:
+                self.port_status.pop(status_key, None)
+            
+            # Only send to API if port is open and cooldown allows
+            if is_open and self._should_alert_port(host, port):
+                api_data = {
+                    'host': host,
+                    'port': port,
+                    'is_open': is_open,
+                    'status': 'open',
+                    'scan_duration': self.config['scan_timeout']
+                }
+                self._send_to_api(api_data)
+        
+        if single_host:
+            self.logger.info(f"Open ports: {open_ports}")
+        elif open_ports:
+            self.logger.info(f"Open ports on {host}: {open_ports}")
+    
     def monitor_network(self, host='localhost', duration=None):
-        """Main monitoring loop"""
+        """Main monitoring loop; host may be a hostname, a list of hosts or CIDR blocks"""
         self.running = True
         start_time = time.time()
+        single_host = is_single_target(host)
         
         self.logger.info(f"Starting network monitoring on {host}")
         self.logger.info(f"Monitoring ports: {self.config['common_ports']}")
@@ -243,8 +302,16 @@ class NetworkMonitor:
         try:
             while self.running:
                 try:
-                    # Scan ports
-                    open_ports, port_results = self.scan_ports(host, self.config['common_ports'])
+                    # Scan ports, handling each host as soon as its probes finish
+                    hosts_scanned = 0
+                    for target_host, open_ports, port_results in self.scan_targets(host, self.config['common_ports']):
+                        self._process_scan_results(target_host, open_ports, port_results, single_host)
+                        hosts_scanned += 1
+                        if not self.running:
+                            break
+                    
+                    if not single_host:
+                        self.logger.info(f"Scanned {hosts_scanned} hosts")
                     
                     # Analyze network activity
                     activity = self.analyze_network_activity()
@@ -253,26 +320,7 @@ class NetworkMonitor:
                     time.sleep(5)  # Wait before retrying
                     continue
                 
-                # Update port status and send to API
-                for port, is_open in port_results.items():
-                    self.port_status[port] = {
-                        'open': is_open,
-                        'last_checked': datetime.now().isoformat()
-                    }
-                    
-                    # Only send to API if port is open and cooldown allows
-                    if is_open and self._should_alert_port(host, port):
-                        api_data = {
-                            'host': host,
-                            'port': port,
-                            'is_open': is_open,
-                            'status': 'open',
-                            'scan_duration': 1.0  # Default timeout
-                        }
-                        self._send_to_api(api_data)
-                
                 # Log results
-                self.logger.info(f"Open ports: {open_ports}")
                 if activity['alerts']:
                     for alert in activity['alerts']:
                         self.logger.warning(alert)
@@ -298,6 +346,7 @@ class NetworkMonitor:
         finally:
             self.running = False
             self.save_report()
+            self.api_client.stop_batching()
             self.logger.info("Network monitoring stopped")
     
     def save_report(self):
@@ -318,6 +367,7 @@ class NetworkMonitor:
     def stop(self):
         """Stop monitoring"""
         self.running = False
+        self.api_client.stop_batching()
 
     def get_status(self):
         """Get current monitoring status"""
@@ -326,5 +376,6 @@ class NetworkMonitor:
             'monitored_ports': list(self.monitored_ports),
             'port_status': self.port_status,
             'total_alerts': len(self.alerts),
+            'api_queue': self.api_client.get_queue_metrics(),
             'last_scan': max([status.get('last_checked', '') for status in self.port_status.values()], default='Never')
         }
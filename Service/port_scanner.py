@@ -0,0 +1,219 @@
+"""
+Asynchronous Port Scanner
+Non-blocking TCP connect scanner built on asyncio with bounded concurrency
+"""
+
+import asyncio
+import errno
+import ipaddress
+import itertools
+import socket
+import logging
+from typing import AsyncIterator, Dict, Iterable, Iterator, List, Tuple, Union
+
+# connect() on a non-blocking socket reports one of these while the handshake is in flight
+_CONNECT_PENDING = {errno.EINPROGRESS, errno.EWOULDBLOCK, errno.EAGAIN, getattr(errno, 'WSAEWOULDBLOCK', errno.EWOULDBLOCK)}
+_TIMED_OUT = object()
+
+def _resolve_future(future, value=None):
+    if not future.done():
+        future.set_result(value)
+
+def expand_targets(targets: Union[str, Iterable[str]]) -> Iterator[str]:
+    """Lazily expand hosts, comma-separated lists and CIDR blocks into individual hosts"""
+    if isinstance(targets, str):
+        targets = [targets]
+    for target in targets:
+        for item in target.split(','):
+            item = item.strip()
+            if not item:
+                continue
+            if '/' in item:
+                network = ipaddress.ip_network(item, strict=False)
+                if network.num_addresses == 1:
+                    yield str(network.network_address)
+                else:
+                    yield from (str(address) for address in network.hosts())
+            else:
+                yield item
+
+def is_single_target(targets: Union[str, Iterable[str]]) -> bool:
+    """Check whether targets name exactly one host"""
+    return len(list(itertools.islice(expand_targets(targets), 2))) == 1
+
+class AsyncPortScanner:
+    def __init__(self, concurrency: int = 500, timeout: float = 1.0):
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self._selector_loop = True
+        self._pending = {}  # in-flight connect future -> deadline
+        self.logger = logging.getLogger(__name__)
+
+    async def _resolve(self, host: str):
+        """Resolve a host once per scan instead of once per probe"""
+        try:
+            address = ipaddress.ip_address(host)
+            return (socket.AF_INET6 if address.version == 6 else socket.AF_INET), host
+        except ValueError:
+            pass
+        loop = asyncio.get_running_loop()
+        infos = await loop.getaddrinfo(host, None, type=socket.SOCK_STREAM)
+        family, _, _, _, sockaddr = infos[0]
+        return family, sockaddr[0]
+
+    async def probe(self, family: int, address: str, port: int) -> bool:
+        """Attempt a single non-blocking TCP connect"""
+        loop = asyncio.get_running_loop()
+        sock = socket.socket(family, socket.SOCK_STREAM)
+        sock.setblocking(False)
+        try:
+            if not self._selector_loop:
+                # Proactor loops (Windows) have no add_writer; use the slower task-based path
+                await asyncio.wait_for(loop.sock_connect(sock, (address, port)), self.timeout)
+                return True
+
+            err = sock.connect_ex((address, port))
+            if err in _CONNECT_PENDING:
+                # Wait for writability or the timeout without creating a task per probe
+                future = loop.create_future()
+                fd = sock.fileno()
+                loop.add_writer(fd, _resolve_future, future)
+                self._pending[future] = loop.time() + self.timeout
+                try:
+                    if await future is _TIMED_OUT:
+                        return False
+                finally:
+                    loop.remove_writer(fd)
+                    self._pending.pop(future, None)
+                err = sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+            return err == 0
+        except (asyncio.TimeoutError, OSError):
+            return False
+        finally:
+            sock.close()
+
+    async def _expire_pending(self):
+        """Time out stalled connects with one periodic sweep instead of a timer per probe"""
+        loop = asyncio.get_running_loop()
+        interval = min(self.timeout / 4, 0.25)
+        while True:
+            await asyncio.sleep(interval)
+            now = loop.time()
+            for future, deadline in list(self._pending.items()):
+                if deadline <= now:
+                    _resolve_future(future, _TIMED_OUT)
+
+    async def scan(self, host: str, ports: Iterable[int]) -> Tuple[List[int], Dict[int, bool]]:
+        """Scan ports on a host; returns (open_ports, results) like NetworkMonitor.scan_ports"""
+        results = {}
+        self._selector_loop = not isinstance(asyncio.get_running_loop(), getattr(asyncio, 'ProactorEventLoop', ()))
+        try:
+            family, address = await self._resolve(host)
+        except (socket.gaierror, OSError) as e:
+            self.logger.error(f"Could not resolve {host}: {e}")
+            return [], {port: False for port in ports}
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+        port_iter = iter(ports)
+
+        async def worker():
+            # A fixed pool of workers keeps memory bounded by the concurrency, not the port count
+            for port in port_iter:
+                async with semaphore:
+                    results[port] = await self.probe(family, address, port)
+
+        sweeper = asyncio.ensure_future(self._expire_pending())
+        try:
+            await asyncio.gather(*(worker() for _ in range(self.concurrency)))
+        finally:
+            sweeper.cancel()
+
+        open_ports = sorted(port for port, is_open in results.items() if is_open)
+        return open_ports, results
+
+    def scan_sync(self, host: str, ports: Iterable[int]) -> Tuple[List[int], Dict[int, bool]]:
+        """Run a scan from synchronous code (e.g. a monitor thread)"""
+        return asyncio.run(self.scan(host, ports))
+
+    async def _scan_chunk(self, hosts: List[str], ports: List[int], completed: asyncio.Queue):
+        """Scan a chunk of hosts, interleaving probes so no single host gets a burst"""
+        resolved = await asyncio.gather(*(self._resolve(host) for host in hosts), return_exceptions=True)
+
+        targets = {}
+        for host, result in zip(hosts, resolved):
+            if isinstance(result, Exception):
+                self.logger.error(f"Could not resolve {host}: {result}")
+                await completed.put((host, [], {port: False for port in ports}))
+            else:
+                targets[host] = result
+
+        results = {host: {} for host in targets}
+        remaining = {host: len(ports) for host in targets}
+        # Port-major order: each host sees one probe per pass over the chunk
+        probes = ((host, port) for port in ports for host in targets)
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def worker():
+            for host, port in probes:
+                family, address = targets[host]
+                async with semaphore:
+                    results[host][port] = await self.probe(family, address, port)
+                remaining[host] -= 1
+                if remaining[host] == 0:
+                    host_results = results.pop(host)
+                    open_ports = sorted(p for p, is_open in host_results.items() if is_open)
+                    await completed.put((host, open_ports, host_results))
+
+        await asyncio.gather(*(worker() for _ in range(min(self.concurrency, len(targets) * len(ports)) or 1)))
+
+    async def scan_hosts(self, targets: Union[str, Iterable[str]], ports: Iterable[int],
+                         chunk_size: int = 256) -> AsyncIterator[Tuple[str, List[int], Dict[int, bool]]]:
+        """Scan many hosts in fixed-size chunks, yielding (host, open_ports, results) as each host finishes"""
+        ports = list(dict.fromkeys(ports))
+        if not ports:
+            return
+        hosts = expand_targets(targets)
+        self._selector_loop = not isinstance(asyncio.get_running_loop(), getattr(asyncio, 'ProactorEventLoop', ()))
+        sweeper = asyncio.ensure_future(self._expire_pending())
+        try:
+            while True:
+                # Overlapping targets (e.g. a host inside a listed CIDR block) are scanned once per chunk
+                chunk = list(dict.fromkeys(itertools.islice(hosts, chunk_size)))
+                if not chunk:
+                    break
+
+                completed = asyncio.Queue()
+                chunk_task = asyncio.ensure_future(self._scan_chunk(chunk, ports, completed))
+                try:
+                    # Yield hosts as they finish until the chunk is done and nothing is left queued
+                    while True:
+                        getter = asyncio.ensure_future(completed.get())
+                        await asyncio.wait({getter, chunk_task}, return_when=asyncio.FIRST_COMPLETED)
+                        if getter.done():
+                            yield getter.result()
+                            continue
+                        # The chunk finished (or failed) first; surface errors, then drain
+                        getter.cancel()
+                        chunk_task.result()
+                        while not completed.empty():
+                            yield completed.get_nowait()
+                        break
+                finally:
+                    chunk_task.cancel()
+        finally:
+            sweeper.cancel()
+
+    def scan_hosts_sync(self, targets: Union[str, Iterable[str]], ports: Iterable[int],
+                        chunk_size: int = 256) -> Iterator[Tuple[str, List[int], Dict[int, bool]]]:
+        """Stream per-host results to synchronous code"""
+        loop = asyncio.new_event_loop()
+        stream = self.scan_hosts(targets, ports, chunk_size)
+        try:
+            while True:
+                try:
+                    yield loop.run_until_complete(stream.__anext__())
+                except StopAsyncIteration:
+                    break
+        finally:
+            loop.run_until_complete(stream.aclose())
+            loop.close()
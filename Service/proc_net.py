@@ -0,0 +1,251 @@
+"""
+Linux /proc Connection Reader
+Bulk socket table snapshots from /proc/net/{tcp,tcp6,udp,udp6} with a psutil fallback
+"""
+
+import os
+import socket
+import struct
+import threading
+import time
+import logging
+from array import array
+from collections import OrderedDict, namedtuple
+from typing import Dict, Iterable, Iterator, Optional
+import psutil
+
+# Mirrors psutil's sconn/addr so callers can use either source interchangeably
+Address = namedtuple('Address', ['ip', 'port'])
+Connection = namedtuple('Connection', ['fd', 'family', 'type', 'laddr', 'raddr', 'status', 'pid'])
+
+PROC_NET_FILES = (
+    ('tcp', socket.AF_INET, socket.SOCK_STREAM),
+    ('tcp6', socket.AF_INET6, socket.SOCK_STREAM),
+    ('udp', socket.AF_INET, socket.SOCK_DGRAM),
+    ('udp6', socket.AF_INET6, socket.SOCK_DGRAM),
+)
+
+# Kernel TCP state codes, named as psutil names them
+TCP_STATES = (
+    psutil.CONN_NONE, psutil.CONN_ESTABLISHED, psutil.CONN_SYN_SENT, psutil.CONN_SYN_RECV,
+    psutil.CONN_FIN_WAIT1, psutil.CONN_FIN_WAIT2, psutil.CONN_TIME_WAIT, psutil.CONN_CLOSE,
+    psutil.CONN_CLOSE_WAIT, psutil.CONN_LAST_ACK, psutil.CONN_LISTEN, psutil.CONN_CLOSING,
+)
+STATE_ESTABLISHED = 1
+UDP_STATE = 0
+
+def proc_net_available() -> bool:
+    """Check whether the /proc fast path can be used on this host"""
+    return os.path.exists('/proc/net/tcp')
+
+class ConnectionTable:
+    """Column-oriented socket table; rows are materialized only when iterated"""
+
+    def __init__(self):
+        self.family = array('B')
+        self.type = array('B')
+        self.status = array('B')
+        self.local_port = array('H')
+        self.remote_port = array('H')
+        self.inode = array('Q')
+        self.pid = array('i')  # -1 when unknown
+        self.local_ip = []
+        self.remote_ip = []
+
+    def __len__(self):
+        return len(self.inode)
+
+    def _row(self, i):
+        # Like psutil, a zero port means "no address"
+        laddr = Address(self.local_ip[i], self.local_port[i]) if self.local_port[i] else ()
+        raddr = Address(self.remote_ip[i], self.remote_port[i]) if self.remote_port[i] else ()
+        status = TCP_STATES[self.status[i]] if self.type[i] == socket.SOCK_STREAM else psutil.CONN_NONE
+        pid = self.pid[i]
+        return Connection(-1, self.family[i], self.type[i], laddr, raddr, status, pid if pid >= 0 else None)
+
+    def __iter__(self) -> Iterator[Connection]:
+        for i in range(len(self)):
+            yield self._row(i)
+
+    def established(self) -> Iterator[Connection]:
+        """Iterate ESTABLISHED TCP connections without materializing other rows"""
+        for i in range(len(self)):
+            if self.status[i] == STATE_ESTABLISHED and self.type[i] == socket.SOCK_STREAM:
+                yield self._row(i)
+
+    def for_pid(self, pid: int) -> Iterator[Connection]:
+        """Iterate connections owned by a process without materializing other rows"""
+        for i in range(len(self)):
+            if self.pid[i] == pid:
+                yield self._row(i)
+
+class ProcNetReader:
+    def __init__(self):
+        self.logger = logging.getLogger(__name__)
+        self._ip_cache = {}  # hex address -> dotted/colon string
+
+    def _decode_ip(self, hex_ip: str) -> str:
+        """Decode a /proc/net address (32-bit words in host byte order)"""
+        ip = self._ip_cache.get(hex_ip)
+        if ip is None:
+            if len(hex_ip) == 8:
+                ip = socket.inet_ntop(socket.AF_INET, struct.pack('=I', int(hex_ip, 16)))
+            else:
+                packed = b''.join(struct.pack('=I', int(hex_ip[i:i + 8], 16)) for i in range(0, 32, 8))
+                ip = socket.inet_ntop(socket.AF_INET6, packed)
+            if len(self._ip_cache) > 65536:
+                self._ip_cache.clear()
+            self._ip_cache[hex_ip] = ip
+        return ip
+
+    def read_table(self, resolve_pids: bool = True) -> ConnectionTable:
+        """Parse all /proc/net socket tables into one ConnectionTable"""
+        table = ConnectionTable()
+        for name, family, sock_type in PROC_NET_FILES:
+            try:
+                with open(f'/proc/net/{name}', 'r') as f:
+                    next(f, None)  # header
+                    for line in f:
+                        fields = line.split()
+                        if len(fields) < 10:
+                            continue
+                        local_ip, local_port = fields[1].split(':')
+                        remote_ip, remote_port = fields[2].split(':')
+                        table.family.append(family)
+                        table.type.append(sock_type)
+                        table.status.append(int(fields[3], 16) if sock_type == socket.SOCK_STREAM else UDP_STATE)
+                        table.local_ip.append(self._decode_ip(local_ip))
+                        table.local_port.append(int(local_port, 16))
+                        table.remote_ip.append(self._decode_ip(remote_ip))
+                        table.remote_port.append(int(remote_port, 16))
+                        table.inode.append(int(fields[9]))
+                        table.pid.append(-1)
+            except FileNotFoundError:
+                continue  # e.g. IPv6 disabled
+
+        if resolve_pids and len(table):
+            inode_pids = self.map_inodes_to_pids(set(table.inode))
+            for i, inode in enumerate(table.inode):
+                table.pid[i] = inode_pids.get(inode, -1)
+        return table
+
+    def map_inodes_to_pids(self, inodes: Iterable[int]) -> Dict[int, int]:
+        """Map socket inodes to owning pids with a single sweep over /proc/*/fd"""
+        wanted = set(inodes)
+        wanted.discard(0)
+        mapping = {}
+        if not wanted:
+            return mapping
+
+        for entry in os.scandir('/proc'):
+            if not entry.name.isdigit():
+                continue
+            fd_dir = f'/proc/{entry.name}/fd'
+            try:
+                fds = os.listdir(fd_dir)
+            except OSError:
+                continue  # process exited or not ours
+            pid = int(entry.name)
+            for fd in fds:
+                try:
+                    target = os.readlink(f'{fd_dir}/{fd}')
+                except OSError:
+                    continue
+                if target.startswith('socket:['):
+                    inode = int(target[8:-1])
+                    if inode in wanted:
+                        mapping[inode] = pid
+            if len(mapping) == len(wanted):
+                break
+        return mapping
+
+class ProcessNameCache:
+    """pid -> process name cache, invalidated when the pid is reused by a new process"""
+
+    def __init__(self, max_size: int = 4096, revalidate_interval: float = 1.0):
+        self.max_size = max_size
+        self.revalidate_interval = revalidate_interval
+        self._cache = OrderedDict()  # pid -> (start_time, name, validated_at)
+        self._lock = threading.Lock()
+        self._use_proc = os.path.exists('/proc/self/stat')
+
+    def _read_stat(self, pid: int):
+        """Return (start_time, comm) from /proc/<pid>/stat"""
+        with open(f'/proc/{pid}/stat', 'rb') as f:
+            data = f.read()
+        # comm may contain spaces and parentheses; it ends at the last ')'
+        open_paren = data.index(b'(')
+        close_paren = data.rindex(b')')
+        comm = data[open_paren + 1:close_paren].decode('utf-8', 'replace')
+        fields = data[close_paren + 2:].split()
+        return int(fields[19]), comm  # field 22 (starttime) overall
+
+    def _full_name(self, pid: int, comm: str) -> str:
+        """comm is truncated to 15 chars; recover the full name from cmdline like psutil does"""
+        if len(comm) < 15:
+            return comm
+        try:
+            with open(f'/proc/{pid}/cmdline', 'rb') as f:
+                argv0 = f.read().split(b'\0', 1)[0].decode('utf-8', 'replace')
+            exe_name = os.path.basename(argv0)
+            if exe_name.startswith(comm):
+                return exe_name
+        except OSError:
+            pass
+        return comm
+
+    def get(self, pid: Optional[int]) -> Optional[str]:
+        """Get a process name, or "Unknown" if the process is gone or inaccessible"""
+        if not pid:
+            return None
+
+        if not self._use_proc:
+            try:
+                return psutil.Process(pid).name()
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                return "Unknown"
+
+        now = time.monotonic()
+        with self._lock:
+            cached = self._cache.get(pid)
+            if cached and now - cached[2] < self.revalidate_interval:
+                return cached[1]
+
+        # Re-check the start time so a recycled pid never reports a stale name
+        try:
+            start_time, comm = self._read_stat(pid)
+        except (OSError, ValueError, IndexError):
+            with self._lock:
+                self._cache.pop(pid, None)
+            return "Unknown"
+
+        if cached and cached[0] == start_time:
+            name = cached[1]
+        else:
+            name = self._full_name(pid, comm)
+
+        with self._lock:
+            self._cache[pid] = (start_time, name, now)
+            self._cache.move_to_end(pid)
+            while len(self._cache) > self.max_size:
+                self._cache.popitem(last=False)
+        return name
+
+_reader = ProcNetReader()
+process_names = ProcessNameCache()
+
+def net_connections(resolve_pids: bool = True):
+    """Fast replacement for psutil.net_connections(kind='inet')"""
+    if proc_net_available():
+        try:
+            return _reader.read_table(resolve_pids)
+        except Exception as e:
+            _reader.logger.debug(f"Falling back to psutil for connections: {e}")
+    return psutil.net_connections(kind='inet')
+
+def established_connections(resolve_pids: bool = True) -> Iterator:
+    """Iterate ESTABLISHED TCP connections from the fastest available source"""
+    connections = net_connections(resolve_pids)
+    if isinstance(connections, ConnectionTable):
+        return connections.established()
+    return (conn for conn in connections if conn.status == psutil.CONN_ESTABLISHED)
@@ -0,0 +1,160 @@
+"""
+Report Queue
+Bounded in-process queue that batches monitoring reports and flushes them in the background
+"""
+
+import threading
+import time
+import logging
+from collections import deque, defaultdict
+from typing import Any, Callable, Dict, List
+
+OVERFLOW_DROP_OLDEST = 'drop_oldest'
+OVERFLOW_BLOCK = 'block'
+
+class ReportQueue:
+    def __init__(self, flush_func: Callable[[str, List[Dict[str, Any]]], bool],
+                 max_size: int = 10000, batch_size: int = 200, flush_interval: float = 2.0,
+                 overflow_policy: str = OVERFLOW_DROP_OLDEST, block_timeout: float = 0.5):
+        self.flush_func = flush_func
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.overflow_policy = overflow_policy
+        self.block_timeout = block_timeout
+        self.logger = logging.getLogger(__name__)
+
+        self._items = deque()  # (report_type, report_data, enqueued_at)
+        self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
+        self._not_full = threading.Condition(self._lock)
+        self._thread = None
+        self._running = False
+
+        # Metrics
+        self._enqueued = 0
+        self._flushed = 0
+        self._failed = 0
+        self._dropped = 0
+        self._flush_count = 0
+        self._last_flush_latency = 0.0
+        self._total_flush_latency = 0.0
+
+    def start(self):
+        """Start the background flusher thread"""
+        with self._lock:
+            if self._running:
+                return
+            self._running = True
+
+        self._thread = threading.Thread(target=self._flush_loop, name='report-queue-flusher', daemon=True)
+        self._thread.start()
+
+    @property
+    def running(self) -> bool:
+        return self._running
+
+    def stop(self, timeout: float = 5.0):
+        """Stop the flusher thread after draining pending reports"""
+        with self._lock:
+            if not self._running:
+                return
+            self._running = False
+            self._not_empty.notify_all()
+
+        if self._thread:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+
+    def put(self, report_type: str, report_data: Dict[str, Any]) -> bool:
+        """Enqueue a report without waiting for the network; returns False if it was dropped"""
+        with self._lock:
+            if len(self._items) >= self.max_size:
+                if self.overflow_policy == OVERFLOW_BLOCK:
+                    deadline = time.monotonic() + self.block_timeout
+                    while len(self._items) >= self.max_size:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0 or not self._running:
+                            self._dropped += 1
+                            return False
+                        self._not_full.wait(remaining)
+                else:
+                    self._items.popleft()
+                    self._dropped += 1
+
+            self._items.append((report_type, report_data, time.monotonic()))
+            self._enqueued += 1
+            if len(self._items) >= self.batch_size:
+                self._not_empty.notify()
+            return True
+
+    def _take_batch(self):
+        """Wait until a size or age threshold is reached and take pending reports"""
+        with self._lock:
+            while self._running:
+                if len(self._items) >= self.batch_size:
+                    break
+                if self._items:
+                    age = time.monotonic() - self._items[0][2]
+                    if age >= self.flush_interval:
+                        break
+                    self._not_empty.wait(self.flush_interval - age)
+                else:
+                    self._not_empty.wait(self.flush_interval)
+
+            batch = list(self._items)
+            self._items.clear()
+            self._not_full.notify_all()
+            return batch
+
+    def _flush_loop(self):
+        """Background loop that coalesces reports by type and flushes them"""
+        while True:
+            batch = self._take_batch()
+            if batch:
+                self.flush(batch)
+
+            with self._lock:
+                if not self._running and not self._items:
+                    break
+
+    def flush(self, batch):
+        """Send a batch of queued reports grouped by report type"""
+        grouped = defaultdict(list)
+        for report_type, report_data, _ in batch:
+            grouped[report_type].append(report_data)
+
+        for report_type, reports in grouped.items():
+            for i in range(0, len(reports), self.batch_size):
+                chunk = reports[i:i + self.batch_size]
+                start_time = time.monotonic()
+                try:
+                    ok = self.flush_func(report_type, chunk)
+                except Exception as e:
+                    self.logger.error(f"Error flushing {report_type} reports: {e}")
+                    ok = False
+                latency = time.monotonic() - start_time
+
+                with self._lock:
+                    self._flush_count += 1
+                    self._last_flush_latency = latency
+                    self._total_flush_latency += latency
+                    if ok:
+                        self._flushed += len(chunk)
+                    else:
+                        self._failed += len(chunk)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Get queue depth, flush latency and drop counters"""
+        with self._lock:
+            return {
+                'queue_depth': len(self._items),
+                'max_size': self.max_size,
+                'enqueued': self._enqueued,
+                'flushed': self._flushed,
+                'failed': self._failed,
+                'dropped': self._dropped,
+                'flush_count': self._flush_count,
+                'last_flush_latency_ms': round(self._last_flush_latency * 1000, 2),
+                'avg_flush_latency_ms': round(self._total_flush_latency / self._flush_count * 1000, 2) if self._flush_count else 0.0
+            }
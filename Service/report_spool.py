@@ -0,0 +1,223 @@
+"""
+Report Spool
+Append-only, segment-rotated on-disk spool for reports that could not be delivered to the API
+"""
+
+import os
+import json
+import struct
+import threading
+import time
+import zlib
+import logging
+from typing import Any, Callable, Dict, List
+
+# Record header: payload length and CRC32 of the payload
+RECORD_HEADER = struct.Struct('>II')
+SEGMENT_SUFFIX = '.seg'
+CURSOR_FILE = 'cursor.json'
+
+class ReportSpool:
+    def __init__(self, directory: str, max_bytes: int = 100 * 1024 * 1024,
+                 segment_bytes: int = 4 * 1024 * 1024, fsync_interval: float = 1.0,
+                 fsync_batch: int = 256):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.segment_bytes = segment_bytes
+        self.fsync_interval = fsync_interval
+        self.fsync_batch = fsync_batch
+        self.logger = logging.getLogger(__name__)
+
+        self._lock = threading.Lock()
+        self._replay_lock = threading.Lock()
+        self._active = None
+        self._active_name = None
+        self._active_size = 0
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+        # Metrics
+        self._spooled = 0
+        self._replayed = 0
+        self._dropped_segments = 0
+
+        os.makedirs(self.directory, exist_ok=True)
+        self._cursor = self._load_cursor()
+
+    def _segment_path(self, name):
+        return os.path.join(self.directory, name)
+
+    def _segments(self):
+        """List segment file names, oldest first"""
+        return sorted(n for n in os.listdir(self.directory) if n.endswith(SEGMENT_SUFFIX))
+
+    def _load_cursor(self):
+        """Load replay progress within the oldest segment"""
+        try:
+            with open(self._segment_path(CURSOR_FILE), 'r') as f:
+                data = json.load(f)
+                return data.get('segment'), int(data.get('offset', 0))
+        except (OSError, ValueError):
+            return None, 0
+
+    def _save_cursor(self, segment, offset):
+        """Atomically persist replay progress"""
+        tmp_path = self._segment_path(CURSOR_FILE + '.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump({'segment': segment, 'offset': offset}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self._segment_path(CURSOR_FILE))
+        self._cursor = (segment, offset)
+
+    def _disk_usage(self):
+        total = 0
+        for name in self._segments():
+            try:
+                total += os.path.getsize(self._segment_path(name))
+            except OSError:
+                continue
+        return total
+
+    def _open_segment(self):
+        """Open a fresh segment for appending"""
+        self._active_name = f"{time.time_ns():020d}{SEGMENT_SUFFIX}"
+        self._active = open(self._segment_path(self._active_name), 'ab')
+        self._active_size = 0
+
+    def _sync(self):
+        if self._active and self._unsynced:
+            self._active.flush()
+            os.fsync(self._active.fileno())
+            self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def _seal_active(self):
+        """Close the active segment so it becomes eligible for replay"""
+        if self._active:
+            self._sync()
+            self._active.close()
+            if self._active_size == 0:
+                os.remove(self._segment_path(self._active_name))
+            self._active = None
+            self._active_name = None
+            self._active_size = 0
+
+    def _enforce_max_bytes(self, incoming):
+        """Drop the oldest sealed segments until the new records fit"""
+        usage = self._disk_usage()
+        for name in self._segments():
+            if usage + incoming <= self.max_bytes:
+                break
+            if name == self._active_name:
+                continue
+            try:
+                size = os.path.getsize(self._segment_path(name))
+                os.remove(self._segment_path(name))
+            except OSError:
+                continue
+            usage -= size
+            self._dropped_segments += 1
+            self.logger.warning(f"Spool over {self.max_bytes} bytes, dropped segment {name}")
+            if self._cursor[0] == name:
+                self._cursor = (None, 0)
+
+    def append(self, report_type: str, reports: List[Dict[str, Any]]):
+        """Append reports to the spool, one length-prefixed record each"""
+        records = []
+        for report in reports:
+            payload = json.dumps({'type': report_type, 'report': report}, separators=(',', ':')).encode('utf-8')
+            records.append(RECORD_HEADER.pack(len(payload), zlib.crc32(payload)) + payload)
+        data = b''.join(records)
+
+        with self._lock:
+            self._enforce_max_bytes(len(data))
+            if self._active is None or self._active_size >= self.segment_bytes:
+                self._seal_active()
+                self._open_segment()
+
+            self._active.write(data)
+            self._active_size += len(data)
+            self._unsynced += len(records)
+            self._spooled += len(records)
+
+            if self._unsynced >= self.fsync_batch or time.monotonic() - self._last_sync >= self.fsync_interval:
+                self._sync()
+
+    def _read_records(self, name, offset):
+        """Yield (end_offset, report_type, report) from a sealed segment"""
+        with open(self._segment_path(name), 'rb') as f:
+            f.seek(offset)
+            while True:
+                header = f.read(RECORD_HEADER.size)
+                if len(header) < RECORD_HEADER.size:
+                    return
+                length, crc = RECORD_HEADER.unpack(header)
+                payload = f.read(length)
+                if len(payload) < length or zlib.crc32(payload) != crc:
+                    self.logger.warning(f"Truncated or corrupt record in spool segment {name} at offset {offset}")
+                    return
+                offset += RECORD_HEADER.size + length
+                record = json.loads(payload)
+                yield offset, record['type'], record['report']
+
+    def has_pending(self) -> bool:
+        """Check whether any spooled reports are waiting for replay"""
+        with self._lock:
+            return self._active_size > 0 or any(n != self._active_name for n in self._segments())
+
+    def replay(self, send_func: Callable[[str, List[Dict[str, Any]]], bool], batch_size: int = 200) -> int:
+        """Resend spooled reports in order; stops at the first failed batch"""
+        with self._replay_lock:
+            with self._lock:
+                self._seal_active()
+                segments = self._segments()
+
+            replayed = 0
+            for name in segments:
+                offset = self._cursor[1] if self._cursor[0] == name else 0
+                batch_type, batch, batch_end = None, [], offset
+
+                for end_offset, report_type, report in self._read_records(name, offset):
+                    if batch and (report_type != batch_type or len(batch) >= batch_size):
+                        if not send_func(batch_type, batch):
+                            return replayed
+                        replayed += len(batch)
+                        self._replayed += len(batch)
+                        self._save_cursor(name, batch_end)
+                        batch = []
+                    batch_type = report_type
+                    batch.append(report)
+                    batch_end = end_offset
+
+                if batch:
+                    if not send_func(batch_type, batch):
+                        return replayed
+                    replayed += len(batch)
+                    self._replayed += len(batch)
+
+                with self._lock:
+                    try:
+                        os.remove(self._segment_path(name))
+                    except OSError:
+                        pass
+                    self._save_cursor(None, 0)
+
+            return replayed
+
+    def close(self):
+        """Flush and close the active segment"""
+        with self._lock:
+            self._seal_active()
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Get spool size and throughput counters"""
+        with self._lock:
+            return {
+                'disk_bytes': self._disk_usage(),
+                'max_bytes': self.max_bytes,
+                'segments': len(self._segments()),
+                'spooled': self._spooled,
+                'replayed': self._replayed,
+                'dropped_segments': self._dropped_segments
+            }
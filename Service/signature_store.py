@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+Binary Malware Signature Store
+Sorted fixed-width raw digests with a prefix index, memory-mapped and searched in place, fronted by a Bloom filter
+"""
+
+import os
+import sys
+import mmap
+import json
+import struct
+import argparse
+import logging
+from array import array
+from typing import Dict, Iterable, Union
+
+MAGIC = b'MSIG'
+FORMAT_VERSION = 1
+# magic, version, md5/sha256 prefix index bits, md5 count, sha256 count, bloom filter bits, bloom hash count
+HEADER = struct.Struct('<4sHBBQQQI4x')
+DIGEST_WIDTHS = (16, 32)  # MD5, SHA256
+MAX_PREFIX_BITS = 20
+BLOOM_HASHES = 4  # bits set per digest within its 64-bit bloom word
+_BLOOM_WORD = struct.Struct('<Q')
+_BIT = tuple(1 << i for i in range(64))
+
+def _prefix_bits(count: int) -> int:
+    """Size the prefix index for about four digests per bucket"""
+    return min(MAX_PREFIX_BITS, (count // 4).bit_length())
+
+def _bloom_slot(digest: bytes, word_mask: int):
+    """Blocked Bloom filter: the digest picks one 64-bit word and four bits inside it"""
+    bits = _BIT[digest[8] & 63] | _BIT[digest[9] & 63] | _BIT[digest[10] & 63] | _BIT[digest[11] & 63]
+    return _BLOOM_WORD.unpack_from(digest)[0] & word_mask, bits
+
+def _bloom_offset(offset: int, md5_count: int, sha256_count: int, md5_prefix_bits: int, sha256_prefix_bits: int) -> int:
+    """The bloom filter follows both tables, aligned to 8 bytes"""
+    for width, count, bits in ((16, md5_count, md5_prefix_bits), (32, sha256_count, sha256_prefix_bits)):
+        offset += ((1 << bits) + 1) * 4 + width * count
+    return (offset + 7) & ~7
+
+class _DigestTable:
+    """Sorted block of fixed-width digests with a leading-bits bucket index"""
+
+    def __init__(self, buffer, offset: int, width: int, count: int, prefix_bits: int):
+        self.buffer = buffer
+        self.width = width
+        self.count = count
+        self.prefix_bits = prefix_bits
+        self.digest_offset = offset + ((1 << prefix_bits) + 1) * 4
+        self.end = self.digest_offset + width * count
+        self.index = memoryview(buffer)[offset:self.digest_offset].cast('I')
+
+    def __len__(self):
+        return self.count
+
+    def __contains__(self, digest: bytes) -> bool:
+        buffer = self.buffer
+        bucket = int.from_bytes(digest[:3], 'big') >> (24 - self.prefix_bits)
+        lo, hi = self.index[bucket], self.index[bucket + 1]
+        width = self.width
+        offset = self.digest_offset
+        # Buckets hold a handful of digests, so this is usually two or three comparisons
+        while lo < hi:
+            mid = (lo + hi) >> 1
+            start = offset + mid * width
+            current = buffer[start:start + width]
+            if current < digest:
+                lo = mid + 1
+            elif current > digest:
+                hi = mid
+            else:
+                return True
+        return False
+
+class SignatureStore:
+    def __init__(self, path: str):
+        self.path = path
+        self._tables = {}
+        self._bloom = None
+        self._file = open(path, 'rb')
+        try:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise ValueError(f"{path} is empty")
+
+        try:
+            (magic, version, md5_prefix_bits, sha256_prefix_bits, md5_count, sha256_count,
+             bloom_bits, bloom_hashes) = HEADER.unpack_from(self._mmap, 0)
+        except struct.error:
+            magic = None
+        if magic != MAGIC or version != FORMAT_VERSION:
+            self.close()
+            raise ValueError(f"{path} is not a version {FORMAT_VERSION} signature store")
+
+        offset = HEADER.size
+        bloom_offset = _bloom_offset(offset, md5_count, sha256_count, md5_prefix_bits, sha256_prefix_bits)
+        if (bloom_bits & (bloom_bits - 1) or (bloom_bits and bloom_hashes != BLOOM_HASHES) or
+                bloom_offset + bloom_bits // 8 > len(self._mmap)):
+            self.close()
+            raise ValueError(f"{path} is truncated or corrupt")
+
+        for width, count, prefix_bits in zip(DIGEST_WIDTHS, (md5_count, sha256_count),
+                                             (md5_prefix_bits, sha256_prefix_bits)):
+            table = _DigestTable(self._mmap, offset, width, count, prefix_bits)
+            self._tables[width] = table
+            offset = table.end
+        if bloom_bits:
+            self._bloom = memoryview(self._mmap)[bloom_offset:bloom_offset + bloom_bits // 8].cast('Q')
+            self._bloom_word_mask = len(self._bloom) - 1
+
+    def __len__(self):
+        return sum(len(table) for table in self._tables.values())
+
+    def _bloom_may_contain(self, digest: bytes) -> bool:
+        # Digests are already uniformly random, so their own bits serve as the hash functions
+        bits = _BIT[digest[8] & 63] | _BIT[digest[9] & 63] | _BIT[digest[10] & 63] | _BIT[digest[11] & 63]
+        word = self._bloom[_BLOOM_WORD.unpack_from(digest)[0] & self._bloom_word_mask]
+        return word & bits == bits
+
+    def __contains__(self, signature: Union[str, bytes]) -> bool:
+        """Check a hex or raw MD5/SHA256 digest"""
+        if isinstance(signature, str):
+            try:
+                signature = bytes.fromhex(signature)
+            except ValueError:
+                return False
+        table = self._tables.get(len(signature))
+        if table is None or not table.count:
+            return False
+        if self._bloom is not None and not self._bloom_may_contain(signature):
+            return False
+        return signature in table
+
+    def get_stats(self) -> Dict[str, int]:
+        """Get signature counts and on-disk size"""
+        return {
+            'md5': len(self._tables[16]),
+            'sha256': len(self._tables[32]),
+            'bloom_bits': len(self._bloom) * 64 if self._bloom is not None else 0,
+            'bytes': len(self._mmap)
+        }
+
+    def close(self):
+        # Views into the mmap must be released before it can be closed
+        for table in self._tables.values():
+            table.index.release()
+        if self._bloom is not None:
+            self._bloom.release()
+        self._mmap.close()
+        self._file.close()
+
+def build_signature_store(signatures: Iterable[str], path: str, bloom_bits_per_entry: int = 10) -> Dict[str, int]:
+    """Write hex signatures to a binary store; returns counts of written and skipped entries"""
+    digests = {width: set() for width in DIGEST_WIDTHS}
+    skipped = 0
+    for signature in signatures:
+        try:
+            digest = bytes.fromhex(signature.strip())
+        except (ValueError, AttributeError):
+            skipped += 1
+            continue
+        if len(digest) in digests:
+            digests[len(digest)].add(digest)
+        else:
+            skipped += 1
+
+    total = sum(len(values) for values in digests.values())
+    # Power-of-two sizing turns the modulo into a mask at lookup time
+    bloom_bits = 1 << max(6, (total * bloom_bits_per_entry - 1).bit_length()) if bloom_bits_per_entry and total else 0
+    bloom = array('Q', [0]) * (bloom_bits // 64)
+    word_mask = len(bloom) - 1
+    prefix_bits = {width: _prefix_bits(len(digests[width])) for width in DIGEST_WIDTHS}
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, prefix_bits[16], prefix_bits[32], len(digests[16]),
+                            len(digests[32]), bloom_bits, BLOOM_HASHES if bloom_bits else 0))
+        for width in DIGEST_WIDTHS:
+            ordered = sorted(digests[width])
+            bits = prefix_bits[width]
+
+            # index[i] is the position of the first digest whose leading bits are >= i
+            index = array('I', [0]) * ((1 << bits) + 1)
+            for digest in ordered:
+                index[(int.from_bytes(digest[:3], 'big') >> (24 - bits)) + 1] += 1
+            for i in range(1, len(index)):
+                index[i] += index[i - 1]
+            if sys.byteorder != 'little':
+                index.byteswap()
+            f.write(index.tobytes())
+
+            f.write(b''.join(ordered))
+            if bloom_bits:
+                for digest in ordered:
+                    word, bits = _bloom_slot(digest, word_mask)
+                    bloom[word] |= bits
+
+        end = HEADER.size + sum(((1 << prefix_bits[w]) + 1) * 4 + w * len(digests[w]) for w in DIGEST_WIDTHS)
+        f.write(b'\0' * (_bloom_offset(HEADER.size, len(digests[16]), len(digests[32]),
+                                        prefix_bits[16], prefix_bits[32]) - end))
+        if sys.byteorder != 'little':
+            bloom.byteswap()
+        f.write(bloom.tobytes())
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    return {'md5': len(digests[16]), 'sha256': len(digests[32]), 'skipped': skipped}
+
+def convert_json(json_path: str, store_path: str, bloom_bits_per_entry: int = 10) -> Dict[str, int]:
+    """Convert a malware_signatures.json database into a binary store"""
+    with open(json_path, 'r') as f:
+        data = json.load(f)
+    return build_signature_store(data.get('signatures', []), store_path, bloom_bits_per_entry)
+
+def main():
+    parser = argparse.ArgumentParser(description='Convert a JSON malware signature database to the binary store format')
+    parser.add_argument('json_file', help='Input JSON database (e.g. malware_signatures.json)')
+    parser.add_argument('store_file', help='Output binary store (e.g. malware_signatures.sig)')
+    parser.add_argument('--bloom-bits', type=int, default=10, help='Bloom filter bits per signature, 0 to disable (default: 10)')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    try:
+        result = convert_json(args.json_file, args.store_file, args.bloom_bits)
+    except (OSError, ValueError) as e:
+        print(f"Conversion failed: {e}")
+        sys.exit(1)
+    print(f"Wrote {result['md5']} MD5 and {result['sha256']} SHA256 signatures to {args.store_file}"
+          f" ({result['skipped']} invalid entries skipped)")
+
+if __name__ == "__main__":
+    main()
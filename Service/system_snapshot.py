@@ -0,0 +1,118 @@
+"""
+System Snapshot Provider
+Collects connections and interface counters once per tick and shares them between monitors
+"""
+
+import threading
+import time
+import logging
+from types import MappingProxyType
+from typing import Dict, Iterator, Mapping, NamedTuple, Optional, Tuple
+import psutil
+import proc_net
+
+class ProcessInfo(NamedTuple):
+    pid: int
+    name: Optional[str]
+
+class SystemSnapshot:
+    """One tick's view of the system; the process list and command lines are read only when asked for"""
+
+    def __init__(self, taken_at: float, connections, net_io_counters: Mapping, net_if_addrs: Mapping):
+        self.taken_at = taken_at
+        self.connections = connections  # proc_net.ConnectionTable, or psutil's list on other platforms
+        self.net_io_counters = net_io_counters
+        self.net_if_addrs = net_if_addrs
+        self._processes = None
+        self._cmdlines: Dict[int, Tuple[str, ...]] = {}
+        self._lock = threading.Lock()
+
+    def established(self) -> Iterator:
+        """Iterate ESTABLISHED TCP connections"""
+        if isinstance(self.connections, proc_net.ConnectionTable):
+            return self.connections.established()
+        return (conn for conn in self.connections if conn.status == psutil.CONN_ESTABLISHED)
+
+    def connections_for_pid(self, pid: int) -> Iterator:
+        """Iterate connections owned by a process"""
+        if isinstance(self.connections, proc_net.ConnectionTable):
+            return self.connections.for_pid(pid)
+        return (conn for conn in self.connections if conn.pid == pid)
+
+    def process_name(self, pid: Optional[int]) -> Optional[str]:
+        """Get a process name from the pid cache, which revalidates it against the process start time"""
+        return proc_net.process_names.get(pid)
+
+    @property
+    def processes(self) -> Tuple[ProcessInfo, ...]:
+        """Running processes, listed on first use and then shared by every reader of this snapshot"""
+        with self._lock:
+            if self._processes is None:
+                processes = []
+                for pid in psutil.pids():
+                    name = proc_net.process_names.get(pid)
+                    processes.append(ProcessInfo(pid, name if name != "Unknown" else None))
+                self._processes = tuple(processes)
+            return self._processes
+
+    def cmdline(self, pid: int) -> Tuple[str, ...]:
+        """Get a process command line, read at most once per snapshot"""
+        cmdline = self._cmdlines.get(pid)
+        if cmdline is None:
+            try:
+                cmdline = tuple(psutil.Process(pid).cmdline())
+            except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess, OSError):
+                cmdline = ()
+            self._cmdlines[pid] = cmdline
+        return cmdline
+
+class SnapshotProvider:
+    def __init__(self, freshness: float = 5.0):
+        self.freshness = freshness
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._collections = 0
+        self._hits = 0
+
+    def _collect(self) -> SystemSnapshot:
+        """Walk the kernel socket tables once; connections stay in proc_net's columnar table"""
+        try:
+            connections = proc_net.net_connections()
+        except (psutil.AccessDenied, OSError) as e:
+            self.logger.warning(f"Could not read network connections: {e}")
+            connections = ()
+
+        try:
+            io_counters = psutil.net_io_counters(pernic=True)
+            if_addrs = psutil.net_if_addrs()
+        except OSError as e:
+            self.logger.warning(f"Could not read interface statistics: {e}")
+            io_counters, if_addrs = {}, {}
+
+        return SystemSnapshot(
+            taken_at=time.time(),
+            connections=connections,
+            net_io_counters=MappingProxyType(io_counters),
+            net_if_addrs=MappingProxyType(if_addrs)
+        )
+
+    def get(self) -> SystemSnapshot:
+        """Return the current snapshot, collecting a new one if it is older than the freshness window"""
+        with self._lock:
+            if self._snapshot is not None and time.time() - self._snapshot.taken_at < self.freshness:
+                self._hits += 1
+                return self._snapshot
+
+            self._snapshot = self._collect()
+            self._collections += 1
+            return self._snapshot
+
+    def get_stats(self):
+        """Get collection and reuse counters"""
+        with self._lock:
+            return {
+                'collections': self._collections,
+                'reuses': self._hits,
+                'freshness': self.freshness
+            }
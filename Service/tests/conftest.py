@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The service modules are flat scripts; make them importable from the tests
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
@@ -0,0 +1,54 @@
+"""
+Tests for what the malware detector reports for scanned files
+"""
+
+import hashlib
+import logging
+import pytest
+from file_hasher import FileHasher
+from malware_detector import MalwareDetector
+
+def make_detector(max_bytes=None):
+    """A detector with only what scanning and reporting use, capturing reports instead of sending them"""
+    detector = MalwareDetector.__new__(MalwareDetector)
+    detector.logger = logging.getLogger('test_malware_detector')
+    detector.config = {
+        'suspicious_extensions': ['.exe'],
+        'max_file_size': 100 * 1024 * 1024,
+        'min_suspicious_score': 1,
+        'alert_cooldown': 300,
+    }
+    detector.malware_signatures = set()
+    detector.suspicious_files = []
+    detector.alerted_files = {}
+    detector.hash_cache = None
+    detector.file_hasher = FileHasher(workers=1, buffer_size=4096, max_bytes=max_bytes)
+    detector.reports = []
+    detector._send_to_api = detector.reports.append
+    return detector
+
+@pytest.fixture
+def payload(tmp_path):
+    path = tmp_path / 'setup.exe'
+    path.write_bytes(b'MZ' + bytes(range(256)) * 64)
+    return path
+
+def scan_and_report(detector, path):
+    detector._report_file(str(path), None, detector.scan_file(str(path)))
+    (report,) = detector.reports
+    return report
+
+def test_full_hash_is_reported(payload):
+    report = scan_and_report(make_detector(), payload)
+    assert report['file_hash_md5'] == hashlib.md5(payload.read_bytes()).hexdigest()
+    assert report['file_hash_sha256'] == hashlib.sha256(payload.read_bytes()).hexdigest()
+
+def test_capped_hash_is_not_reported_as_file_hash(payload):
+    report = scan_and_report(make_detector(max_bytes=1024), payload)
+    assert report['file_hash_md5'] is None
+    assert report['file_hash_sha256'] is None
+    assert 'Only the first 1024 bytes were hashed' in report['indicators']
+
+def test_cap_above_file_size_reports_full_hash(payload):
+    report = scan_and_report(make_detector(max_bytes=1024 * 1024), payload)
+    assert report['file_hash_sha256'] == hashlib.sha256(payload.read_bytes()).hexdigest()
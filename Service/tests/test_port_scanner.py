@@ -0,0 +1,43 @@
+"""
+Tests for the chunked multi-host port scan
+"""
+
+import socket
+import pytest
+from port_scanner import AsyncPortScanner
+
+@pytest.fixture
+def listening_port():
+    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server.bind(('127.0.0.1', 0))
+    server.listen()
+    yield server.getsockname()[1]
+    server.close()
+
+def scan(targets, ports, chunk_size=256):
+    scanner = AsyncPortScanner(concurrency=16, timeout=0.5)
+    return list(scanner.scan_hosts_sync(targets, ports, chunk_size))
+
+@pytest.mark.parametrize('targets', ['127.0.0.1,127.0.0.1', ['127.0.0.1', '127.0.0.1/32']])
+def test_duplicate_hosts_are_scanned_once(listening_port, targets):
+    results = scan(targets, [listening_port])
+    assert results == [('127.0.0.1', [listening_port], {listening_port: True})]
+
+def test_overlapping_cidr_and_host(listening_port):
+    results = scan('127.0.0.0/30,127.0.0.1', [listening_port, listening_port])
+    assert sorted(host for host, _, _ in results) == ['127.0.0.1', '127.0.0.2']
+    assert dict((host, open_ports) for host, open_ports, _ in results)['127.0.0.1'] == [listening_port]
+
+def test_duplicates_across_small_chunks(listening_port):
+    results = scan(['127.0.0.1'] * 5, [listening_port], chunk_size=2)
+    assert [host for host, _, _ in results] == ['127.0.0.1'] * 3
+
+def test_no_ports_yields_nothing():
+    assert scan('127.0.0.1,127.0.0.2', []) == []
+
+def test_unresolvable_host_is_reported(listening_port):
+    results = scan('127.0.0.1,no-such-host.invalid', [listening_port])
+    assert dict((host, open_ports) for host, open_ports, _ in results) == {
+        '127.0.0.1': [listening_port],
+        'no-such-host.invalid': [],
+    }
@@ -0,0 +1,161 @@
+"""
+Threat Intelligence Feeds
+Disk-cached domain feeds refreshed in the background with conditional requests
+"""
+
+import os
+import json
+import hashlib
+import threading
+import time
+import logging
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+from urllib.parse import urlparse
+from urllib.request import url2pathname
+import requests
+from domain_matcher import parse_domain_list
+
+class ThreatIntelFeeds:
+    def __init__(self, feeds: Iterable[str], cache_dir: str = 'threat_intel_cache',
+                 refresh_interval: float = 3600, timeout: float = 10):
+        self.feeds = [feed for feed in feeds if feed]
+        self.cache_dir = cache_dir
+        self.refresh_interval = refresh_interval
+        self.timeout = timeout
+        self.logger = logging.getLogger(__name__)
+
+        self._session = requests.Session()
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._state = {}  # feed -> cached metadata and domains
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _cache_path(self, feed: str) -> str:
+        return os.path.join(self.cache_dir, hashlib.sha1(feed.encode('utf-8')).hexdigest() + '.json')
+
+    def _local_path(self, feed: str) -> Optional[str]:
+        """Map file:// URLs and plain paths to a filesystem path; None for remote feeds"""
+        parsed = urlparse(feed)
+        if parsed.scheme == 'file':
+            return url2pathname(parsed.path)
+        if parsed.scheme in ('http', 'https'):
+            return None
+        return feed
+
+    def _save(self, feed: str, state: Dict[str, Any]):
+        tmp_path = self._cache_path(feed) + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self._cache_path(feed))
+
+    def load_cached(self) -> Set[str]:
+        """Load every feed's last good domain list from disk, without touching the network"""
+        for feed in self.feeds:
+            try:
+                with open(self._cache_path(feed), 'r') as f:
+                    state = json.load(f)
+                if state.get('feed') == feed:
+                    with self._lock:
+                        self._state[feed] = state
+            except FileNotFoundError:
+                continue
+            except (OSError, ValueError) as e:
+                self.logger.warning(f"Ignoring unreadable threat intel cache for {feed}: {e}")
+        return self.domains()
+
+    def domains(self) -> Set[str]:
+        """Merged, deduplicated domains across all feeds"""
+        with self._lock:
+            merged = set()
+            for state in self._state.values():
+                merged.update(state.get('domains', []))
+            return merged
+
+    def _fetch(self, feed: str, previous: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Fetch one feed; returns new state, or None when it is unchanged"""
+        local_path = self._local_path(feed)
+        if local_path is not None:
+            mtime_ns = os.stat(local_path).st_mtime_ns
+            if previous.get('mtime_ns') == mtime_ns:
+                return None
+            with open(local_path, 'r', encoding='utf-8', errors='replace') as f:
+                text = f.read()
+            return {'feed': feed, 'mtime_ns': mtime_ns, 'domains': sorted(set(parse_domain_list(text)))}
+
+        headers = {}
+        if previous.get('etag'):
+            headers['If-None-Match'] = previous['etag']
+        if previous.get('last_modified'):
+            headers['If-Modified-Since'] = previous['last_modified']
+        response = self._session.get(feed, headers=headers, timeout=self.timeout)
+        if response.status_code == 304:
+            return None
+        response.raise_for_status()
+        return {
+            'feed': feed,
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'domains': sorted(set(parse_domain_list(response.text)))
+        }
+
+    def refresh(self) -> bool:
+        """Refresh all feeds; returns True if any feed's domains changed"""
+        changed = False
+        for feed in self.feeds:
+            with self._lock:
+                previous = self._state.setdefault(feed, {})
+            try:
+                state = self._fetch(feed, previous)
+            except (requests.RequestException, OSError, ValueError) as e:
+                self.logger.warning(f"Could not refresh threat intel feed {feed}: {e}")
+                with self._lock:
+                    previous['last_error'] = str(e)
+                continue
+
+            now = time.time()
+            if state is None:
+                with self._lock:
+                    previous['checked_at'] = now
+                    previous.pop('last_error', None)
+                continue
+
+            state['fetched_at'] = state['checked_at'] = now
+            changed = changed or state['domains'] != previous.get('domains')
+            with self._lock:
+                self._state[feed] = state
+            try:
+                self._save(feed, state)
+            except OSError as e:
+                self.logger.warning(f"Could not cache threat intel feed {feed}: {e}")
+            self.logger.info(f"Refreshed threat intel feed {feed}: {len(state['domains'])} domains")
+        return changed
+
+    def _refresh_loop(self, on_update: Callable[[Set[str]], None]):
+        while not self._stop_event.is_set():
+            if self.refresh():
+                on_update(self.domains())
+            self._stop_event.wait(self.refresh_interval)
+
+    def start(self, on_update: Callable[[Set[str]], None]):
+        """Refresh now and then every refresh_interval in a background thread"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._refresh_loop, args=(on_update,), daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def get_stats(self) -> List[Dict[str, Any]]:
+        """Get per-feed domain counts and refresh status"""
+        with self._lock:
+            return [{
+                'feed': feed,
+                'domains': len(self._state.get(feed, {}).get('domains', [])),
+                'fetched_at': self._state.get(feed, {}).get('fetched_at'),
+                'checked_at': self._state.get(feed, {}).get('checked_at'),
+                'last_error': self._state.get(feed, {}).get('last_error')
+            } for feed in self.feeds]
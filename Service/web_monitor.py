@@ -7,10 +7,7 @@ import os
 import json
 import time
 import threading
-import psutil
-import socket
 import requests
-import re
 from datetime import datetime, timedelta
 from collections import defaultdict, deque
 import logging
@@ -19,9 +16,14 @@ import platform
 from urllib.parse import urlparse
 import dns.resolver
 from api_client import APIClient
+from system_snapshot import SnapshotProvider
+from dns_cache import ReverseDNSCache
+from dns_resolver import PTRResolver
+from domain_rules import DomainRules, VerdictCache
+from connection_tracker import ConnectionTracker
 
 class WebMonitor:
-    def __init__(self, config_file=None):
+    def __init__(self, config_file=None, snapshot_provider=None, dns_cache=None):
         self.logger = self._setup_logging()
         self.running = False
         self.web_activity = deque(maxlen=1000)
@@ -61,18 +63,53 @@ class WebMonitor:
             'api_enabled': True,
             'api_username': 'admin',
             'api_password': 'admin123',
+            'api_batch_size': 200,  # reports per bulk request
+            'api_flush_interval': 2,  # seconds before a partial batch is flushed
+            'api_queue_size': 10000,  # max reports held in memory
+            'api_queue_policy': 'drop_oldest',  # or 'block'
+            'api_spool_enabled': True,  # persist undeliverable reports to disk
+            'api_spool_dir': 'spool/web',
+            'api_spool_max_bytes': 100 * 1024 * 1024,  # 100MB
+            'api_spool_retry_interval': 10,  # seconds between reconnect attempts
+            'snapshot_freshness': 5,  # seconds a system snapshot is reused
+            'dns_cache_size': 10000,  # reverse DNS entries kept in memory
+            'dns_positive_ttl': 3600,  # seconds a resolved hostname is reused
+            'dns_negative_ttl': 300,  # seconds a failed lookup is remembered
+            'dns_cache_file': 'dns_cache.json',
+            'dns_workers': 32,  # concurrent reverse DNS queries
+            'dns_timeout': 2,  # seconds per reverse DNS query
+            'dns_nameservers': [],  # empty uses the system resolver configuration
+            'verdict_cache_size': 10000,  # analysed domains remembered until the rules change
+            'connection_heartbeat_interval': 300,  # seconds between aggregated reports of still-open connections (0 disables)
             'alert_cooldown': 300  # 5 minutes cooldown for same domain
         }
         
         if config_file and os.path.exists(config_file):
             self._load_config(config_file)
         
+        self.snapshot_provider = snapshot_provider or SnapshotProvider(self.config['snapshot_freshness'])
+        self.dns_cache = dns_cache or ReverseDNSCache(
+            max_size=self.config['dns_cache_size'],
+            positive_ttl=self.config['dns_positive_ttl'],
+            negative_ttl=self.config['dns_negative_ttl'],
+            persist_file=self.config['dns_cache_file'],
+            resolver=PTRResolver(
+                max_workers=self.config['dns_workers'],
+                timeout=self.config['dns_timeout'],
+                nameservers=self.config['dns_nameservers']
+            )
+        )
+        self.ruleset_version = 0
+        self.verdict_cache = VerdictCache(self.config['verdict_cache_size'])
+        self.connection_tracker = ConnectionTracker(self.config['connection_heartbeat_interval'])
         self._load_blacklist()
         self._load_whitelist()
+        self._compile_rules()
         
         # Initialize API connection
         if self.config['api_enabled']:
             self._init_api_connection()
+            self._start_api_queue()
     
     def _setup_logging(self):
         """Setup logging for web monitoring"""
@@ -95,6 +132,23 @@ class WebMonitor:
         except Exception as e:
             self.logger.error(f"Error loading config: {e}")
     
+    def reload_config(self, config_file):
+        """Reload configuration and domain lists, then recompile the domain rules"""
+        self._load_config(config_file)
+        self._load_blacklist()
+        self._load_whitelist()
+        self._compile_rules()
+    
+    def _compile_rules(self):
+        """Compile the keyword, TLD and legitimate domain lists used by analyze_domain"""
+        self.domain_rules = DomainRules(
+            self.config['legitimate_domains'],
+            self.config['suspicious_keywords'],
+            self.config['suspicious_tlds']
+        )
+        self.ruleset_version += 1
+        self.logger.info(f"Compiled {self.domain_rules.rule_count} domain rules")
+    
     def _load_blacklist(self):
         """Load blocked domains from file"""
         try:
@@ -127,13 +181,28 @@ class WebMonitor:
         except Exception as e:
             self.logger.error(f"API connection error: {e}")
     
+    def _start_api_queue(self):
+        """Start batched background delivery of API reports"""
+        if self.config['api_spool_enabled']:
+            self.api_client.enable_spool(
+                self.config['api_spool_dir'],
+                max_bytes=self.config['api_spool_max_bytes'],
+                retry_interval=self.config['api_spool_retry_interval']
+            )
+        self.api_client.start_batching(
+            max_size=self.config['api_queue_size'],
+            batch_size=self.config['api_batch_size'],
+            flush_interval=self.config['api_flush_interval'],
+            overflow_policy=self.config['api_queue_policy']
+        )
+    
     def _send_to_api(self, report_data):
         """Send report data to API"""
         if not self.config['api_enabled']:
             return
         
         try:
-            self.api_client.send_web_report(report_data)
+            self.api_client.queue_web_report(report_data)
         except Exception as e:
             self.logger.error(f"Error sending to API: {e}")
     
@@ -151,14 +220,15 @@ class WebMonitor:
     def get_dns_queries(self):
         """Get DNS queries from all network connections"""
         dns_queries = []
+        web_connections = []
         seen_connections = set()  # Track already processed connections
         
         try:
-            # Get all network connections using psutil (more reliable)
-            for conn in psutil.net_connections(kind='inet'):
-                if conn.raddr and conn.status == 'ESTABLISHED':
+            # Established connections from the shared per-cycle snapshot
+            for conn in self.snapshot_provider.get().established():
+                if conn.raddr:
                     # Create unique identifier for this connection
-                    conn_id = f"{conn.raddr.ip}:{conn.raddr.port}"
+                    conn_id = (conn.pid, conn.laddr.port if conn.laddr else None, conn.raddr.ip, conn.raddr.port)
                     
                     # Skip if we've already processed this connection
                     if conn_id in seen_connections:
@@ -180,36 +250,26 @@ class WebMonitor:
                     if port not in [80, 443, 8080, 8443, 3000, 5000, 8000, 9000]:
                         continue
                     
-                    try:
-                        # Try to resolve IP to domain name
-                        hostname = socket.gethostbyaddr(ip)[0]
-                        
-                        # Clean up hostname (remove trailing dots)
-                        hostname = hostname.rstrip('.')
-                        
-                        dns_queries.append({
-                            'domain': hostname,
-                            'ip': ip,
-                            'port': port,
-                            'timestamp': datetime.now().isoformat(),
-                            'connection_type': 'network'
-                        })
-                        
-                        self.logger.debug(f"Resolved {ip}:{port} -> {hostname}")
-                        
-                    except socket.herror:
-                        # If reverse DNS fails, still log the IP
-                        dns_queries.append({
-                            'domain': ip,
-                            'ip': ip,
-                            'port': port,
-                            'timestamp': datetime.now().isoformat(),
-                            'connection_type': 'network'
-                        })
-                        
-                    except Exception as e:
-                        self.logger.debug(f"Error resolving {ip}: {e}")
-                        continue
+                    web_connections.append(conn_id)
+            
+            # Resolve all new IPs concurrently instead of one blocking lookup per connection
+            self.dns_cache.prefetch(ip for _, _, ip, _ in web_connections)
+            
+            for pid, local_port, ip, port in web_connections:
+                # Resolve IP to domain name; if reverse DNS fails, still log the IP
+                hostname = self.dns_cache.hostname_or_ip(ip)
+                
+                dns_queries.append({
+                    'domain': hostname,
+                    'ip': ip,
+                    'port': port,
+                    'pid': pid,
+                    'local_port': local_port,
+                    'timestamp': datetime.now().isoformat(),
+                    'connection_type': 'network'
+                })
+                
+                self.logger.debug(f"Resolved {ip}:{port} -> {hostname}")
         
         except Exception as e:
             self.logger.error(f"Error getting DNS queries: {e}")
@@ -222,45 +282,32 @@ class WebMonitor:
         browser_names = ['chrome', 'firefox', 'edge', 'safari', 'opera', 'brave', 'chromium']
         
         try:
-            for proc in psutil.process_iter(['pid', 'name', 'cmdline']):
-                try:
-                    proc_info = proc.info
-                    if proc_info['name'] and any(browser in proc_info['name'].lower() for browser in browser_names):
-                        connections = []
-                        try:
-                            # Get connections for this specific process
-                            proc_connections = proc.connections()
-                            for conn in proc_connections:
-                                if conn.raddr and conn.status == 'ESTABLISHED':
-                                    try:
-                                        hostname = socket.gethostbyaddr(conn.raddr.ip)[0]
-                                        connections.append({
-                                            'domain': hostname,
-                                            'ip': conn.raddr.ip,
-                                            'port': conn.raddr.port,
-                                            'local_port': conn.laddr.port if conn.laddr else None
-                                        })
-                                    except:
-                                        connections.append({
-                                            'domain': conn.raddr.ip,
-                                            'ip': conn.raddr.ip,
-                                            'port': conn.raddr.port,
-                                            'local_port': conn.laddr.port if conn.laddr else None
-                                        })
-                        except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
-                            # Process may have ended or we don't have permission
-                            pass
-                        
-                        browser_processes.append({
-                            'pid': proc_info['pid'],
-                            'name': proc_info['name'],
-                            'cmdline': ' '.join(proc_info['cmdline']) if proc_info['cmdline'] else '',
-                            'connections': connections,
-                            'timestamp': datetime.now().isoformat()
+            snapshot = self.snapshot_provider.get()
+            browsers = [proc_info for proc_info in snapshot.processes
+                        if proc_info.name and any(browser in proc_info.name.lower() for browser in browser_names)]
+            browser_pids = {proc_info.pid for proc_info in browsers}
+            self.dns_cache.prefetch(conn.raddr.ip for conn in snapshot.established()
+                                    if conn.raddr and conn.pid in browser_pids)
+            
+            for proc_info in browsers:
+                connections = []
+                # Get connections for this specific process
+                for conn in snapshot.connections_for_pid(proc_info.pid):
+                    if conn.raddr and conn.status == 'ESTABLISHED':
+                        connections.append({
+                            'domain': self.dns_cache.hostname_or_ip(conn.raddr.ip),
+                            'ip': conn.raddr.ip,
+                            'port': conn.raddr.port,
+                            'local_port': conn.laddr.port if conn.laddr else None
                         })
                 
-                except (psutil.NoSuchProcess, psutil.AccessDenied):
-                    continue
+                browser_processes.append({
+                    'pid': proc_info.pid,
+                    'name': proc_info.name,
+                    'cmdline': ' '.join(snapshot.cmdline(proc_info.pid)),
+                    'connections': connections,
+                    'timestamp': datetime.now().isoformat()
+                })
         
         except Exception as e:
             self.logger.error(f"Error getting browser processes: {e}")
@@ -272,6 +319,17 @@ class WebMonitor:
         if not domain or domain in ['localhost', '127.0.0.1']:
             return None
         
+        version = self.ruleset_version
+        try:
+            return self.verdict_cache.get(domain, version)
+        except KeyError:
+            pass
+        analysis = self._analyze_domain(domain)
+        self.verdict_cache.put(domain, version, analysis)
+        return analysis
+    
+    def _analyze_domain(self, domain):
+        """Score a domain against the blacklist, whitelist and compiled rules"""
         analysis = {
             'domain': domain,
             'suspicious_score': 0,
@@ -292,46 +350,34 @@ class WebMonitor:
             return analysis
         
         # Check against legitimate domains
-        for legit_domain in self.config['legitimate_domains']:
-            if legit_domain in domain:
-                analysis['category'] = 'legitimate'
-                return analysis
+        if self.domain_rules.is_legitimate(domain):
+            analysis['category'] = 'legitimate'
+            return analysis
         
         # Check for suspicious keywords
         domain_lower = domain.lower()
-        for keyword in self.config['suspicious_keywords']:
-            if keyword in domain_lower:
-                analysis['suspicious_score'] += 3
-                analysis['indicators'].append(f"Contains suspicious keyword: {keyword}")
-                analysis['category'] = 'suspicious'
+        for keyword in self.domain_rules.matching_keywords(domain_lower):
+            analysis['suspicious_score'] += 3
+            analysis['indicators'].append(f"Contains suspicious keyword: {keyword}")
+            analysis['category'] = 'suspicious'
         
         # Check for suspicious TLDs
-        for tld in self.config['suspicious_tlds']:
-            if domain.endswith(tld):
-                analysis['suspicious_score'] += 2
-                analysis['indicators'].append(f"Suspicious TLD: {tld}")
-                analysis['category'] = 'suspicious'
+        for tld in self.domain_rules.matching_tlds(domain):
+            analysis['suspicious_score'] += 2
+            analysis['indicators'].append(f"Suspicious TLD: {tld}")
+            analysis['category'] = 'suspicious'
         
         # Check for IP addresses (direct IP access)
-        if re.match(r'^\d+\.\d+\.\d+\.\d+$', domain):
+        if self.domain_rules.is_ip_address(domain):
             analysis['suspicious_score'] += 1
             analysis['indicators'].append("Direct IP access")
             analysis['category'] = 'suspicious'
         
         # Check for suspicious patterns
-        suspicious_patterns = [
-            r'[0-9]{8,}',  # Long number sequences
-            r'[a-f0-9]{32,}',  # Hash-like names
-            r'[a-z]{1,3}\.[a-z]{2,4}$',  # Very short domains
-            r'.*\.tk$',  # .tk domains
-            r'.*\.ml$',  # .ml domains
-        ]
-        
-        for pattern in suspicious_patterns:
-            if re.search(pattern, domain_lower):
-                analysis['suspicious_score'] += 2
-                analysis['indicators'].append(f"Suspicious pattern: {pattern}")
-                analysis['category'] = 'suspicious'
+        for pattern in self.domain_rules.matching_patterns(domain_lower):
+            analysis['suspicious_score'] += 2
+            analysis['indicators'].append(f"Suspicious pattern: {pattern}")
+            analysis['category'] = 'suspicious'
         
         # Only flag as suspicious if score is high enough
         if analysis['suspicious_score'] >= 3:
@@ -341,30 +387,44 @@ class WebMonitor:
         
         return analysis
     
+    def _build_report(self, domain, ip, port, analysis, connection_type, **extra):
+        """Build the API record for one observed connection"""
+        return {
+            'domain': domain,
+            'ip_address': ip,
+            'port': int(port) if str(port).isdigit() else None,
+            'suspicious_score': analysis['suspicious_score'] if analysis else 0,
+            'category': analysis['category'] if analysis else 'normal',
+            'indicators': json.dumps(analysis['indicators']) if analysis else '[]',
+            'connection_type': connection_type,
+            'is_blocked': analysis['category'] == 'blocked' if analysis else False,
+            'is_whitelisted': analysis['category'] == 'allowed' if analysis else False,
+            **extra
+        }
+    
+    def _report_connections(self, connection_type, observations, describe):
+        """Send only lifecycle changes for a source; describe(key) logs and records newly opened connections"""
+        for event, key, record in self.connection_tracker.update(connection_type, observations):
+            self._send_to_api(record)
+            if event == 'opened':
+                describe(key)
+            elif event == 'closed':
+                self.logger.debug(f"Connection closed: {record['domain']} after {record['duration']}s")
+    
     def monitor_web_activity(self):
         """Monitor web browsing activity"""
         try:
             # Get DNS queries
             if self.config['dns_monitor']:
-                dns_queries = self.get_dns_queries()
-                for query in dns_queries:
-                    analysis = self.analyze_domain(query['domain'])
-                    
-                    # Log ALL website visits to API, not just suspicious ones
-                    api_data = {
-                        'domain': query['domain'],
-                        'ip_address': query['ip'],
-                        'port': int(query['port']) if str(query['port']).isdigit() else None,
-                        'suspicious_score': analysis['suspicious_score'] if analysis else 0,
-                        'category': analysis['category'] if analysis else 'normal',
-                        'indicators': json.dumps(analysis['indicators']) if analysis else '[]',
-                        'connection_type': 'dns_query',
-                        'is_blocked': analysis['category'] == 'blocked' if analysis else False,
-                        'is_whitelisted': analysis['category'] == 'allowed' if analysis else False
-                    }
-                    self._send_to_api(api_data)
-                    
-                    # Log to console
+                queries = {}
+                analyses = {}
+                for query in self.get_dns_queries():
+                    key = (query['pid'], query['local_port'], query['ip'], query['port'])
+                    analyses[key] = self.analyze_domain(query['domain'])
+                    queries[key] = query
+                
+                def describe_query(key):
+                    query, analysis = queries[key], analyses[key]
                     if analysis and analysis['suspicious_score'] >= 3:
                         self.logger.warning(f"Suspicious DNS query: {query['domain']} (Score: {analysis['suspicious_score']})")
                         suspicious_site = {
@@ -378,83 +438,84 @@ class WebMonitor:
                         self.suspicious_sites.append(suspicious_site)
                     else:
                         self.logger.info(f"Web activity: {query['domain']} (Score: {analysis['suspicious_score'] if analysis else 0})")
+                
+                self._report_connections('dns_query', {
+                    key: self._build_report(query['domain'], query['ip'], query['port'], analyses[key], 'dns_query',
+                                            process_pid=query['pid'])
+                    for key, query in queries.items()
+                }, describe_query)
             
             # Get browser processes
             if self.config['browser_monitor']:
-                browser_processes = self.get_browser_processes()
-                for browser in browser_processes:
+                browser_connections = {}
+                analyses = {}
+                for browser in self.get_browser_processes():
                     for conn in browser['connections']:
-                        analysis = self.analyze_domain(conn['domain'])
-                        
-                        # Log ALL browser activity to API
-                        api_data = {
+                        key = (browser['pid'], conn['local_port'], conn['ip'], conn['port'])
+                        analyses[key] = self.analyze_domain(conn['domain'])
+                        browser_connections[key] = (browser, conn)
+                
+                def describe_browser_connection(key):
+                    (browser, conn), analysis = browser_connections[key], analyses[key]
+                    if analysis and analysis['suspicious_score'] >= 3:
+                        self.logger.warning(f"Suspicious browser activity: {browser['name']} -> {conn['domain']} (Score: {analysis['suspicious_score']})")
+                        self.suspicious_sites.append({
+                            'type': 'browser_connection',
+                            'browser': browser['name'],
+                            'pid': browser['pid'],
                             'domain': conn['domain'],
-                            'ip_address': conn['ip'],
-                            'port': int(conn['port']) if str(conn['port']).isdigit() else None,
-                            'suspicious_score': analysis['suspicious_score'] if analysis else 0,
-                            'category': analysis['category'] if analysis else 'normal',
-                            'indicators': json.dumps(analysis['indicators']) if analysis else '[]',
-                            'connection_type': 'browser_connection',
-                            'is_blocked': analysis['category'] == 'blocked' if analysis else False,
-                            'is_whitelisted': analysis['category'] == 'allowed' if analysis else False
-                        }
-                        self._send_to_api(api_data)
-                        
-                        # Log to console
-                        if analysis and analysis['suspicious_score'] >= 3:
-                            self.logger.warning(f"Suspicious browser activity: {browser['name']} -> {conn['domain']} (Score: {analysis['suspicious_score']})")
-                            self.suspicious_sites.append({
-                                'type': 'browser_connection',
-                                'browser': browser['name'],
-                                'pid': browser['pid'],
-                                'domain': conn['domain'],
-                                'ip': conn['ip'],
-                                'port': conn['port'],
-                                'analysis': analysis,
-                                'timestamp': browser['timestamp']
-                            })
-                        else:
-                            self.logger.info(f"Browser activity: {browser['name']} -> {conn['domain']} (Score: {analysis['suspicious_score'] if analysis else 0})")
+                            'ip': conn['ip'],
+                            'port': conn['port'],
+                            'analysis': analysis,
+                            'timestamp': browser['timestamp']
+                        })
+                    else:
+                        self.logger.info(f"Browser activity: {browser['name']} -> {conn['domain']} (Score: {analysis['suspicious_score'] if analysis else 0})")
+                
+                self._report_connections('browser_connection', {
+                    key: self._build_report(conn['domain'], conn['ip'], conn['port'], analyses[key], 'browser_connection',
+                                            browser_name=browser['name'], process_pid=browser['pid'])
+                    for key, (browser, conn) in browser_connections.items()
+                }, describe_browser_connection)
             
             # Get network connections
             if self.config['network_monitor']:
-                connections = psutil.net_connections(kind='inet')
+                connections = [conn for conn in self.snapshot_provider.get().established() if conn.raddr]
+                self.dns_cache.prefetch(conn.raddr.ip for conn in connections)
+                network_connections = {}
+                analyses = {}
                 for conn in connections:
-                    if conn.raddr and conn.status == 'ESTABLISHED':
-                        try:
-                            hostname = socket.gethostbyaddr(conn.raddr.ip)[0]
-                            analysis = self.analyze_domain(hostname)
-                            
-                            # Log ALL network activity to API
-                            api_data = {
-                                'domain': hostname,
-                                'ip_address': conn.raddr.ip,
-                                'port': conn.raddr.port,
-                                'suspicious_score': analysis['suspicious_score'] if analysis else 0,
-                                'category': analysis['category'] if analysis else 'normal',
-                                'indicators': json.dumps(analysis['indicators']) if analysis else '[]',
-                                'connection_type': 'network_connection',
-                                'is_blocked': analysis['category'] == 'blocked' if analysis else False,
-                                'is_whitelisted': analysis['category'] == 'allowed' if analysis else False
-                            }
-                            self._send_to_api(api_data)
-                            
-                            # Log to console
-                            if analysis and analysis['suspicious_score'] >= 3:
-                                self.logger.warning(f"Suspicious network connection: {hostname} (Score: {analysis['suspicious_score']})")
-                                self.suspicious_sites.append({
-                                    'type': 'network_connection',
-                                    'domain': hostname,
-                                    'ip': conn.raddr.ip,
-                                    'port': conn.raddr.port,
-                                    'local_port': conn.laddr.port if conn.laddr else None,
-                                    'analysis': analysis,
-                                    'timestamp': datetime.now().isoformat()
-                                })
-                            else:
-                                self.logger.info(f"Network activity: {hostname} (Score: {analysis['suspicious_score'] if analysis else 0})")
-                        except:
-                            pass
+                    try:
+                        hostname = self.dns_cache.resolve(conn.raddr.ip)
+                        if not hostname:
+                            continue
+                        key = (conn.pid, conn.laddr.port if conn.laddr else None, conn.raddr.ip, conn.raddr.port)
+                        analyses[key] = self.analyze_domain(hostname)
+                        network_connections[key] = (conn, hostname)
+                    except Exception as e:
+                        self.logger.debug(f"Error analyzing connection to {conn.raddr.ip}: {e}")
+                
+                def describe_network_connection(key):
+                    (conn, hostname), analysis = network_connections[key], analyses[key]
+                    if analysis and analysis['suspicious_score'] >= 3:
+                        self.logger.warning(f"Suspicious network connection: {hostname} (Score: {analysis['suspicious_score']})")
+                        self.suspicious_sites.append({
+                            'type': 'network_connection',
+                            'domain': hostname,
+                            'ip': conn.raddr.ip,
+                            'port': conn.raddr.port,
+                            'local_port': conn.laddr.port if conn.laddr else None,
+                            'analysis': analysis,
+                            'timestamp': datetime.now().isoformat()
+                        })
+                    else:
+                        self.logger.info(f"Network activity: {hostname} (Score: {analysis['suspicious_score'] if analysis else 0})")
+                
+                self._report_connections('network_connection', {
+                    key: self._build_report(hostname, conn.raddr.ip, conn.raddr.port, analyses[key], 'network_connection',
+                                            process_pid=conn.pid)
+                    for key, (conn, hostname) in network_connections.items()
+                }, describe_network_connection)
         
         except Exception as e:
             self.logger.error(f"Error monitoring web activity: {e}")
@@ -504,7 +565,7 @@ class WebMonitor:
                 self.web_activity.append({
                     'timestamp': current_time.isoformat(),
                     'suspicious_count': len(self.suspicious_sites),
-                    'total_connections': len(psutil.net_connections(kind='inet'))
+                    'total_connections': len(self.snapshot_provider.get().connections)
                 })
                 
                 time.sleep(self.config['scan_interval'])
@@ -515,6 +576,8 @@ class WebMonitor:
             self.logger.error(f"Error during web monitoring: {e}")
         finally:
             self.running = False
+            self.api_client.stop_batching()
+            self.dns_cache.save()
     
     def get_monitoring_report(self):
         """Get current monitoring report"""
@@ -523,18 +586,25 @@ class WebMonitor:
             'running': self.running,
             'suspicious_sites': self.suspicious_sites[-50:],  # Last 50 suspicious sites
             'activity_summary': self.get_user_activity_summary(),
+            'api_queue': self.api_client.get_queue_metrics(),
+            'dns_cache': self.dns_cache.get_stats(),
+            'domain_rules': self.domain_rules.get_stats(),
+            'verdict_cache': self.verdict_cache.get_stats(),
+            'connection_tracker': self.connection_tracker.get_stats(),
             'config': self.config
         }
     
     def add_to_blacklist(self, domain):
         """Add domain to blacklist"""
         self.blocked_domains.add(domain)
+        self.ruleset_version += 1
         self._save_blacklist()
         self.logger.info(f"Added {domain} to blacklist")
     
     def add_to_whitelist(self, domain):
         """Add domain to whitelist"""
         self.allowed_domains.add(domain)
+        self.ruleset_version += 1
         self._save_whitelist()
         self.logger.info(f"Added {domain} to whitelist")
     
@@ -557,3 +627,5 @@ class WebMonitor:
     def stop(self):
         """Stop web monitoring"""
         self.running = False
+        self.api_client.stop_batching()
+        self.dns_cache.save()
@@ -11,6 +11,7 @@ from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 from database import get_db
 from models import User
+from cache import TTLCache
 from config import settings
 
 # Password hashing
@@ -19,6 +20,9 @@ pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 # JWT token scheme
 security = HTTPBearer()
 
+# (username, token iat) -> (id, is_active, is_admin), so authenticated requests skip the user lookup
+_principals = TTLCache(max_size=4096, ttl=settings.USER_CACHE_SECONDS)
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash"""
     return pwd_context.verify(plain_password, hashed_password)
@@ -35,7 +39,7 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     else:
         expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     
-    to_encode.update({"exp": expire})
+    to_encode.update({"exp": expire, "iat": datetime.utcnow()})
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
@@ -67,11 +71,22 @@ def get_current_user(
     if username is None:
         raise credentials_exception
     
-    user = db.query(User).filter(User.username == username).first()
-    if user is None:
-        raise credentials_exception
+    key = (username, payload.get("iat"))
+    try:
+        user_id, is_active, is_admin = _principals.get(key)
+    except KeyError:
+        principal = db.query(User.id, User.is_active, User.is_admin).filter(User.username == username).first()
+        if principal is None:
+            raise credentials_exception
+        user_id, is_active, is_admin = principal
+        _principals.put(key, (user_id, is_active, is_admin))
     
-    return user
+    # Detached user holding only the principal; endpoints that need the whole row use get_current_user_record
+    return User(id=user_id, username=username, is_active=is_active, is_admin=is_admin)
+
+def invalidate_user(user_id: int):
+    """Drop a user's cached principals after their account changes"""
+    _principals.invalidate_where(lambda key, principal: principal[0] == user_id)
 
 def get_current_active_user(current_user: User = Depends(get_current_user)) -> User:
     """Get current active user"""
@@ -79,6 +94,20 @@ def get_current_active_user(current_user: User = Depends(get_current_user)) -> U
         raise HTTPException(status_code=400, detail="Inactive user")
     return current_user
 
+def get_current_user_record(
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+) -> User:
+    """Load the current user's full row"""
+    user = db.get(User, current_user.id)
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return user
+
 def get_current_admin_user(current_user: User = Depends(get_current_active_user)) -> User:
     """Get current admin user"""
     if not current_user.is_admin:
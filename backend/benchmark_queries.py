@@ -0,0 +1,388 @@
+"""
+Database benchmarks for the report list and stats endpoints
+
+    python benchmark_queries.py indexes --rows 200000
+    python benchmark_queries.py stats --rows 1000000
+    python benchmark_queries.py --users 10 rollups --rows 100000 1000000
+    python benchmark_queries.py pages --rows 1000000
+    python benchmark_queries.py export --rows 10000 100000
+"""
+
+import os
+import time
+import random
+import asyncio
+import argparse
+import tempfile
+import tracemalloc
+import statistics
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import String, cast, create_engine, func, insert, select, text
+from sqlalchemy.orm import Session
+from database import Base
+from export import export_reports
+from models import User, MalwareReport, WebReport, NetworkReport, WebRollup, WebDomainRollup
+from migrations import run_migrations
+from pagination import _counts, encode_cursor, paginate
+from rollups import rebuild_rollups, utcnow
+from routers.malware import get_malware_stats
+from routers.network import get_network_stats
+from routers.web import get_top_domains, get_web_stats
+from schemas import WebReport as WebReportSchema
+
+# Indexes added by the migrations; dropped first to measure the unindexed plans
+QUERY_INDEXES = {
+    "malware_reports": ["ix_malware_reports_user_id_created_at", "ix_malware_reports_created_at",
+                        "ix_malware_reports_file_hash_sha256"],
+    "web_reports": ["ix_web_reports_user_id_created_at", "ix_web_reports_created_at",
+                    "ix_web_reports_domain_created_at"],
+    "network_reports": ["ix_network_reports_user_id_created_at", "ix_network_reports_created_at",
+                        "ix_network_reports_port_created_at"],
+}
+
+def populate(engine, rows: int, users: int, seed: int = 42, days: int = 365, domain_count: int = 5000):
+    """Insert synthetic reports spread over the last `days` days, stamped in UTC like ingested reports"""
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    categories = ["normal", "normal", "normal", "suspicious", "blacklisted", "", None]
+    # Category, score and flags belong to the domain, as they do when the monitor classifies it
+    domains = [{"domain": f"site{i}.example.com", "category": rng.choice(categories),
+                "suspicious_score": rng.randint(0, 10), "is_blocked": rng.random() < 0.05,
+                "is_whitelisted": rng.random() < 0.2} for i in range(domain_count)]
+    extensions = [".exe", ".dll", ".pdf", ".docx", ".sh", ".tar.gz", ".PNG", ""]
+
+    def created_at():
+        return now - timedelta(seconds=rng.randint(0, (days - 1) * 24 * 3600))
+
+    with engine.begin() as conn:
+        conn.execute(insert(User), [{"id": i, "username": f"user{i}", "email": f"user{i}@example.com",
+                                     "hashed_password": "x"} for i in range(1, users + 1)])
+        for start in range(0, rows, 10000):
+            batch = range(start, min(rows, start + 10000))
+            conn.execute(insert(WebReport), [{
+                "user_id": rng.randint(1, users), **rng.choice(domains), "port": 443,
+                "hit_count": rng.choice([1, 1, 1, 2, 5]), "created_at": created_at()} for _ in batch])
+            conn.execute(insert(NetworkReport), [{
+                "user_id": rng.randint(1, users), "host": f"10.0.{rng.randint(0, 255)}.{rng.randint(1, 254)}",
+                "port": rng.choice([22, 80, 443, 3306, 5432, 8080]), "is_open": rng.random() < 0.3,
+                "hit_count": rng.choice([1, 1, 2]), "created_at": created_at()} for _ in batch])
+            conn.execute(insert(MalwareReport), [{
+                "user_id": rng.randint(1, users), "file_path": f"/tmp/file{i}",
+                "file_name": f"file{i}{rng.choice(extensions)}", "file_hash_sha256": "%064x" % rng.getrandbits(256),
+                "suspicious_score": rng.randint(0, 10), "malware_detected": rng.random() < 0.1,
+                "created_at": created_at()} for i in batch])
+
+def query_patterns(sample_hash: str):
+    """The statements the routers issue, with representative parameters"""
+    month_ago = utcnow() - timedelta(days=30)
+    return [
+        ("web list for one user", select(WebReport).where(WebReport.user_id == 7)
+            .order_by(WebReport.created_at.desc()).limit(100)),
+        ("web list for admin", select(WebReport).order_by(WebReport.created_at.desc()).limit(100)),
+        ("web stats, last 30 days", select(func.count()).select_from(WebReport)
+            .where(WebReport.created_at >= month_ago)),
+        ("web stats for one user", select(func.count()).select_from(WebReport)
+            .where(WebReport.created_at >= month_ago, WebReport.user_id == 7)),
+        ("web reports for one domain", select(WebReport).where(WebReport.domain == "site42.example.com")
+            .order_by(WebReport.created_at.desc()).limit(100)),
+        ("network list for one user", select(NetworkReport).where(NetworkReport.user_id == 7)
+            .order_by(NetworkReport.created_at.desc()).limit(100)),
+        ("network list for one port", select(NetworkReport).where(NetworkReport.port == 5432)
+            .order_by(NetworkReport.created_at.desc()).limit(100)),
+        ("malware list for one user", select(MalwareReport).where(MalwareReport.user_id == 7)
+            .order_by(MalwareReport.created_at.desc()).limit(100)),
+        ("malware lookup by sha256", select(MalwareReport).where(MalwareReport.file_hash_sha256 == sample_hash)),
+    ]
+
+def explain(conn, statement) -> str:
+    sql = str(statement.compile(conn, compile_kwargs={"literal_binds": True}))
+    if conn.dialect.name == "sqlite":
+        return "; ".join(row[-1] for row in conn.execute(text(f"EXPLAIN QUERY PLAN {sql}")))
+    return "; ".join(str(row[0]) for row in conn.execute(text(f"EXPLAIN {sql}")))
+
+def measure(engine, patterns, repeat: int):
+    results = {}
+    with engine.connect() as conn:
+        for name, statement in patterns:
+            timings = []
+            for _ in range(repeat):
+                start_time = time.perf_counter()
+                conn.execute(statement).fetchall()
+                timings.append(time.perf_counter() - start_time)
+            results[name] = (statistics.median(timings), explain(conn, statement))
+    return results
+
+def open_database(args):
+    database_url = args.database_url or f"sqlite:///{tempfile.mktemp(suffix='.db')}"
+    return create_engine(database_url)
+
+def close_database(args, engine):
+    engine.dispose()
+    if not args.database_url:
+        os.remove(engine.url.database)
+
+def bench_indexes(args):
+    engine = open_database(args)
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        for table, indexes in QUERY_INDEXES.items():
+            for index in indexes:
+                conn.execute(text(f"DROP INDEX {index} ON {table}" if conn.dialect.name == "mysql"
+                                  else f"DROP INDEX {index}"))
+
+    start_time = time.perf_counter()
+    populate(engine, args.rows, args.users)
+    print(f"Inserted {args.rows:,} rows per report table in {time.perf_counter() - start_time:.1f}s")
+
+    with engine.connect() as conn:
+        sample_hash = conn.execute(select(MalwareReport.file_hash_sha256).limit(1)).scalar()
+    patterns = query_patterns(sample_hash)
+    before = measure(engine, patterns, args.repeat)
+
+    start_time = time.perf_counter()
+    run_migrations(engine)
+    print(f"Applied migrations in {time.perf_counter() - start_time:.1f}s")
+    after = measure(engine, patterns, args.repeat)
+
+    for name, _ in patterns:
+        (before_time, before_plan), (after_time, after_plan) = before[name], after[name]
+        print(f"\n{name}: {before_time * 1000:,.2f}ms -> {after_time * 1000:,.2f}ms "
+              f"({before_time / after_time:,.0f}x)")
+        print(f"  before: {before_plan}")
+        print(f"  after:  {after_plan}")
+
+    close_database(args, engine)
+
+# The stats endpoints as they were before the aggregation moved into SQL, for comparison
+def loop_web_stats(query):
+    domain_counts = {}
+    category_counts = {}
+    for report in query.all():
+        domain_counts[report.domain] = domain_counts.get(report.domain, 0) + (report.hit_count or 1)
+    for report in query.all():
+        category = report.category or 'unknown'
+        category_counts[category] = category_counts.get(category, 0) + (report.hit_count or 1)
+    return sorted(domain_counts.items(), key=lambda x: x[1], reverse=True)[:10], category_counts
+
+def loop_network_stats(query):
+    port_counts = {}
+    for report in query.all():
+        port_counts[report.port] = port_counts.get(report.port, 0) + (report.hit_count or 1)
+    return sorted(port_counts.items(), key=lambda x: x[1], reverse=True)[:10]
+
+def loop_malware_stats(query):
+    file_types = {}
+    for report in query.all():
+        if report.file_name:
+            ext = report.file_name.split('.')[-1].lower() if '.' in report.file_name else 'no_extension'
+            file_types[ext] = file_types.get(ext, 0) + 1
+    return sorted(file_types.items(), key=lambda x: x[1], reverse=True)[:10]
+
+def profile(function):
+    """Wall time of one call, then its peak traced allocation in a second call"""
+    start_time = time.perf_counter()
+    result = function()
+    elapsed = time.perf_counter() - start_time
+    tracemalloc.start()
+    function()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+def bench_stats(args):
+    engine = open_database(args)
+    run_migrations(engine)
+
+    start_time = time.perf_counter()
+    populate(engine, args.rows, args.users, days=args.days)
+    print(f"Inserted {args.rows:,} rows per report table in {time.perf_counter() - start_time:.1f}s")
+    with Session(engine) as db:
+        rebuild_rollups(db)
+        db.commit()
+
+    # Rollups break ties by bucket rather than by id, so top lists are compared by their counts
+    def counts(top):
+        return [int(count) for _, count in top]
+
+    admin = User(id=1, username="user1", is_admin=True)
+    with Session(engine) as db:
+        start_date = utcnow() - timedelta(days=args.days)
+        web = db.query(WebReport).filter(WebReport.created_at >= start_date).order_by(WebReport.id)
+        network = db.query(NetworkReport).filter(NetworkReport.created_at >= start_date).order_by(NetworkReport.id)
+        malware = db.query(MalwareReport).filter(MalwareReport.created_at >= start_date).order_by(MalwareReport.id)
+        cases = [
+            ("web", lambda: loop_web_stats(web),
+             lambda: get_web_stats(days=args.days, db=db, current_user=admin),
+             lambda loop, stats: (counts(loop[0]), loop[1]) == (counts(stats["top_domains"]), stats["category_breakdown"])),
+            ("network", lambda: loop_network_stats(network),
+             lambda: get_network_stats(days=args.days, db=db, current_user=admin),
+             lambda loop, stats: counts(loop) == counts(stats["top_ports"])),
+            ("malware", lambda: loop_malware_stats(malware),
+             lambda: get_malware_stats(days=args.days, db=db, current_user=admin),
+             lambda loop, stats: counts(loop) == counts(stats["top_file_types"])),
+        ]
+        for name, loop_version, rollup_version, same in cases:
+            loop_result, loop_time, loop_peak = profile(loop_version)
+            db.expunge_all()
+            rollup_result, rollup_time, rollup_peak = profile(rollup_version)
+            print(f"\n{name} stats: {loop_time:,.2f}s -> {rollup_time:,.3f}s ({loop_time / rollup_time:,.0f}x), "
+                  f"peak {loop_peak / 2**20:,.1f}MiB -> {rollup_peak / 2**20:,.2f}MiB, "
+                  f"breakdowns match: {same(loop_result, rollup_result)}")
+
+    close_database(args, engine)
+
+def bench_rollups(args):
+    """Stats latency from rollups at growing raw table sizes, against a GROUP BY over the raw rows"""
+    admin = User(id=1, username="user1", is_admin=True)
+    for rows in args.rows:
+        engine = open_database(args)
+        run_migrations(engine)
+        populate(engine, rows, args.users, days=args.days, domain_count=args.domains)
+        with Session(engine) as db:
+            start_time = time.perf_counter()
+            rebuild_rollups(db)
+            db.commit()
+            rebuild_time = time.perf_counter() - start_time
+            buckets = db.query(func.count()).select_from(WebRollup).scalar()
+            domain_buckets = db.query(func.count()).select_from(WebDomainRollup).scalar()
+
+            start_date = utcnow() - timedelta(days=args.days)
+            raw_top_domains = (select(WebReport.domain, func.sum(WebReport.hit_count).label("visits"))
+                               .where(WebReport.created_at >= start_date)
+                               .group_by(WebReport.domain).order_by(text("visits DESC")).limit(10))
+            timings = {}
+            for name, function in [
+                ("raw GROUP BY", lambda: db.execute(raw_top_domains).all()),
+                ("web", lambda: get_web_stats(days=args.days, db=db, current_user=admin)),
+                ("top domains", lambda: get_top_domains(limit=20, days=args.days, db=db, current_user=admin)),
+                ("network", lambda: get_network_stats(days=args.days, db=db, current_user=admin)),
+                ("malware", lambda: get_malware_stats(days=args.days, db=db, current_user=admin)),
+            ]:
+                samples = []
+                for _ in range(args.repeat):
+                    start_time = time.perf_counter()
+                    function()
+                    samples.append(time.perf_counter() - start_time)
+                timings[name] = statistics.median(samples)
+
+        print(f"\n{rows:,} rows per report table, {buckets:,} web count buckets and {domain_buckets:,} "
+              f"web domain buckets (rebuilt in {rebuild_time:.1f}s)")
+        for name, elapsed in timings.items():
+            print(f"  {name}: {elapsed * 1000:,.1f}ms")
+        close_database(args, engine)
+
+def bench_pages(args):
+    """List endpoint latency at increasing depth: offset with a fresh count against the keyset cursor"""
+    engine = open_database(args)
+    run_migrations(engine)
+    populate(engine, args.rows, args.users)
+
+    def timed(function):
+        samples = []
+        for _ in range(args.repeat):
+            start_time = time.perf_counter()
+            function()
+            samples.append(time.perf_counter() - start_time)
+        return statistics.median(samples) * 1000
+
+    def uncached_offset(query, skip):
+        _counts.clear()
+        return paginate(query, WebReport, WebReportSchema, skip, args.limit)
+
+    with Session(engine) as db:
+        query = db.query(WebReport)
+        newest_first = query.add_columns(cast(WebReport.created_at, String)).order_by(
+            WebReport.created_at.desc(), WebReport.id.desc())
+        print(f"{args.rows:,} web reports, {args.limit} per page")
+        for skip in (0, args.rows // 10, args.rows // 2, args.rows - args.limit):
+            # The cursor a client would hold after paging down to this row
+            cursor = ""
+            if skip:
+                report, created_at = newest_first.offset(skip - 1).first()
+                cursor = encode_cursor(str(created_at), report.id)
+            offset_time = timed(lambda: uncached_offset(query, skip))
+            cursor_time = timed(lambda: paginate(query, WebReport, WebReportSchema, 0, args.limit, cursor))
+            no_total_time = timed(lambda: paginate(query, WebReport, WebReportSchema, 0, args.limit, cursor,
+                                                   include_total=False))
+            print(f"  page {skip // args.limit + 1:,}: offset + count {offset_time:,.1f}ms, "
+                  f"cursor + cached total {cursor_time:,.1f}ms, cursor without total {no_total_time:,.1f}ms")
+
+    close_database(args, engine)
+
+def bench_export(args):
+    """Streamed export against collecting every list page, as sizes grow; flat peaks mean constant memory"""
+    def drain(response) -> int:
+        async def consume():
+            size = 0
+            async for chunk in response.body_iterator:
+                size += len(chunk)
+            return size
+        return asyncio.run(consume())
+
+    def paged(engine):
+        with Session(engine) as db:
+            query = db.query(WebReport)
+            items, cursor = [], ""
+            while cursor is not None:
+                page = paginate(query, WebReport, WebReportSchema, 0, 1000, cursor, include_total=False)
+                items.extend(item.model_dump(mode="json") for item in page.items)
+                cursor = page.next_cursor
+            return len(items)
+
+    def streamed(engine, export_format, gzip):
+        db = Session(engine)
+        return drain(export_reports(db, db.query(WebReport), WebReport, WebReportSchema, export_format, gzip))
+
+    for rows in args.rows:
+        engine = open_database(args)
+        run_migrations(engine)
+        populate(engine, rows, args.users)
+        print(f"{rows:,} web reports")
+        _, elapsed, peak = profile(lambda: paged(engine))
+        print(f"  list pages of 1000: {elapsed * 1000:,.0f}ms, peak {peak / 2**20:,.1f} MiB")
+        for export_format in args.formats:
+            for gzip in (False, True):
+                size, elapsed, peak = profile(lambda: streamed(engine, export_format, gzip))
+                print(f"  export {export_format}{' gzip' if gzip else ''}: {elapsed * 1000:,.0f}ms, "
+                      f"peak {peak / 2**20:,.1f} MiB, {size / 2**20:,.1f} MiB sent")
+        close_database(args, engine)
+
+def main():
+    parser = argparse.ArgumentParser(description='Report database benchmarks')
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--database-url', help='Empty database to use (default: temporary SQLite file)')
+    subparsers = parser.add_subparsers(dest='benchmark', required=True)
+
+    indexes = subparsers.add_parser('indexes', help='Query plans before and after the index migrations')
+    indexes.add_argument('--rows', type=int, default=100000, help='Rows per report table')
+    indexes.add_argument('--repeat', type=int, default=5, help='Timed runs per query (median is reported)')
+    indexes.set_defaults(func=bench_indexes)
+
+    stats = subparsers.add_parser('stats', help='Stats endpoints against the Python loops they replaced')
+    stats.add_argument('--rows', type=int, default=1000000, help='Rows per report table')
+    stats.add_argument('--days', type=int, default=30, help='Stats window; all rows fall inside it')
+    stats.set_defaults(func=bench_stats)
+
+    rollups = subparsers.add_parser('rollups', help='Rollup-backed stats latency as the report tables grow')
+    rollups.add_argument('--rows', type=int, nargs='+', default=[100000, 1000000], help='Rows per report table')
+    rollups.add_argument('--days', type=int, default=30, help='Stats window; all rows fall inside it')
+    rollups.add_argument('--domains', type=int, default=100, help='Distinct domains in the web reports')
+    rollups.add_argument('--repeat', type=int, default=5, help='Timed runs per query (median is reported)')
+    rollups.set_defaults(func=bench_rollups)
+
+    pages = subparsers.add_parser('pages', help='Offset against cursor pagination of the report lists')
+    pages.add_argument('--rows', type=int, default=1000000, help='Rows per report table')
+    pages.add_argument('--limit', type=int, default=100, help='Page size')
+    pages.add_argument('--repeat', type=int, default=5, help='Timed runs per page (median is reported)')
+    pages.set_defaults(func=bench_pages)
+
+    export = subparsers.add_parser('export', help='Streamed export memory and time against paging the list endpoint')
+    export.add_argument('--rows', type=int, nargs='+', default=[10000, 100000], help='Rows per report table')
+    export.add_argument('--formats', nargs='+', default=['ndjson', 'csv'], choices=['ndjson', 'csv', 'parquet'])
+    export.set_defaults(func=bench_export)
+
+    args = parser.parse_args()
+    args.func(args)
+
+if __name__ == "__main__":
+    main()
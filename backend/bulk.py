@@ -0,0 +1,163 @@
+"""
+Bulk ingest and report deduplication helpers shared by the report routers
+"""
+
+import json
+import hashlib
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Type
+from fastapi import HTTPException, status
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+from config import settings
+from database import UPSERT_DIALECTS
+from rollups import record_reports
+from schemas import BulkCreateResponse, BulkItemError
+
+# Columns that make two reports the same observation; repeats within a dedupe bucket share one row
+DEDUPE_FIELDS = {
+    "web_reports": ("user_id", "domain", "port", "category", "connection_type", "event"),
+    "network_reports": ("user_id", "host", "port", "status", "is_open"),
+}
+
+def _format_validation_error(error: ValidationError) -> str:
+    """Flatten a pydantic validation error into a single line"""
+    return "; ".join(
+        f"{'.'.join(str(part) for part in err['loc']) or 'item'}: {err['msg']}"
+        for err in error.errors()
+    )
+
+def _dedupe_enabled(db: Session, model) -> bool:
+    return (
+        settings.REPORT_DEDUPE_BUCKET_SECONDS > 0
+        and model.__tablename__ in DEDUPE_FIELDS
+        and db.get_bind().dialect.name in UPSERT_DIALECTS
+    )
+
+def _dedupe_key(model, row: Dict[str, Any], bucket: int) -> str:
+    identity = [row.get(field) for field in DEDUPE_FIELDS[model.__tablename__]]
+    return hashlib.sha1(json.dumps([*identity, bucket], default=str).encode()).hexdigest()
+
+def prepare_rows(db: Session, model, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Stamp rows with created_at and first/last seen and, in dedupe mode, fold repeats within the batch"""
+    # Stamped here in UTC rather than by the database, so rollups bucket each report on the time stored with it
+    now = datetime.now(timezone.utc)
+    rows = [{**row, "created_at": now} for row in rows]
+    if model.__tablename__ not in DEDUPE_FIELDS:
+        return rows
+
+    if not _dedupe_enabled(db, model):
+        return [{**row, "first_seen": now, "last_seen": now, "hit_count": 1} for row in rows]
+
+    bucket = int(now.timestamp()) // settings.REPORT_DEDUPE_BUCKET_SECONDS
+    folded = {}
+    for row in rows:
+        key = _dedupe_key(model, row, bucket)
+        existing = folded.get(key)
+        if existing is None:
+            folded[key] = {**row, "first_seen": now, "last_seen": now, "hit_count": 1, "dedupe_key": key}
+        else:
+            # PostgreSQL refuses to update the same row twice in one statement, so repeats are merged here first
+            existing.update(row)
+            existing["hit_count"] += 1
+    return list(folded.values())
+
+def write_rows(db: Session, model, rows: List[Dict[str, Any]]) -> int:
+    """Insert prepared rows in one statement, upserting on dedupe_key when rows carry one; returns new rows"""
+    if not rows:
+        return 0
+    if "dedupe_key" not in rows[0]:
+        record_reports(db, model, rows)
+        # Through the Table, since context-sensitive column defaults fail on ORM-entity multi-row inserts
+        db.execute(insert(model.__table__).values(rows))
+        return len(rows)
+
+    # Upsert row counts differ by dialect, so look up the rows that will be updated rather than inserted
+    existing = dict(db.execute(
+        select(model.dedupe_key, model.created_at).where(model.dedupe_key.in_([row["dedupe_key"] for row in rows]))
+    ).all())
+    # Repeats count in the bucket of the row they fold into, which is where deleting that row uncounts them
+    record_reports(db, model, [
+        {**row, "created_at": existing[row["dedupe_key"]]} if row["dedupe_key"] in existing else row
+        for row in rows
+    ])
+
+    dialect = db.get_bind().dialect.name
+    stmt = UPSERT_DIALECTS[dialect](model).values(rows)
+    incoming = stmt.inserted if dialect == "mysql" else stmt.excluded
+    # Keep the identity, created_at and first_seen of the existing row; take everything else from the latest report
+    kept = set(DEDUPE_FIELDS[model.__tablename__]) | {"dedupe_key", "created_at", "first_seen", "hit_count"}
+    updates = {column: incoming[column] for column in rows[0] if column not in kept}
+    updates["hit_count"] = model.hit_count + incoming.hit_count
+    if dialect == "mysql":
+        db.execute(stmt.on_duplicate_key_update(**updates))
+    else:
+        db.execute(stmt.on_conflict_do_update(index_elements=[model.dedupe_key], set_=updates))
+    return len(rows) - len(existing)
+
+def ingest_report(db: Session, model, report: BaseModel, user_id: int):
+    """Store a single report, folding it into an existing row in dedupe mode, and return the row"""
+    rows = prepare_rows(db, model, [{"user_id": user_id, **report.dict()}])
+    if "dedupe_key" not in rows[0]:
+        db_report = model(**rows[0])
+        db.add(db_report)
+        record_reports(db, model, rows)
+        db.flush()
+        # Detached before commit so returning it does not reload the row that was just written
+        db.expunge(db_report)
+        db.commit()
+        return db_report
+
+    write_rows(db, model, rows)
+    db.commit()
+    return db.query(model).filter(model.dedupe_key == rows[0]["dedupe_key"]).one()
+
+def bulk_insert_reports(
+    db: Session,
+    model,
+    create_schema: Type[BaseModel],
+    items: List[Any],
+    user_id: int
+) -> BulkCreateResponse:
+    """Validate items one by one and insert the valid ones in a single multi-row statement
+
+    created counts new rows; in dedupe mode, valid items that only added a hit to a row are counted as folded.
+    """
+    if len(items) > settings.BULK_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Bulk requests are limited to {settings.BULK_MAX_ITEMS} items"
+        )
+
+    rows = []
+    errors = []
+    created = 0
+    for index, item in enumerate(items):
+        try:
+            report = create_schema.model_validate(item)
+        except ValidationError as e:
+            errors.append(BulkItemError(index=index, error=_format_validation_error(e)))
+            continue
+        rows.append({"user_id": user_id, **report.dict()})
+
+    if rows:
+        try:
+            # One INSERT ... VALUES (...), (...) statement, one transaction
+            created = write_rows(db, model, prepare_rows(db, model, rows))
+            db.commit()
+        except SQLAlchemyError:
+            db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Bulk insert failed"
+            )
+
+    return BulkCreateResponse(
+        received=len(items),
+        created=created,
+        folded=len(rows) - created,
+        failed=len(errors),
+        errors=errors
+    )
@@ -19,6 +19,17 @@ class Settings:
     # API
     API_V1_STR = "/api/v1"
     PROJECT_NAME = "Security Monitor API"
+    BULK_MAX_ITEMS = int(os.getenv("BULK_MAX_ITEMS", "1000"))
+    # Seconds an authenticated token's user (id, is_active, is_admin) is reused without a lookup (0 disables);
+    # user changes invalidate it in this process, other workers see them after at most this long
+    USER_CACHE_SECONDS = int(os.getenv("USER_CACHE_SECONDS", "60"))
+    # Seconds a list endpoint's total count is reused for the same filters (0 counts every page)
+    REPORT_COUNT_CACHE_SECONDS = int(os.getenv("REPORT_COUNT_CACHE_SECONDS", "30"))
+    # Fold identical web/network reports received within this many seconds into one row (0 disables)
+    REPORT_DEDUPE_BUCKET_SECONDS = int(os.getenv("REPORT_DEDUPE_BUCKET_SECONDS", "0"))
+    # Stats rollups: days of hourly count buckets, so windows up to a month start on the hour
+    ROLLUP_HOUR_RETENTION_DAYS = int(os.getenv("ROLLUP_HOUR_RETENTION_DAYS", "31"))
+    ROLLUP_COMPACTION_INTERVAL_SECONDS = int(os.getenv("ROLLUP_COMPACTION_INTERVAL_SECONDS", "300"))
     
     # CORS
     BACKEND_CORS_ORIGINS = [
@@ -6,16 +6,17 @@ import os
 from sqlalchemy.orm import Session
 from dotenv import load_dotenv
 from database import SessionLocal, engine
-from models import User, Base
+from models import User
 from auth import get_password_hash
+from migrations import run_migrations
 
 # Load environment variables from .env file
 load_dotenv()
 
 def create_admin_user():
     """Create the first admin user"""
-    # Create tables
-    Base.metadata.create_all(bind=engine)
+    # Create tables and apply pending schema migrations
+    run_migrations(engine)
     
     # Create database session
     db = SessionLocal()
@@ -3,6 +3,7 @@ Database configuration and session management
 """
 
 from sqlalchemy import create_engine
+from sqlalchemy.dialects import mysql, postgresql, sqlite
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from dotenv import load_dotenv
@@ -23,6 +24,13 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 # Create base class for models
 Base = declarative_base()
 
+# Dialects with INSERT ... ON CONFLICT DO UPDATE, or ON DUPLICATE KEY UPDATE for MySQL
+UPSERT_DIALECTS = {
+    "sqlite": sqlite.insert,
+    "postgresql": postgresql.insert,
+    "mysql": mysql.insert,
+}
+
 def get_db():
     """Dependency to get database session"""
     db = SessionLocal()
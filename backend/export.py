@@ -0,0 +1,163 @@
+"""
+Streaming report export as NDJSON, CSV or Parquet, optionally gzipped on the fly
+"""
+
+import io
+import csv
+import json
+import zlib
+from datetime import datetime
+from typing import Any, Iterable, Iterator, List, Sequence, Type
+from fastapi import HTTPException, status
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from sqlalchemy import Boolean, DateTime, Float, Integer
+from sqlalchemy.orm import Query, Session
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # Parquet export is optional
+    pyarrow = None
+
+# Format -> (file extension, media type)
+EXPORT_FORMATS = {
+    "ndjson": ("ndjson", "application/x-ndjson"),
+    "csv": ("csv", "text/csv"),
+    "parquet": ("parquet", "application/vnd.apache.parquet"),
+}
+
+EXPORT_BATCH_SIZE = 1000  # rows fetched from the server-side cursor and encoded per chunk
+
+def _json_value(value: Any) -> Any:
+    return value.isoformat() if isinstance(value, datetime) else value
+
+def _ndjson(batches: Iterable[Sequence[Any]], fields: List[str]) -> Iterator[bytes]:
+    for rows in batches:
+        yield "".join(
+            json.dumps({field: _json_value(value) for field, value in zip(fields, row)}) + "\n"
+            for row in rows
+        ).encode()
+
+def _csv(batches: Iterable[Sequence[Any]], fields: List[str]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(fields)
+    for rows in batches:
+        writer.writerows([_json_value(value) for value in row] for row in rows)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+class _ChunkSink:
+    """Write-only file that hands what the Parquet writer wrote back to the response"""
+
+    def __init__(self):
+        self.closed = False
+        self._chunks = []
+        self._position = 0
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+def _arrow_schema(model, fields: List[str]):
+    def arrow_type(column_type):
+        if isinstance(column_type, Boolean):
+            return pyarrow.bool_()
+        if isinstance(column_type, Integer):
+            return pyarrow.int64()
+        if isinstance(column_type, Float):
+            return pyarrow.float64()
+        if isinstance(column_type, DateTime):
+            return pyarrow.timestamp("us")
+        return pyarrow.string()
+    return pyarrow.schema([(field, arrow_type(model.__table__.c[field].type)) for field in fields])
+
+def _parquet(batches: Iterable[Sequence[Any]], fields: List[str], model) -> Iterator[bytes]:
+    schema = _arrow_schema(model, fields)
+    sink = _ChunkSink()
+    writer = pyarrow.parquet.ParquetWriter(sink, schema)
+    try:
+        # One row group per batch, sent as soon as it is written
+        for rows in batches:
+            columns = list(zip(*rows))
+            writer.write_table(pyarrow.Table.from_arrays(
+                [pyarrow.array(column, type=schema.field(i).type) for i, column in enumerate(columns)],
+                schema=schema
+            ))
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+def _gzip(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    compressor = zlib.compressobj(wbits=31)  # gzip container
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+def export_reports(
+    db: Session,
+    query: Query,
+    model,
+    schema: Type[BaseModel],
+    export_format: str,
+    gzip: bool = False
+) -> StreamingResponse:
+    """Stream the query's reports in id order, reading them through a server-side cursor"""
+    if export_format == "parquet" and pyarrow is None:
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail="Parquet export requires pyarrow"
+        )
+
+    # The response schema's fields, read as plain column tuples rather than ORM objects
+    fields = list(schema.model_fields)
+    statement = query.with_entities(*(model.__table__.c[field] for field in fields)).order_by(model.id).statement
+
+    def batches() -> Iterator[Sequence[Any]]:
+        try:
+            result = db.execute(statement, execution_options={"yield_per": EXPORT_BATCH_SIZE})
+            yield from result.partitions()
+        finally:
+            db.close()
+
+    if export_format == "parquet":
+        chunks = _parquet(batches(), fields, model)
+    elif export_format == "csv":
+        chunks = _csv(batches(), fields)
+    else:
+        chunks = _ndjson(batches(), fields)
+
+    extension, media_type = EXPORT_FORMATS[export_format]
+    filename = f"{model.__tablename__}.{extension}"
+    if gzip:
+        chunks = _gzip(chunks)
+        filename += ".gz"
+        media_type = "application/gzip"
+
+    return StreamingResponse(
+        chunks,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
@@ -6,10 +6,11 @@ Generate sample monitoring data for testing the dashboard
 import os
 import sys
 import random
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from sqlalchemy.orm import Session
 from database import get_db, engine
 from models import User, NetworkReport, MalwareReport, WebReport
+from rollups import record_report
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 
@@ -39,9 +40,10 @@ def generate_sample_data():
                 is_open=random.choice([True, False]),
                 status="completed",
                 scan_duration=random.uniform(0.1, 2.0),
-                created_at=datetime.now() - timedelta(days=random.randint(0, 7), hours=random.randint(0, 23))
+                created_at=datetime.now(timezone.utc) - timedelta(days=random.randint(0, 7), hours=random.randint(0, 23))
             )
             db.add(report)
+            record_report(db, report)
         
         # Generate sample malware reports
         print("Generating malware reports...")
@@ -67,9 +69,10 @@ def generate_sample_data():
                 malware_detected=suspicious_score > 6,
                 indicators=[random.choice(suspicious_keywords) for _ in range(random.randint(0, 3))],
                 status="analyzed",
-                created_at=datetime.now() - timedelta(days=random.randint(0, 7), hours=random.randint(0, 23))
+                created_at=datetime.now(timezone.utc) - timedelta(days=random.randint(0, 7), hours=random.randint(0, 23))
             )
             db.add(report)
+            record_report(db, report)
         
         # Generate sample web reports
         print("Generating web reports...")
@@ -97,9 +100,10 @@ def generate_sample_data():
                 is_blocked=suspicious_score > 7,
                 is_whitelisted=domain in ['google.com', 'github.com', 'stackoverflow.com'],
                 category=random.choice(['social', 'shopping', 'news', 'entertainment', 'technology', 'suspicious']),
-                created_at=datetime.now() - timedelta(days=random.randint(0, 7), hours=random.randint(0, 23))
+                created_at=datetime.now(timezone.utc) - timedelta(days=random.randint(0, 7), hours=random.randint(0, 23))
             )
             db.add(report)
+            record_report(db, report)
         
         # Commit all changes
         db.commit()
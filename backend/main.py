@@ -5,15 +5,17 @@ FastAPI main application
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
-from database import engine, Base
+from database import engine
 from config import settings
+from migrations import run_migrations
+from rollups import start_compaction
 from routers import auth, users, malware, web, network
 
 # Load environment variables from .env file
 load_dotenv()
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
+# Create database tables and apply pending schema migrations
+run_migrations(engine)
 
 # Create FastAPI app
 app = FastAPI(
@@ -38,6 +40,15 @@ app.include_router(malware.router, prefix=settings.API_V1_STR)
 app.include_router(web.router, prefix=settings.API_V1_STR)
 app.include_router(network.router, prefix=settings.API_V1_STR)
 
+@app.on_event("startup")
+def start_rollup_compaction():
+    app.state.rollup_compaction = start_compaction(settings.ROLLUP_COMPACTION_INTERVAL_SECONDS)
+
+@app.on_event("shutdown")
+def stop_rollup_compaction():
+    if app.state.rollup_compaction is not None:
+        app.state.rollup_compaction.set()
+
 @app.get("/")
 def root():
     return {"message": "Security Monitor API", "version": "1.0.0"}
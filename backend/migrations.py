@@ -0,0 +1,150 @@
+"""
+Schema migrations applied at startup
+"""
+
+import logging
+from datetime import datetime, timezone
+from typing import Callable, List, Tuple
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, bindparam, inspect, select, update
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session
+from database import Base
+from models import (
+    MalwareReport, WebReport, NetworkReport,
+    MalwareRollup, WebRollup, NetworkRollup,
+    file_extension
+)
+from rollups import rebuild_rollups
+
+logger = logging.getLogger(__name__)
+
+# Applied versions; the table lives outside Base so create_all never has to know about it
+schema_migrations = Table(
+    "schema_migrations",
+    MetaData(),
+    Column("version", Integer, primary_key=True),
+    Column("description", String(255), nullable=False),
+    Column("applied_at", DateTime(timezone=True), nullable=False),
+)
+
+def _fill_defaults(conn: Connection, model, names: List[str]):
+    """Set NULLs in columns with a scalar model default to that default, as if the rows were inserted today"""
+    for name in names:
+        column = model.__table__.c[name]
+        if column.default is not None and column.default.is_scalar:
+            conn.execute(update(model.__table__).where(column.is_(None)).values({name: column.default.arg}))
+
+def _add_columns(op: Operations, conn: Connection, model, names: List[str]):
+    """Add model columns missing from an existing table, as nullable columns, and fill their defaults"""
+    table = model.__tablename__
+    existing = {column["name"] for column in inspect(conn).get_columns(table)}
+    for name in names:
+        if name not in existing:
+            op.add_column(table, Column(name, model.__table__.c[name].type, nullable=True))
+    _fill_defaults(conn, model, names)
+
+def _create_indexes(op: Operations, conn: Connection, model, names: List[str]):
+    """Create model indexes missing from an existing table"""
+    table = model.__tablename__
+    existing = {index["name"] for index in inspect(conn).get_indexes(table)}
+    for index in model.__table__.indexes:
+        if index.name in names and index.name not in existing:
+            op.create_index(index.name, table, [column.name for column in index.columns], unique=index.unique)
+
+def _web_lifecycle_columns(op: Operations, conn: Connection):
+    # Rows stored before lifecycle reporting each stood for one connection (the connection_count default)
+    _add_columns(op, conn, WebReport, ["event", "duration", "bytes_sent", "bytes_received", "connection_count"])
+
+def _report_dedupe_columns(op: Operations, conn: Connection):
+    for model in (WebReport, NetworkReport):
+        _add_columns(op, conn, model, ["first_seen", "last_seen", "hit_count", "dedupe_key"])
+        # SQLite cannot add a UNIQUE column, so uniqueness comes from the index
+        _create_indexes(op, conn, model, [f"ix_{model.__tablename__}_dedupe_key"])
+        _fill_first_last_seen(conn, model)
+
+def _fill_first_last_seen(conn: Connection, model):
+    conn.execute(update(model).where(model.first_seen.is_(None)).values(first_seen=model.created_at))
+    conn.execute(update(model).where(model.last_seen.is_(None)).values(last_seen=model.created_at))
+
+def _report_query_indexes(op: Operations, conn: Connection):
+    for model in (MalwareReport, WebReport, NetworkReport):
+        _create_indexes(op, conn, model, [f"ix_{model.__tablename__}_user_id_created_at",
+                                          f"ix_{model.__tablename__}_created_at"])
+    _create_indexes(op, conn, MalwareReport, ["ix_malware_reports_file_hash_sha256"])
+    _create_indexes(op, conn, WebReport, ["ix_web_reports_domain_created_at"])
+    _create_indexes(op, conn, NetworkReport, ["ix_network_reports_port_created_at"])
+
+def _malware_file_extension(op: Operations, conn: Connection):
+    _add_columns(op, conn, MalwareReport, ["file_extension"])
+    _create_indexes(op, conn, MalwareReport, ["ix_malware_reports_file_extension_created_at"])
+    # Extension parsing differs across SQL dialects, so existing rows are backfilled from Python in batches
+    statement = (update(MalwareReport.__table__)
+                 .where(MalwareReport.__table__.c.id == bindparam("row_id"))
+                 .values(file_extension=bindparam("extension")))
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            select(MalwareReport.id, MalwareReport.file_name)
+            .where(MalwareReport.id > last_id, MalwareReport.file_extension.is_(None))
+            .order_by(MalwareReport.id)
+            .limit(10000)
+        ).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+        updates = [{"row_id": row.id, "extension": file_extension(row.file_name)} for row in rows if row.file_name]
+        if updates:
+            conn.execute(statement, updates)
+
+def _report_rollups(op: Operations, conn: Connection):
+    # The rollup tables come from create_all; count the reports stored before they existed
+    with Session(bind=conn) as db:
+        rebuild_rollups(db)
+
+def _backfill_added_columns(op: Operations, conn: Connection):
+    # Databases upgraded before migrations 1 and 2 filled their columns still hold NULLs there
+    _fill_defaults(conn, WebReport, ["connection_count", "hit_count"])
+    _fill_defaults(conn, NetworkReport, ["hit_count"])
+    for model in (WebReport, NetworkReport):
+        _fill_first_last_seen(conn, model)
+
+def _split_rollups(op: Operations, conn: Connection):
+    # Counts rollups dropped their domain, file extension and port dimensions for separate daily rollups
+    for rollup in (MalwareRollup, WebRollup, NetworkRollup):
+        existing = {column["name"] for column in inspect(conn).get_columns(rollup.__tablename__)}
+        if existing != set(rollup.__table__.c.keys()):
+            op.drop_table(rollup.__tablename__)
+            rollup.__table__.create(bind=conn)
+    # Recount everything, since earlier buckets were on local time rather than UTC
+    with Session(bind=conn) as db:
+        rebuild_rollups(db)
+
+# Ordered, append-only; each step must tolerate a schema that create_all already brought up to date
+MIGRATIONS: List[Tuple[int, str, Callable[[Operations, Connection], None]]] = [
+    (1, "Connection lifecycle columns on web_reports", _web_lifecycle_columns),
+    (2, "first_seen/last_seen/hit_count/dedupe_key on web and network reports", _report_dedupe_columns),
+    (3, "Composite indexes for report list and stats queries", _report_query_indexes),
+    (4, "Stored, indexed file_extension on malware_reports", _malware_file_extension),
+    (5, "Backfill per-minute, per-hour and per-day report rollups", _report_rollups),
+    (6, "Fill NULLs left in columns added by migrations 1 and 2", _backfill_added_columns),
+    (7, "Hourly counts rollups and daily top-list rollups, on UTC", _split_rollups),
+]
+
+def run_migrations(engine: Engine):
+    """Create missing tables, then apply pending migrations in order, one transaction each"""
+    Base.metadata.create_all(bind=engine)
+    schema_migrations.create(bind=engine, checkfirst=True)
+
+    with engine.connect() as conn:
+        applied = set(conn.execute(select(schema_migrations.c.version)).scalars())
+
+    for version, description, upgrade in MIGRATIONS:
+        if version in applied:
+            continue
+        with engine.begin() as conn:
+            upgrade(Operations(MigrationContext.configure(conn)), conn)
+            conn.execute(schema_migrations.insert().values(
+                version=version, description=description, applied_at=datetime.now(timezone.utc)))
+        logger.info(f"Applied schema migration {version}: {description}")
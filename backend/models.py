@@ -2,11 +2,20 @@
 Database models for Security Monitor API
 """
 
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text, Float, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text, Float, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from database import Base
 
+def file_extension(file_name):
+    """Lowercased extension used by the malware file type stats; None for an empty name"""
+    if not file_name:
+        return None
+    return file_name.split('.')[-1].lower() if '.' in file_name else 'no_extension'
+
+def _file_extension_default(context):
+    return file_extension(context.get_current_parameters().get("file_name"))
+
 class User(Base):
     __tablename__ = "users"
     
@@ -35,6 +44,7 @@ class MalwareReport(Base):
     file_size = Column(Integer)
     file_hash_md5 = Column(String(32))
     file_hash_sha256 = Column(String(64))
+    file_extension = Column(String(255), default=_file_extension_default)  # derived from file_name on insert
     suspicious_score = Column(Integer, default=0)
     malware_detected = Column(Boolean, default=False)
     indicators = Column(Text)  # JSON string of indicators
@@ -45,6 +55,15 @@ class MalwareReport(Base):
     
     # Relationships
     user = relationship("User", back_populates="malware_reports")
+    
+    __table_args__ = (
+        Index("ix_malware_reports_user_id_created_at", "user_id", "created_at"),
+        Index("ix_malware_reports_created_at", "created_at"),
+        Index("ix_malware_reports_file_hash_sha256", "file_hash_sha256"),
+        Index("ix_malware_reports_file_extension_created_at", "file_extension", "created_at"),
+    )
+    # Read server defaults back with the INSERT (RETURNING where supported) so new reports need no reload
+    __mapper_args__ = {"eager_defaults": True}
 
 class WebReport(Base):
     __tablename__ = "web_reports"
@@ -60,12 +79,29 @@ class WebReport(Base):
     category = Column(String(50))  # allowed, blocked, suspicious, normal
     indicators = Column(Text)  # JSON string of indicators
     connection_type = Column(String(50))  # dns_query, browser_connection, network_connection
+    event = Column(String(20))  # opened, closed, heartbeat
+    duration = Column(Float)  # seconds the connection was observed open
+    bytes_sent = Column(Integer)
+    bytes_received = Column(Integer)
+    connection_count = Column(Integer, default=1)  # open connections summarized by a heartbeat
     is_blocked = Column(Boolean, default=False)
     is_whitelisted = Column(Boolean, default=False)
+    first_seen = Column(DateTime(timezone=True))
+    last_seen = Column(DateTime(timezone=True))
+    hit_count = Column(Integer, default=1)  # identical reports folded into this row
+    dedupe_key = Column(String(40), unique=True, index=True)  # identity and time bucket; NULL when dedupe is off
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
     # Relationships
     user = relationship("User", back_populates="web_reports")
+    
+    __table_args__ = (
+        Index("ix_web_reports_user_id_created_at", "user_id", "created_at"),
+        Index("ix_web_reports_created_at", "created_at"),
+        Index("ix_web_reports_domain_created_at", "domain", "created_at"),
+    )
+    # Read server defaults back with the INSERT (RETURNING where supported) so new reports need no reload
+    __mapper_args__ = {"eager_defaults": True}
 
 class NetworkReport(Base):
     __tablename__ = "network_reports"
@@ -83,10 +119,22 @@ class NetworkReport(Base):
     process_pid = Column(Integer)
     status = Column(String(50), default="scanned")  # scanned, open, closed, filtered
     scan_duration = Column(Float)  # seconds
+    first_seen = Column(DateTime(timezone=True))
+    last_seen = Column(DateTime(timezone=True))
+    hit_count = Column(Integer, default=1)  # identical reports folded into this row
+    dedupe_key = Column(String(40), unique=True, index=True)  # identity and time bucket; NULL when dedupe is off
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
     # Relationships
     user = relationship("User", back_populates="network_reports")
+    
+    __table_args__ = (
+        Index("ix_network_reports_user_id_created_at", "user_id", "created_at"),
+        Index("ix_network_reports_created_at", "created_at"),
+        Index("ix_network_reports_port_created_at", "port", "created_at"),
+    )
+    # Read server defaults back with the INSERT (RETURNING where supported) so new reports need no reload
+    __mapper_args__ = {"eager_defaults": True}
 
 class SystemStats(Base):
     __tablename__ = "system_stats"
@@ -100,3 +148,98 @@ class SystemStats(Base):
     system_uptime = Column(Float)  # seconds
     last_scan_time = Column(DateTime(timezone=True))
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class MalwareRollup(Base):
+    __tablename__ = "malware_rollups"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    resolution = Column(Integer, nullable=False)  # bucket length in seconds: 3600 (recent days only) or 86400
+    bucket_start = Column(DateTime, nullable=False)  # UTC
+    user_id = Column(Integer, ForeignKey("users.id"))
+    hits = Column(Integer, nullable=False, default=0)  # reports in the bucket
+    detected_hits = Column(Integer, nullable=False, default=0)  # reports with malware_detected
+    high_risk_hits = Column(Integer, nullable=False, default=0)  # reports with a suspicious_score of 5 or more
+    rollup_key = Column(String(40), unique=True, index=True)  # hash of resolution, bucket and dimensions
+    
+    __table_args__ = (
+        Index("ix_malware_rollups_resolution_bucket_start", "resolution", "bucket_start"),
+    )
+
+class MalwareExtensionRollup(Base):
+    __tablename__ = "malware_extension_rollups"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    bucket_start = Column(DateTime, nullable=False)  # UTC day
+    user_id = Column(Integer, ForeignKey("users.id"))
+    file_extension = Column(String(255))
+    hits = Column(Integer, nullable=False, default=0)  # reports in the bucket
+    rollup_key = Column(String(40), unique=True, index=True)  # hash of bucket and dimensions
+    
+    __table_args__ = (
+        Index("ix_malware_extension_rollups_bucket_start", "bucket_start"),
+    )
+
+class WebRollup(Base):
+    __tablename__ = "web_rollups"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    resolution = Column(Integer, nullable=False)  # bucket length in seconds: 3600 (recent days only) or 86400
+    bucket_start = Column(DateTime, nullable=False)  # UTC
+    user_id = Column(Integer, ForeignKey("users.id"))
+    category = Column(String(50), nullable=False)  # "unknown" when the report had none
+    hits = Column(Integer, nullable=False, default=0)  # reports in the bucket, folded repeats included
+    blocked_hits = Column(Integer, nullable=False, default=0)
+    suspicious_hits = Column(Integer, nullable=False, default=0)  # suspicious_score of 5 or more
+    whitelisted_hits = Column(Integer, nullable=False, default=0)
+    rollup_key = Column(String(40), unique=True, index=True)  # hash of resolution, bucket and dimensions
+    
+    __table_args__ = (
+        Index("ix_web_rollups_resolution_bucket_start", "resolution", "bucket_start"),
+    )
+
+class WebDomainRollup(Base):
+    __tablename__ = "web_domain_rollups"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    bucket_start = Column(DateTime, nullable=False)  # UTC day
+    user_id = Column(Integer, ForeignKey("users.id"))
+    domain = Column(String(255), nullable=False)
+    hits = Column(Integer, nullable=False, default=0)  # reports in the bucket, folded repeats included
+    blocked_hits = Column(Integer, nullable=False, default=0)
+    suspicious_hits = Column(Integer, nullable=False, default=0)  # suspicious_score of 5 or more
+    last_seen = Column(DateTime)  # UTC
+    rollup_key = Column(String(40), unique=True, index=True)  # hash of bucket and dimensions
+    
+    __table_args__ = (
+        Index("ix_web_domain_rollups_bucket_start", "bucket_start"),
+    )
+
+class NetworkRollup(Base):
+    __tablename__ = "network_rollups"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    resolution = Column(Integer, nullable=False)  # bucket length in seconds: 3600 (recent days only) or 86400
+    bucket_start = Column(DateTime, nullable=False)  # UTC
+    user_id = Column(Integer, ForeignKey("users.id"))
+    hits = Column(Integer, nullable=False, default=0)  # scans in the bucket, folded repeats included
+    open_hits = Column(Integer, nullable=False, default=0)
+    closed_hits = Column(Integer, nullable=False, default=0)
+    rollup_key = Column(String(40), unique=True, index=True)  # hash of resolution, bucket and dimensions
+    
+    __table_args__ = (
+        Index("ix_network_rollups_resolution_bucket_start", "resolution", "bucket_start"),
+    )
+
+class NetworkPortRollup(Base):
+    __tablename__ = "network_port_rollups"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    bucket_start = Column(DateTime, nullable=False)  # UTC day
+    user_id = Column(Integer, ForeignKey("users.id"))
+    port = Column(Integer, nullable=False)
+    hits = Column(Integer, nullable=False, default=0)  # scans in the bucket, folded repeats included
+    rollup_key = Column(String(40), unique=True, index=True)  # hash of bucket and dimensions
+    
+    __table_args__ = (
+        Index("ix_network_port_rollups_bucket_start", "bucket_start"),
+    )
@@ -0,0 +1,100 @@
+"""
+Offset and keyset (cursor) pagination shared by the report list endpoints
+"""
+
+import json
+import base64
+import binascii
+from datetime import datetime
+from typing import Optional, Tuple, Type
+from fastapi import HTTPException, status
+from pydantic import BaseModel
+from sqlalchemy import String, and_, cast, literal, or_
+from sqlalchemy.orm import Query
+from cache import TTLCache
+from config import settings
+from schemas import PaginatedResponse
+
+# Totals for recently listed filters, so paging through a result set counts it once
+_counts = TTLCache(max_size=1024, ttl=settings.REPORT_COUNT_CACHE_SECONDS)
+
+def encode_cursor(created_at: str, report_id: int) -> str:
+    payload = json.dumps([created_at, report_id]).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[str, int]:
+    try:
+        created_at, report_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        # Re-encode as stored; whole-second timestamps carry no fraction, so keep one only if the cursor has it
+        timespec = "microseconds" if "." in created_at else "seconds"
+        return datetime.fromisoformat(created_at).isoformat(sep=" ", timespec=timespec), int(report_id)
+    except (ValueError, TypeError, binascii.Error):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+def count_rows(query: Query) -> int:
+    """Count the query's rows, reusing a count taken for the same filters in the last few seconds"""
+    compiled = query.statement.compile()
+    key = (str(compiled), tuple(sorted(compiled.params.items())))
+    try:
+        return _counts.get(key)
+    except KeyError:
+        total = query.count()
+        _counts.put(key, total)
+        return total
+
+def paginate(
+    query: Query,
+    model,
+    schema: Type[BaseModel],
+    skip: int,
+    limit: int,
+    cursor: Optional[str] = None,
+    include_total: bool = True
+) -> PaginatedResponse:
+    """Page newest-first by offset, or by (created_at, id) keyset when a cursor is given ("" for the first page)"""
+    total = count_rows(query) if include_total else None
+    pages = (total + limit - 1) // limit if total is not None else None
+
+    if cursor is None:
+        reports = query.order_by(model.created_at.desc()).offset(skip).limit(limit).all()
+        return PaginatedResponse(
+            items=[schema.from_orm(report) for report in reports],
+            total=total,
+            page=skip // limit + 1,
+            size=limit,
+            pages=pages
+        )
+
+    # The cursor carries created_at as stored, so whole-second SQLite timestamps still compare equal
+    stored_created_at = cast(model.created_at, String)
+    if cursor:
+        created_at, report_id = decode_cursor(cursor)
+        after = literal(created_at, String)
+        # The redundant created_at <= bound gives the index scan a starting point; OR alone scans from the top
+        query = query.filter(
+            model.created_at <= after,
+            or_(model.created_at < after, and_(model.created_at == after, model.id < report_id))
+        )
+
+    rows = (
+        query.add_columns(stored_created_at)
+        .order_by(model.created_at.desc(), model.id.desc())
+        .limit(limit + 1)
+        .all()
+    )
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last_report, last_created_at = rows[-1]
+        next_cursor = encode_cursor(str(last_created_at), last_report.id)
+
+    return PaginatedResponse(
+        items=[schema.from_orm(report) for report, _ in rows],
+        total=total,
+        size=limit,
+        pages=pages,
+        next_cursor=next_cursor
+    )
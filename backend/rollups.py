@@ -0,0 +1,289 @@
+"""
+Report rollups for the stats endpoints
+
+Each report type has a low-cardinality counts rollup (per user, plus category for web reports)
+and a daily rollup per domain, file extension or port for the top lists. Counts are kept per day,
+and per hour for recent days so a stats window can start mid-day; a background job prunes the
+hourly buckets once they fall out of retention. Rollups are updated in the same transaction as
+the reports they count.
+
+Every bucket is on UTC, the basis of the created_at that ingest stamps on reports.
+"""
+
+import json
+import hashlib
+import logging
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional
+from sqlalchemy import and_, case, delete, or_, select
+from sqlalchemy.orm import Session
+from config import settings
+from database import SessionLocal, UPSERT_DIALECTS
+from models import (
+    MalwareReport, WebReport, NetworkReport,
+    MalwareRollup, MalwareExtensionRollup,
+    WebRollup, WebDomainRollup,
+    NetworkRollup, NetworkPortRollup,
+    file_extension
+)
+
+logger = logging.getLogger(__name__)
+
+HOUR, DAY = 3600, 86400
+EPOCH = datetime(1970, 1, 1)
+
+# Stats treat suspicious_score values of 5 and up as suspicious or high risk
+SUSPICIOUS_SCORE = 5
+
+def _user(row) -> Dict[str, Any]:
+    return {"user_id": row.get("user_id")}
+
+def _web_category(row) -> Dict[str, Any]:
+    return {"user_id": row.get("user_id"), "category": row.get("category") or "unknown"}
+
+def _web_domain(row) -> Dict[str, Any]:
+    return {"user_id": row.get("user_id"), "domain": row.get("domain")}
+
+def _malware_extension(row) -> Dict[str, Any]:
+    return {"user_id": row.get("user_id"),
+            "file_extension": row.get("file_extension") or file_extension(row.get("file_name"))}
+
+def _network_port(row) -> Dict[str, Any]:
+    return {"user_id": row.get("user_id"), "port": row.get("port")}
+
+def _malware_measures(row, hits: int) -> Dict[str, Any]:
+    return {
+        "hits": hits,
+        "detected_hits": hits if row.get("malware_detected") else 0,
+        "high_risk_hits": hits if (row.get("suspicious_score") or 0) >= SUSPICIOUS_SCORE else 0,
+    }
+
+def _web_measures(row, hits: int) -> Dict[str, Any]:
+    return {
+        "hits": hits,
+        "blocked_hits": hits if row.get("is_blocked") else 0,
+        "suspicious_hits": hits if (row.get("suspicious_score") or 0) >= SUSPICIOUS_SCORE else 0,
+        "whitelisted_hits": hits if row.get("is_whitelisted") else 0,
+    }
+
+def _network_measures(row, hits: int) -> Dict[str, Any]:
+    return {
+        "hits": hits,
+        "open_hits": hits if row.get("is_open") is True else 0,
+        "closed_hits": hits if row.get("is_open") is False else 0,
+    }
+
+# Report model -> (measures of a report row, [(rollup model, dimensions of a report row)])
+ROLLUPS: Dict[Any, tuple] = {
+    MalwareReport: (_malware_measures, [(MalwareRollup, _user), (MalwareExtensionRollup, _malware_extension)]),
+    WebReport: (_web_measures, [(WebRollup, _web_category), (WebDomainRollup, _web_domain)]),
+    NetworkReport: (_network_measures, [(NetworkRollup, _user), (NetworkPortRollup, _network_port)]),
+}
+
+def _hourly(rollup) -> bool:
+    """Counts rollups also keep hourly buckets; the keyed top-list rollups are daily only"""
+    return "resolution" in rollup.__table__.c
+
+def _hit_columns(rollup) -> List[str]:
+    return [column.key for column in rollup.__table__.columns if column.key == "hits" or column.key.endswith("_hits")]
+
+def utcnow() -> datetime:
+    """Current time as naive UTC, the basis of report created_at and every rollup bucket"""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+def as_utc(moment: datetime) -> datetime:
+    """Naive UTC for a stored or stamped time; naive values are already UTC"""
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment
+
+def bucket_start(moment: datetime, resolution: int) -> datetime:
+    """Start of the UTC bucket holding moment"""
+    size = timedelta(seconds=resolution)
+    return EPOCH + (as_utc(moment) - EPOCH) // size * size
+
+def _hour_cutoff(now: datetime) -> datetime:
+    """First day that keeps hourly buckets"""
+    return bucket_start(now - timedelta(days=settings.ROLLUP_HOUR_RETENTION_DAYS), DAY)
+
+def _rollup_key(resolution: int, start: datetime, dimensions: Dict[str, Any]) -> str:
+    return hashlib.sha1(json.dumps([resolution, start, sorted(dimensions.items())], default=str).encode()).hexdigest()
+
+def _contributions(model, rows: Iterable[Any], sign: int, now: datetime) -> Dict[Any, List[Dict[str, Any]]]:
+    """Fold report rows into the buckets of each of the model's rollups"""
+    measures_of, rollups = ROLLUPS[model]
+    cutoff = _hour_cutoff(now)
+    targets = [(rollup, dimensions_of, _hit_columns(rollup), _hourly(rollup), "last_seen" in rollup.__table__.c)
+               for rollup, dimensions_of in rollups]
+    folded = {rollup: {} for rollup, _ in rollups}
+    for row in rows:
+        created_at = as_utc(row.get("created_at") or now)
+        seen = as_utc(row.get("last_seen") or created_at)
+        measures = measures_of(row, sign * (row.get("hit_count") or 1))
+        buckets = [(DAY, bucket_start(created_at, DAY))]
+        recent = buckets + [(HOUR, bucket_start(created_at, HOUR))] if created_at >= cutoff else buckets
+        for rollup, dimensions_of, hit_columns, hourly, has_last_seen in targets:
+            dimensions = dimensions_of(row)
+            identity = tuple(dimensions.values())
+            for resolution, start in (recent if hourly else buckets):
+                # Keyed on a tuple while folding; the stored rollup_key hash is computed once per bucket
+                entry = folded[rollup].get((resolution, start, identity))
+                if entry is None:
+                    entry = {"bucket_start": start, **dimensions,
+                             "rollup_key": _rollup_key(resolution, start, dimensions)}
+                    if hourly:
+                        entry["resolution"] = resolution
+                    entry.update((name, 0) for name in hit_columns)
+                    if has_last_seen:
+                        entry["last_seen"] = None
+                    folded[rollup][(resolution, start, identity)] = entry
+                for name in hit_columns:
+                    entry[name] += measures[name]
+                # Removing a report cannot tell whether it was the latest one, so last_seen only moves forward
+                if has_last_seen and sign > 0 and (entry["last_seen"] is None or seen > entry["last_seen"]):
+                    entry["last_seen"] = seen
+    return {rollup: list(entries.values()) for rollup, entries in folded.items()}
+
+def _upsert(db: Session, rollup, rows: List[Dict[str, Any]]):
+    """Add rows' hits to existing buckets, inserting the buckets that do not exist yet"""
+    if not rows:
+        return
+    hit_columns = _hit_columns(rollup)
+    has_last_seen = "last_seen" in rollup.__table__.c
+    dialect = db.get_bind().dialect.name
+    if dialect not in UPSERT_DIALECTS:
+        for row in rows:
+            existing = db.query(rollup).filter(rollup.rollup_key == row["rollup_key"]).first()
+            if existing is None:
+                db.add(rollup(**row))
+                continue
+            for name in hit_columns:
+                setattr(existing, name, getattr(existing, name) + row[name])
+            if has_last_seen and row["last_seen"] is not None and (
+                    existing.last_seen is None or row["last_seen"] > existing.last_seen):
+                existing.last_seen = row["last_seen"]
+        db.flush()
+        return
+
+    # One statement executed once per row, rather than a multi-row VALUES that is recompiled for every batch
+    stmt = UPSERT_DIALECTS[dialect](rollup.__table__)
+    incoming = stmt.inserted if dialect == "mysql" else stmt.excluded
+    table = rollup.__table__.c
+    updates = {name: table[name] + incoming[name] for name in hit_columns}
+    if has_last_seen:
+        updates["last_seen"] = case(
+            (table.last_seen.is_(None) | (incoming.last_seen > table.last_seen), incoming.last_seen),
+            else_=table.last_seen
+        )
+    if dialect == "mysql":
+        db.execute(stmt.on_duplicate_key_update(**updates), rows)
+    else:
+        db.execute(stmt.on_conflict_do_update(index_elements=[table.rollup_key], set_=updates), rows)
+
+def _as_row(report) -> Dict[str, Any]:
+    return {column.key: getattr(report, column.key) for column in report.__table__.columns}
+
+def record_reports(db: Session, model, rows: List[Dict[str, Any]], sign: int = 1):
+    """Count report rows (or uncount them with sign=-1) in their buckets; rows without created_at count as now"""
+    if model not in ROLLUPS or not rows:
+        return
+    for rollup, entries in _contributions(model, rows, sign, utcnow()).items():
+        _upsert(db, rollup, entries)
+
+def record_report(db: Session, report):
+    """Count a stored report, e.g. after an edit changed its flags"""
+    record_reports(db, type(report), [_as_row(report)])
+
+def retract_report(db: Session, report):
+    """Uncount a stored report before it is deleted or its flags change"""
+    record_reports(db, type(report), [_as_row(report)], sign=-1)
+
+def update_reports(db: Session, model, condition, values: Dict[str, Any], batch_size: int = 10000) -> int:
+    """UPDATE the reports matching condition, moving their counts to the new values; returns rows updated"""
+    updated = 0
+    last_id = 0
+    while True:
+        rows = db.execute(
+            select(model.__table__).where(condition, model.id > last_id).order_by(model.id).limit(batch_size)
+        ).mappings().all()
+        if not rows:
+            return updated
+        last_id = rows[-1]["id"]
+        record_reports(db, model, rows, sign=-1)
+        record_reports(db, model, [{**row, **values} for row in rows])
+        db.query(model).filter(model.id.in_([row["id"] for row in rows])).update(values, synchronize_session=False)
+        updated += len(rows)
+
+def rebuild_rollups(db: Session, batch_size: int = 10000):
+    """Recount every rollup from the report tables, in id-ordered batches"""
+    now = utcnow()
+    for model, (_, rollups) in ROLLUPS.items():
+        for rollup, _ in rollups:
+            db.execute(delete(rollup))
+        last_id = 0
+        while True:
+            rows = db.execute(
+                select(model.__table__).where(model.id > last_id).order_by(model.id).limit(batch_size)
+            ).mappings().all()
+            if not rows:
+                break
+            last_id = rows[-1]["id"]
+            for rollup, entries in _contributions(model, rows, 1, now).items():
+                _upsert(db, rollup, entries)
+
+def prune_rollups(db: Session, now: Optional[datetime] = None) -> int:
+    """Delete hourly buckets past retention, and buckets emptied by deletions"""
+    cutoff = _hour_cutoff(now or utcnow())
+    deleted = 0
+    for _, rollups in ROLLUPS.values():
+        for rollup, _ in rollups:
+            condition = rollup.hits == 0
+            if _hourly(rollup):
+                condition = or_(condition, and_(rollup.resolution == HOUR, rollup.bucket_start < cutoff))
+            deleted += db.execute(delete(rollup).where(condition)).rowcount
+    db.commit()
+    return deleted
+
+def window_start(days: int, now: Optional[datetime] = None) -> datetime:
+    """UTC start of a stats window covering the last days days"""
+    return (now or utcnow()) - timedelta(days=days)
+
+def rollup_window(rollup, start: datetime, now: Optional[datetime] = None):
+    """Condition selecting the buckets that tile [start, now]
+
+    Counts rollups read hourly buckets for the first, partial day and daily buckets after it;
+    start is rounded down to the day for the top-list rollups, and for counts once its hours are pruned.
+    """
+    first_day = bucket_start(start, DAY)
+    if not _hourly(rollup):
+        return rollup.bucket_start >= first_day
+    if first_day < _hour_cutoff(now or utcnow()):
+        return and_(rollup.resolution == DAY, rollup.bucket_start >= first_day)
+    next_day = first_day + timedelta(days=1)
+    return or_(
+        and_(rollup.resolution == HOUR, rollup.bucket_start >= bucket_start(start, HOUR), rollup.bucket_start < next_day),
+        and_(rollup.resolution == DAY, rollup.bucket_start >= next_day),
+    )
+
+def start_compaction(interval: float, session_factory: Callable[[], Session] = SessionLocal) -> Optional[threading.Event]:
+    """Prune rollups every interval seconds on a daemon thread; set the returned event to stop it"""
+    if interval <= 0:
+        return None
+    stopped = threading.Event()
+
+    def run():
+        while not stopped.wait(interval):
+            db = session_factory()
+            try:
+                deleted = prune_rollups(db)
+                if deleted:
+                    logger.info(f"Pruned {deleted} rollup buckets")
+            except Exception as e:
+                db.rollback()
+                logger.error(f"Rollup compaction failed: {e}")
+            finally:
+                db.close()
+
+    threading.Thread(target=run, name="rollup-compaction", daemon=True).start()
+    return stopped
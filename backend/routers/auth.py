@@ -9,7 +9,7 @@ from datetime import timedelta
 from database import get_db
 from models import User
 from schemas import Token, LoginRequest, User as UserSchema
-from auth import verify_password, create_access_token, get_current_active_user
+from auth import verify_password, create_access_token, get_current_active_user, get_current_user_record
 from config import settings
 
 router = APIRouter(prefix="/auth", tags=["authentication"])
@@ -77,7 +77,7 @@ def login_json(
     }
 
 @router.get("/me", response_model=UserSchema)
-def get_current_user_info(current_user: User = Depends(get_current_active_user)):
+def get_current_user_info(current_user: User = Depends(get_current_user_record)):
     """Get current user information"""
     return current_user
 
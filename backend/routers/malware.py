@@ -2,23 +2,60 @@
 Malware detection API endpoints
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Body
+from sqlalchemy import func
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import Any, List, Optional
 from database import get_db
-from models import User, MalwareReport
+from models import User, MalwareReport, MalwareRollup, MalwareExtensionRollup
 from schemas import (
     MalwareReport as MalwareReportSchema,
     MalwareReportCreate,
     MalwareReportUpdate,
     MessageResponse,
-    PaginatedResponse
+    PaginatedResponse,
+    BulkCreateResponse
 )
 from auth import get_current_active_user
-from datetime import datetime, timedelta
+from bulk import bulk_insert_reports, ingest_report
+from pagination import paginate
+from export import export_reports
+from rollups import retract_report, rollup_window, window_start
+from datetime import datetime
 
 router = APIRouter(prefix="/malware", tags=["malware"])
 
+def _filter_reports(
+    query,
+    current_user: User,
+    user_id: Optional[int],
+    malware_detected: Optional[bool],
+    status_filter: Optional[str],
+    start_date: Optional[datetime],
+    end_date: Optional[datetime]
+):
+    """Apply the report list filters shared by listing and export"""
+    # Filter by user (non-admin users can only see their own reports)
+    if not current_user.is_admin:
+        query = query.filter(MalwareReport.user_id == current_user.id)
+    elif user_id:
+        query = query.filter(MalwareReport.user_id == user_id)
+    
+    # Apply filters
+    if malware_detected is not None:
+        query = query.filter(MalwareReport.malware_detected == malware_detected)
+    
+    if status_filter:
+        query = query.filter(MalwareReport.status == status_filter)
+    
+    if start_date:
+        query = query.filter(MalwareReport.created_at >= start_date)
+    
+    if end_date:
+        query = query.filter(MalwareReport.created_at <= end_date)
+    
+    return query
+
 @router.post("/", response_model=MalwareReportSchema, status_code=status.HTTP_201_CREATED)
 def create_malware_report(
     report: MalwareReportCreate,
@@ -26,21 +63,23 @@ def create_malware_report(
     current_user: User = Depends(get_current_active_user)
 ):
     """Create a new malware detection report"""
-    db_report = MalwareReport(
-        user_id=current_user.id,
-        **report.dict()
-    )
-    
-    db.add(db_report)
-    db.commit()
-    db.refresh(db_report)
-    
-    return db_report
+    return ingest_report(db, MalwareReport, report, current_user.id)
+
+@router.post("/bulk", response_model=BulkCreateResponse, status_code=status.HTTP_201_CREATED)
+def create_malware_reports_bulk(
+    reports: List[Any] = Body(...),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Create many malware detection reports in a single transaction"""
+    return bulk_insert_reports(db, MalwareReport, MalwareReportCreate, reports, current_user.id)
 
 @router.get("/", response_model=PaginatedResponse)
 def get_malware_reports(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page; empty to start cursor pagination"),
+    include_total: bool = True,
     user_id: Optional[int] = None,
     malware_detected: Optional[bool] = None,
     status_filter: Optional[str] = None,
@@ -50,43 +89,29 @@ def get_malware_reports(
     current_user: User = Depends(get_current_active_user)
 ):
     """Get malware reports with filtering and pagination"""
-    query = db.query(MalwareReport)
-    
-    # Filter by user (non-admin users can only see their own reports)
-    if not current_user.is_admin:
-        query = query.filter(MalwareReport.user_id == current_user.id)
-    elif user_id:
-        query = query.filter(MalwareReport.user_id == user_id)
-    
-    # Apply filters
-    if malware_detected is not None:
-        query = query.filter(MalwareReport.malware_detected == malware_detected)
-    
-    if status_filter:
-        query = query.filter(MalwareReport.status == status_filter)
-    
-    if start_date:
-        query = query.filter(MalwareReport.created_at >= start_date)
-    
-    if end_date:
-        query = query.filter(MalwareReport.created_at <= end_date)
-    
-    # Get total count
-    total = query.count()
-    
-    # Apply pagination
-    reports = query.order_by(MalwareReport.created_at.desc()).offset(skip).limit(limit).all()
-    
-    # Calculate pages
-    pages = (total + limit - 1) // limit
+    query = _filter_reports(
+        db.query(MalwareReport), current_user, user_id, malware_detected, status_filter, start_date, end_date
+    )
     
-    return PaginatedResponse(
-        items=[MalwareReportSchema.from_orm(report) for report in reports],
-        total=total,
-        page=skip // limit + 1,
-        size=limit,
-        pages=pages
+    return paginate(query, MalwareReport, MalwareReportSchema, skip, limit, cursor, include_total)
+
+@router.get("/export")
+def export_malware_reports(
+    export_format: str = Query("ndjson", alias="format", pattern="^(ndjson|csv|parquet)$"),
+    gzip: bool = False,
+    user_id: Optional[int] = None,
+    malware_detected: Optional[bool] = None,
+    status_filter: Optional[str] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Stream malware reports matching the list filters as NDJSON, CSV or Parquet"""
+    query = _filter_reports(
+        db.query(MalwareReport), current_user, user_id, malware_detected, status_filter, start_date, end_date
     )
+    return export_reports(db, query, MalwareReport, MalwareReportSchema, export_format, gzip)
 
 @router.get("/{report_id}", response_model=MalwareReportSchema)
 def get_malware_report(
@@ -152,6 +177,7 @@ def delete_malware_report(
     if not report:
         raise HTTPException(status_code=404, detail="Malware report not found")
     
+    retract_report(db, report)
     db.delete(report)
     db.commit()
     
@@ -164,26 +190,34 @@ def get_malware_stats(
     current_user: User = Depends(get_current_active_user)
 ):
     """Get malware detection statistics"""
-    start_date = datetime.now() - timedelta(days=days)
+    start_date = window_start(days)
     
-    query = db.query(MalwareReport).filter(MalwareReport.created_at >= start_date)
+    query = db.query(MalwareRollup).filter(rollup_window(MalwareRollup, start_date))
+    extensions = db.query(MalwareExtensionRollup).filter(rollup_window(MalwareExtensionRollup, start_date))
     
     # Non-admin users can only see their own stats
     if not current_user.is_admin:
-        query = query.filter(MalwareReport.user_id == current_user.id)
-    
-    total_reports = query.count()
-    malware_detected = query.filter(MalwareReport.malware_detected == True).count()
-    high_risk = query.filter(MalwareReport.suspicious_score >= 5).count()
-    
-    # Get top file types
-    file_types = {}
-    for report in query.all():
-        if report.file_name:
-            ext = report.file_name.split('.')[-1].lower() if '.' in report.file_name else 'no_extension'
-            file_types[ext] = file_types.get(ext, 0) + 1
-    
-    top_file_types = sorted(file_types.items(), key=lambda x: x[1], reverse=True)[:10]
+        query = query.filter(MalwareRollup.user_id == current_user.id)
+        extensions = extensions.filter(MalwareExtensionRollup.user_id == current_user.id)
+    
+    total_reports, malware_detected, high_risk = (int(value) for value in query.with_entities(
+        func.coalesce(func.sum(MalwareRollup.hits), 0),
+        func.coalesce(func.sum(MalwareRollup.detected_hits), 0),
+        func.coalesce(func.sum(MalwareRollup.high_risk_hits), 0)
+    ).one())
+    
+    # Get top file types over whole days; ties break by first day seen, then name
+    file_count = func.sum(MalwareExtensionRollup.hits)
+    top_file_types = [
+        (extension, int(count)) for extension, count in extensions
+        .with_entities(MalwareExtensionRollup.file_extension, file_count)
+        .filter(MalwareExtensionRollup.file_extension.isnot(None))
+        .group_by(MalwareExtensionRollup.file_extension)
+        .having(file_count > 0)
+        .order_by(file_count.desc(), func.min(MalwareExtensionRollup.bucket_start),
+                  MalwareExtensionRollup.file_extension)
+        .limit(10)
+    ]
     
     return {
         "total_reports": total_reports,
@@ -2,58 +2,47 @@
 Network monitoring API endpoints
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Body
+from sqlalchemy import func
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import Any, List, Optional
 from database import get_db
-from models import User, NetworkReport
+from models import User, NetworkReport, NetworkRollup, NetworkPortRollup
 from schemas import (
     NetworkReport as NetworkReportSchema,
     NetworkReportCreate,
     NetworkReportUpdate,
     MessageResponse,
-    PaginatedResponse
+    PaginatedResponse,
+    BulkCreateResponse
 )
 from auth import get_current_active_user
-from datetime import datetime, timedelta
+from bulk import bulk_insert_reports, ingest_report
+from pagination import paginate
+from export import export_reports
+from rollups import retract_report, rollup_window, window_start
+from datetime import datetime
 
-router = APIRouter(prefix="/network", tags=["network-monitoring"])
+def _sum(column):
+    """Sum of a rollup hit column; hits include reports folded by deduplication"""
+    return func.coalesce(func.sum(column), 0)
 
-@router.post("/", response_model=NetworkReportSchema, status_code=status.HTTP_201_CREATED)
-def create_network_report(
-    report: NetworkReportCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
-):
-    """Create a new network monitoring report"""
-    db_report = NetworkReport(
-        user_id=current_user.id,
-        **report.dict()
-    )
-    
-    db.add(db_report)
-    db.commit()
-    db.refresh(db_report)
-    
-    return db_report
+PORT_HITS = _sum(NetworkPortRollup.hits)
 
-@router.get("/", response_model=PaginatedResponse)
-def get_network_reports(
-    skip: int = Query(0, ge=0),
-    limit: int = Query(100, ge=1, le=1000),
-    user_id: Optional[int] = None,
-    host: Optional[str] = None,
-    port: Optional[int] = None,
-    is_open: Optional[bool] = None,
-    status_filter: Optional[str] = None,
-    start_date: Optional[datetime] = None,
-    end_date: Optional[datetime] = None,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+router = APIRouter(prefix="/network", tags=["network-monitoring"])
+
+def _filter_reports(
+    query,
+    current_user: User,
+    user_id: Optional[int],
+    host: Optional[str],
+    port: Optional[int],
+    is_open: Optional[bool],
+    status_filter: Optional[str],
+    start_date: Optional[datetime],
+    end_date: Optional[datetime]
 ):
-    """Get network monitoring reports with filtering and pagination"""
-    query = db.query(NetworkReport)
-    
+    """Apply the report list filters shared by listing and export"""
     # Filter by user (non-admin users can only see their own reports)
     if not current_user.is_admin:
         query = query.filter(NetworkReport.user_id == current_user.id)
@@ -79,22 +68,68 @@ def get_network_reports(
     if end_date:
         query = query.filter(NetworkReport.created_at <= end_date)
     
-    # Get total count
-    total = query.count()
-    
-    # Apply pagination
-    reports = query.order_by(NetworkReport.created_at.desc()).offset(skip).limit(limit).all()
-    
-    # Calculate pages
-    pages = (total + limit - 1) // limit
+    return query
+
+@router.post("/", response_model=NetworkReportSchema, status_code=status.HTTP_201_CREATED)
+def create_network_report(
+    report: NetworkReportCreate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Create a new network monitoring report"""
+    return ingest_report(db, NetworkReport, report, current_user.id)
+
+@router.post("/bulk", response_model=BulkCreateResponse, status_code=status.HTTP_201_CREATED)
+def create_network_reports_bulk(
+    reports: List[Any] = Body(...),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Create many network monitoring reports in a single transaction"""
+    return bulk_insert_reports(db, NetworkReport, NetworkReportCreate, reports, current_user.id)
+
+@router.get("/", response_model=PaginatedResponse)
+def get_network_reports(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page; empty to start cursor pagination"),
+    include_total: bool = True,
+    user_id: Optional[int] = None,
+    host: Optional[str] = None,
+    port: Optional[int] = None,
+    is_open: Optional[bool] = None,
+    status_filter: Optional[str] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Get network monitoring reports with filtering and pagination"""
+    query = _filter_reports(
+        db.query(NetworkReport), current_user, user_id, host, port, is_open, status_filter, start_date, end_date
+    )
     
-    return PaginatedResponse(
-        items=[NetworkReportSchema.from_orm(report) for report in reports],
-        total=total,
-        page=skip // limit + 1,
-        size=limit,
-        pages=pages
+    return paginate(query, NetworkReport, NetworkReportSchema, skip, limit, cursor, include_total)
+
+@router.get("/export")
+def export_network_reports(
+    export_format: str = Query("ndjson", alias="format", pattern="^(ndjson|csv|parquet)$"),
+    gzip: bool = False,
+    user_id: Optional[int] = None,
+    host: Optional[str] = None,
+    port: Optional[int] = None,
+    is_open: Optional[bool] = None,
+    status_filter: Optional[str] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Stream network monitoring reports matching the list filters as NDJSON, CSV or Parquet"""
+    query = _filter_reports(
+        db.query(NetworkReport), current_user, user_id, host, port, is_open, status_filter, start_date, end_date
     )
+    return export_reports(db, query, NetworkReport, NetworkReportSchema, export_format, gzip)
 
 @router.get("/{report_id}", response_model=NetworkReportSchema)
 def get_network_report(
@@ -160,6 +195,7 @@ def delete_network_report(
     if not report:
         raise HTTPException(status_code=404, detail="Network report not found")
     
+    retract_report(db, report)
     db.delete(report)
     db.commit()
     
@@ -172,25 +208,30 @@ def get_network_stats(
     current_user: User = Depends(get_current_active_user)
 ):
     """Get network monitoring statistics"""
-    start_date = datetime.now() - timedelta(days=days)
+    start_date = window_start(days)
     
-    query = db.query(NetworkReport).filter(NetworkReport.created_at >= start_date)
+    query = db.query(NetworkRollup).filter(rollup_window(NetworkRollup, start_date))
+    ports = db.query(NetworkPortRollup).filter(rollup_window(NetworkPortRollup, start_date))
     
     # Non-admin users can only see their own stats
     if not current_user.is_admin:
-        query = query.filter(NetworkReport.user_id == current_user.id)
-    
-    total_scans = query.count()
-    open_ports = query.filter(NetworkReport.is_open == True).count()
-    closed_ports = query.filter(NetworkReport.is_open == False).count()
-    
-    # Get top ports
-    port_counts = {}
-    for report in query.all():
-        port = report.port
-        port_counts[port] = port_counts.get(port, 0) + 1
-    
-    top_ports = sorted(port_counts.items(), key=lambda x: x[1], reverse=True)[:10]
+        query = query.filter(NetworkRollup.user_id == current_user.id)
+        ports = ports.filter(NetworkPortRollup.user_id == current_user.id)
+    
+    total_scans, open_ports, closed_ports = (int(value) for value in query.with_entities(
+        _sum(NetworkRollup.hits),
+        _sum(NetworkRollup.open_hits),
+        _sum(NetworkRollup.closed_hits)
+    ).one())
+    
+    # Get top ports over whole days; ties break by first day seen, then port
+    top_ports = [
+        (port, int(scans)) for port, scans in ports.with_entities(NetworkPortRollup.port, PORT_HITS)
+        .group_by(NetworkPortRollup.port)
+        .having(PORT_HITS > 0)
+        .order_by(PORT_HITS.desc(), func.min(NetworkPortRollup.bucket_start), NetworkPortRollup.port)
+        .limit(10)
+    ]
     
     return {
         "total_scans": total_scans,
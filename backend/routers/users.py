@@ -8,7 +8,7 @@ from typing import List
 from database import get_db
 from models import User
 from schemas import UserCreate, UserUpdate, User as UserSchema, MessageResponse
-from auth import get_password_hash, get_current_active_user, get_current_admin_user
+from auth import get_password_hash, get_current_admin_user, get_current_user_record, invalidate_user
 
 router = APIRouter(prefix="/users", tags=["users"])
 
@@ -97,7 +97,7 @@ def get_users(
     return users
 
 @router.get("/me", response_model=UserSchema)
-def get_current_user_info(current_user: User = Depends(get_current_active_user)):
+def get_current_user_info(current_user: User = Depends(get_current_user_record)):
     """Get current user information"""
     return current_user
 
@@ -131,6 +131,7 @@ def update_user(
         setattr(user, field, value)
     
     db.commit()
+    invalidate_user(user.id)
     db.refresh(user)
     return user
 
@@ -150,6 +151,7 @@ def delete_user(
     
     db.delete(user)
     db.commit()
+    invalidate_user(user_id)
     
     return MessageResponse(message="User deleted successfully")
 
@@ -157,7 +159,7 @@ def delete_user(
 def update_current_user(
     user_update: UserUpdate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    current_user: User = Depends(get_current_user_record)
 ):
     """Update current user information"""
     # Update fields
@@ -168,6 +170,7 @@ def update_current_user(
         setattr(current_user, field, value)
     
     db.commit()
+    invalidate_user(current_user.id)
     db.refresh(current_user)
     return current_user
 
@@ -187,6 +190,7 @@ def toggle_user_active(
     
     user.is_active = not user.is_active
     db.commit()
+    invalidate_user(user.id)
     
     status_text = "activated" if user.is_active else "deactivated"
     return MessageResponse(message=f"User {status_text} successfully")
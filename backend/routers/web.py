@@ -2,58 +2,48 @@
 Web monitoring API endpoints
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Body
+from sqlalchemy import func
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import Any, List, Optional
 from database import get_db
-from models import User, WebReport
+from models import User, WebReport, WebRollup, WebDomainRollup
 from schemas import (
     WebReport as WebReportSchema,
     WebReportCreate,
     WebReportUpdate,
     MessageResponse,
-    PaginatedResponse
+    PaginatedResponse,
+    BulkCreateResponse
 )
 from auth import get_current_active_user
-from datetime import datetime, timedelta
+from bulk import bulk_insert_reports, ingest_report
+from pagination import paginate
+from export import export_reports
+from rollups import record_report, retract_report, rollup_window, update_reports, window_start
+from datetime import datetime
 
-router = APIRouter(prefix="/web", tags=["web-monitoring"])
+def _sum(column):
+    """Sum of a rollup hit column; hits include reports folded by deduplication"""
+    return func.coalesce(func.sum(column), 0)
 
-@router.post("/", response_model=WebReportSchema, status_code=status.HTTP_201_CREATED)
-def create_web_report(
-    report: WebReportCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
-):
-    """Create a new web activity report"""
-    db_report = WebReport(
-        user_id=current_user.id,
-        **report.dict()
-    )
-    
-    db.add(db_report)
-    db.commit()
-    db.refresh(db_report)
-    
-    return db_report
+DOMAIN_HITS = _sum(WebDomainRollup.hits)
 
-@router.get("/", response_model=PaginatedResponse)
-def get_web_reports(
-    skip: int = Query(0, ge=0),
-    limit: int = Query(100, ge=1, le=1000),
-    user_id: Optional[int] = None,
-    domain: Optional[str] = None,
-    category: Optional[str] = None,
-    is_blocked: Optional[bool] = None,
-    is_whitelisted: Optional[bool] = None,
-    start_date: Optional[datetime] = None,
-    end_date: Optional[datetime] = None,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+router = APIRouter(prefix="/web", tags=["web-monitoring"])
+
+def _filter_reports(
+    query,
+    current_user: User,
+    user_id: Optional[int],
+    domain: Optional[str],
+    category: Optional[str],
+    is_blocked: Optional[bool],
+    is_whitelisted: Optional[bool],
+    event: Optional[str],
+    start_date: Optional[datetime],
+    end_date: Optional[datetime]
 ):
-    """Get web activity reports with filtering and pagination"""
-    query = db.query(WebReport)
-    
+    """Apply the report list filters shared by listing and export"""
     # Filter by user (non-admin users can only see their own reports)
     if not current_user.is_admin:
         query = query.filter(WebReport.user_id == current_user.id)
@@ -73,28 +63,79 @@ def get_web_reports(
     if is_whitelisted is not None:
         query = query.filter(WebReport.is_whitelisted == is_whitelisted)
     
+    if event:
+        query = query.filter(WebReport.event == event)
+    
     if start_date:
         query = query.filter(WebReport.created_at >= start_date)
     
     if end_date:
         query = query.filter(WebReport.created_at <= end_date)
     
-    # Get total count
-    total = query.count()
-    
-    # Apply pagination
-    reports = query.order_by(WebReport.created_at.desc()).offset(skip).limit(limit).all()
-    
-    # Calculate pages
-    pages = (total + limit - 1) // limit
+    return query
+
+@router.post("/", response_model=WebReportSchema, status_code=status.HTTP_201_CREATED)
+def create_web_report(
+    report: WebReportCreate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Create a new web activity report"""
+    return ingest_report(db, WebReport, report, current_user.id)
+
+@router.post("/bulk", response_model=BulkCreateResponse, status_code=status.HTTP_201_CREATED)
+def create_web_reports_bulk(
+    reports: List[Any] = Body(...),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Create many web activity reports in a single transaction"""
+    return bulk_insert_reports(db, WebReport, WebReportCreate, reports, current_user.id)
+
+@router.get("/", response_model=PaginatedResponse)
+def get_web_reports(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page; empty to start cursor pagination"),
+    include_total: bool = True,
+    user_id: Optional[int] = None,
+    domain: Optional[str] = None,
+    category: Optional[str] = None,
+    is_blocked: Optional[bool] = None,
+    is_whitelisted: Optional[bool] = None,
+    event: Optional[str] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Get web activity reports with filtering and pagination"""
+    query = _filter_reports(
+        db.query(WebReport), current_user, user_id, domain, category, is_blocked, is_whitelisted, event, start_date, end_date
+    )
     
-    return PaginatedResponse(
-        items=[WebReportSchema.from_orm(report) for report in reports],
-        total=total,
-        page=skip // limit + 1,
-        size=limit,
-        pages=pages
+    return paginate(query, WebReport, WebReportSchema, skip, limit, cursor, include_total)
+
+@router.get("/export")
+def export_web_reports(
+    export_format: str = Query("ndjson", alias="format", pattern="^(ndjson|csv|parquet)$"),
+    gzip: bool = False,
+    user_id: Optional[int] = None,
+    domain: Optional[str] = None,
+    category: Optional[str] = None,
+    is_blocked: Optional[bool] = None,
+    is_whitelisted: Optional[bool] = None,
+    event: Optional[str] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Stream web activity reports matching the list filters as NDJSON, CSV or Parquet"""
+    query = _filter_reports(
+        db.query(WebReport), current_user, user_id, domain, category, is_blocked, is_whitelisted, event, start_date, end_date
     )
+    return export_reports(db, query, WebReport, WebReportSchema, export_format, gzip)
 
 @router.get("/{report_id}", response_model=WebReportSchema)
 def get_web_report(
@@ -133,10 +174,12 @@ def update_web_report(
     if not report:
         raise HTTPException(status_code=404, detail="Web report not found")
     
-    # Update fields
+    # Update fields, moving the report's stats to its new category and flags
     update_data = report_update.dict(exclude_unset=True)
+    retract_report(db, report)
     for field, value in update_data.items():
         setattr(report, field, value)
+    record_report(db, report)
     
     db.commit()
     db.refresh(report)
@@ -160,6 +203,7 @@ def delete_web_report(
     if not report:
         raise HTTPException(status_code=404, detail="Web report not found")
     
+    retract_report(db, report)
     db.delete(report)
     db.commit()
     
@@ -172,32 +216,40 @@ def get_web_stats(
     current_user: User = Depends(get_current_active_user)
 ):
     """Get web activity statistics"""
-    start_date = datetime.now() - timedelta(days=days)
+    start_date = window_start(days)
     
-    query = db.query(WebReport).filter(WebReport.created_at >= start_date)
+    query = db.query(WebRollup).filter(rollup_window(WebRollup, start_date))
+    domains = db.query(WebDomainRollup).filter(rollup_window(WebDomainRollup, start_date))
     
     # Non-admin users can only see their own stats
     if not current_user.is_admin:
-        query = query.filter(WebReport.user_id == current_user.id)
-    
-    total_visits = query.count()
-    blocked_visits = query.filter(WebReport.is_blocked == True).count()
-    suspicious_visits = query.filter(WebReport.suspicious_score >= 5).count()
-    whitelisted_visits = query.filter(WebReport.is_whitelisted == True).count()
-    
-    # Get top domains
-    domain_counts = {}
-    for report in query.all():
-        domain = report.domain
-        domain_counts[domain] = domain_counts.get(domain, 0) + 1
-    
-    top_domains = sorted(domain_counts.items(), key=lambda x: x[1], reverse=True)[:10]
+        query = query.filter(WebRollup.user_id == current_user.id)
+        domains = domains.filter(WebDomainRollup.user_id == current_user.id)
+    
+    total_visits, blocked_visits, suspicious_visits, whitelisted_visits = (int(value) for value in query.with_entities(
+        _sum(WebRollup.hits),
+        _sum(WebRollup.blocked_hits),
+        _sum(WebRollup.suspicious_hits),
+        _sum(WebRollup.whitelisted_hits)
+    ).one())
+    
+    # Get top domains over whole days; ties break by first day seen, then name
+    top_domains = [
+        (domain, int(visits)) for domain, visits in domains.with_entities(WebDomainRollup.domain, DOMAIN_HITS)
+        .group_by(WebDomainRollup.domain)
+        .having(DOMAIN_HITS > 0)
+        .order_by(DOMAIN_HITS.desc(), func.min(WebDomainRollup.bucket_start), WebDomainRollup.domain)
+        .limit(10)
+    ]
     
     # Get category breakdown
-    category_counts = {}
-    for report in query.all():
-        category = report.category or 'unknown'
-        category_counts[category] = category_counts.get(category, 0) + 1
+    category_hits = _sum(WebRollup.hits)
+    category_counts = {
+        name: int(visits) for name, visits in query.with_entities(WebRollup.category, category_hits)
+        .group_by(WebRollup.category)
+        .having(category_hits > 0)
+        .order_by(func.min(WebRollup.bucket_start), WebRollup.category)
+    }
     
     return {
         "total_visits": total_visits,
@@ -235,8 +287,8 @@ def block_domain(
     current_user: User = Depends(get_current_active_user)
 ):
     """Block a domain (add to blacklist)"""
-    # Update all existing reports for this domain
-    db.query(WebReport).filter(WebReport.domain == domain).update({
+    # Update all existing reports for this domain, moving their stats to the new category and flags
+    update_reports(db, WebReport, WebReport.domain == domain, {
         "is_blocked": True,
         "category": "blocked"
     })
@@ -252,8 +304,8 @@ def whitelist_domain(
     current_user: User = Depends(get_current_active_user)
 ):
     """Whitelist a domain (add to whitelist)"""
-    # Update all existing reports for this domain
-    db.query(WebReport).filter(WebReport.domain == domain).update({
+    # Update all existing reports for this domain, moving their stats to the new category and flags
+    update_reports(db, WebReport, WebReport.domain == domain, {
         "is_whitelisted": True,
         "is_blocked": False,
         "category": "allowed"
@@ -270,37 +322,35 @@ def get_top_domains(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
-    """Get top visited domains"""
-    start_date = datetime.now() - timedelta(days=days)
-    
-    query = db.query(WebReport).filter(WebReport.created_at >= start_date)
+    """Get top visited domains over whole UTC days"""
+    query = db.query(WebDomainRollup).filter(rollup_window(WebDomainRollup, window_start(days)))
     
     # Non-admin users can only see their own data
     if not current_user.is_admin:
-        query = query.filter(WebReport.user_id == current_user.id)
+        query = query.filter(WebDomainRollup.user_id == current_user.id)
+    
+    # Count visits per domain, busiest first
+    rows = (
+        query.with_entities(
+            WebDomainRollup.domain,
+            DOMAIN_HITS,
+            _sum(WebDomainRollup.blocked_hits),
+            _sum(WebDomainRollup.suspicious_hits),
+            func.max(WebDomainRollup.last_seen)
+        )
+        .group_by(WebDomainRollup.domain)
+        .having(DOMAIN_HITS > 0)
+        .order_by(DOMAIN_HITS.desc(), func.min(WebDomainRollup.bucket_start), WebDomainRollup.domain)
+        .limit(limit)
+    )
     
-    # Count visits per domain
-    domain_counts = {}
-    for report in query.all():
-        domain = report.domain
-        if domain not in domain_counts:
-            domain_counts[domain] = {
-                "domain": domain,
-                "visits": 0,
-                "blocked": 0,
-                "suspicious": 0,
-                "last_visit": report.created_at
-            }
-        
-        domain_counts[domain]["visits"] += 1
-        if report.is_blocked:
-            domain_counts[domain]["blocked"] += 1
-        if report.suspicious_score >= 5:
-            domain_counts[domain]["suspicious"] += 1
-        if report.created_at > domain_counts[domain]["last_visit"]:
-            domain_counts[domain]["last_visit"] = report.created_at
-    
-    # Sort by visit count and return top domains
-    top_domains = sorted(domain_counts.values(), key=lambda x: x["visits"], reverse=True)[:limit]
-    
-    return top_domains
+    return [
+        {
+            "domain": domain,
+            "visits": int(visits),
+            "blocked": int(blocked),
+            "suspicious": int(suspicious),
+            "last_visit": last_visit
+        }
+        for domain, visits, blocked, suspicious, last_visit in rows
+    ]
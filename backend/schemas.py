@@ -3,7 +3,7 @@ Pydantic schemas for request/response models
 """
 
 from pydantic import BaseModel
-from typing import Optional, List
+from typing import Any, Optional, List
 from datetime import datetime
 
 # User schemas
@@ -86,6 +86,11 @@ class WebReportBase(BaseModel):
     category: Optional[str] = None
     indicators: Optional[str] = None
     connection_type: Optional[str] = None
+    event: Optional[str] = None
+    duration: Optional[float] = None
+    bytes_sent: Optional[int] = None
+    bytes_received: Optional[int] = None
+    connection_count: int = 1
     is_blocked: bool = False
     is_whitelisted: bool = False
 
@@ -100,6 +105,9 @@ class WebReportUpdate(BaseModel):
 class WebReport(WebReportBase):
     id: int
     user_id: int
+    first_seen: Optional[datetime] = None
+    last_seen: Optional[datetime] = None
+    hit_count: Optional[int] = 1
     created_at: datetime
 
     class Config:
@@ -129,6 +137,9 @@ class NetworkReportUpdate(BaseModel):
 class NetworkReport(NetworkReportBase):
     id: int
     user_id: int
+    first_seen: Optional[datetime] = None
+    last_seen: Optional[datetime] = None
+    hit_count: Optional[int] = 1
     created_at: datetime
 
     class Config:
@@ -162,14 +173,27 @@ class DashboardStats(BaseModel):
     recent_web_activity: List[WebReport]
     recent_network_activity: List[NetworkReport]
 
+# Bulk ingest schemas
+class BulkItemError(BaseModel):
+    index: int
+    error: str
+
+class BulkCreateResponse(BaseModel):
+    received: int
+    created: int  # new rows stored
+    folded: int = 0  # valid reports counted as a hit on an existing row (dedupe mode)
+    failed: int
+    errors: List[BulkItemError] = []
+
 # Response schemas
 class MessageResponse(BaseModel):
     message: str
     success: bool = True
 
 class PaginatedResponse(BaseModel):
-    items: List[dict]
-    total: int
-    page: int
+    items: List[Any]
+    total: Optional[int] = None  # omitted when include_total=false
+    page: Optional[int] = None  # offset pagination only
     size: int
-    pages: int
+    pages: Optional[int] = None
+    next_cursor: Optional[str] = None  # cursor pagination only; None on the last page
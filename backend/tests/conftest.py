@@ -0,0 +1,56 @@
+import os
+import sys
+import tempfile
+import pytest
+
+# The backend modules are flat and read DATABASE_URL at import time; default to a throwaway SQLite file
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'test.db')}")
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    """Each test brings its own database, so nothing cached in-process may carry over"""
+    from auth import _principals
+    from pagination import _counts
+    _principals.clear()
+    _counts.clear()
+
+@pytest.fixture
+def api_client():
+    """Build a TestClient on a given engine, authenticated as its user "admin" """
+    from fastapi.testclient import TestClient
+    from sqlalchemy.orm import sessionmaker
+    from auth import create_access_token
+    from database import get_db
+    from main import app
+
+    def make_client(engine):
+        Session = sessionmaker(bind=engine)
+
+        def override_get_db():
+            db = Session()
+            try:
+                yield db
+            finally:
+                db.close()
+
+        app.dependency_overrides[get_db] = override_get_db
+        token = create_access_token({"sub": "admin"})
+        return TestClient(app, headers={"Authorization": f"Bearer {token}"})
+
+    yield make_client
+    app.dependency_overrides.clear()
+
+@pytest.fixture
+def engine(tmp_path):
+    """A migrated SQLite database with an admin user"""
+    from sqlalchemy import create_engine, text
+    from migrations import run_migrations
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'api.db'}", connect_args={"check_same_thread": False})
+    run_migrations(engine)
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO users (id, username, email, hashed_password, is_active, is_admin) "
+                          "VALUES (1, 'admin', 'admin@example.com', 'x', 1, 1)"))
+    yield engine
+    engine.dispose()
@@ -0,0 +1,34 @@
+"""
+Bulk report ingest
+"""
+
+import pytest
+from config import settings
+
+@pytest.fixture
+def dedupe(monkeypatch):
+    monkeypatch.setattr(settings, "REPORT_DEDUPE_BUCKET_SECONDS", 3600)
+
+def test_bulk_counts_created_rows(engine, api_client):
+    client = api_client(engine)
+    response = client.post("/api/v1/web/bulk", json=[{"domain": "example.com", "port": 443}] * 3 + [{"port": 1}])
+    assert response.status_code == 201
+    body = response.json()
+    assert (body["received"], body["created"], body["folded"], body["failed"]) == (4, 3, 0, 1)
+    assert client.get("/api/v1/web/").json()["total"] == 3
+
+def test_bulk_dedupe_counts_folded_repeats(engine, api_client, dedupe):
+    client = api_client(engine)
+    response = client.post("/api/v1/web/bulk", json=[{"domain": "example.com", "port": 443}] * 8)
+    body = response.json()
+    assert (body["created"], body["folded"]) == (1, 7)
+
+    # Repeats of a stored row only add hits
+    response = client.post("/api/v1/web/bulk", json=[{"domain": "example.com", "port": 443},
+                                                      {"domain": "example.org", "port": 443}])
+    body = response.json()
+    assert (body["created"], body["folded"]) == (1, 1)
+
+    reports = {report["domain"]: report for report in client.get("/api/v1/web/").json()["items"]}
+    assert reports["example.com"]["hit_count"] == 9
+    assert reports["example.org"]["hit_count"] == 1
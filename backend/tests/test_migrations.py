@@ -0,0 +1,135 @@
+"""
+Upgrading a database created by the original schema
+"""
+
+import pytest
+from sqlalchemy import (
+    Boolean, Column, DateTime, Float, ForeignKey, Integer, MetaData, String, Table, Text, create_engine, func, text
+)
+from migrations import run_migrations, schema_migrations
+
+def baseline_metadata() -> MetaData:
+    """The report tables as they were before any migration existed"""
+    metadata = MetaData()
+    Table(
+        "users", metadata,
+        Column("id", Integer, primary_key=True),
+        Column("username", String(50), unique=True, nullable=False),
+        Column("email", String(100), unique=True, nullable=False),
+        Column("hashed_password", String(255), nullable=False),
+        Column("full_name", String(100)),
+        Column("is_active", Boolean),
+        Column("is_admin", Boolean),
+        Column("created_at", DateTime(timezone=True), server_default=func.now()),
+        Column("updated_at", DateTime(timezone=True)),
+    )
+    Table(
+        "malware_reports", metadata,
+        Column("id", Integer, primary_key=True),
+        Column("user_id", Integer, ForeignKey("users.id")),
+        Column("file_path", String(500), nullable=False),
+        Column("file_name", String(255), nullable=False),
+        Column("file_size", Integer),
+        Column("file_hash_md5", String(32)),
+        Column("file_hash_sha256", String(64)),
+        Column("suspicious_score", Integer),
+        Column("malware_detected", Boolean),
+        Column("indicators", Text),
+        Column("process_name", String(255)),
+        Column("process_pid", Integer),
+        Column("status", String(50)),
+        Column("created_at", DateTime(timezone=True), server_default=func.now()),
+    )
+    Table(
+        "web_reports", metadata,
+        Column("id", Integer, primary_key=True),
+        Column("user_id", Integer, ForeignKey("users.id")),
+        Column("domain", String(255), nullable=False),
+        Column("ip_address", String(45)),
+        Column("port", Integer),
+        Column("browser_name", String(100)),
+        Column("process_pid", Integer),
+        Column("suspicious_score", Integer),
+        Column("category", String(50)),
+        Column("indicators", Text),
+        Column("connection_type", String(50)),
+        Column("is_blocked", Boolean),
+        Column("is_whitelisted", Boolean),
+        Column("created_at", DateTime(timezone=True), server_default=func.now()),
+    )
+    Table(
+        "network_reports", metadata,
+        Column("id", Integer, primary_key=True),
+        Column("user_id", Integer, ForeignKey("users.id")),
+        Column("host", String(255), nullable=False),
+        Column("port", Integer, nullable=False),
+        Column("is_open", Boolean),
+        Column("service_name", String(100)),
+        Column("connection_count", Integer),
+        Column("local_address", String(45)),
+        Column("remote_address", String(45)),
+        Column("process_name", String(255)),
+        Column("process_pid", Integer),
+        Column("status", String(50)),
+        Column("scan_duration", Float),
+        Column("created_at", DateTime(timezone=True), server_default=func.now()),
+    )
+    return metadata
+
+@pytest.fixture
+def upgraded_client(tmp_path, api_client):
+    engine = create_engine(f"sqlite:///{tmp_path / 'baseline.db'}", connect_args={"check_same_thread": False})
+    metadata = baseline_metadata()
+    metadata.create_all(engine)
+    tables = metadata.tables
+    with engine.begin() as conn:
+        conn.execute(tables["users"].insert().values(
+            id=1, username="admin", email="admin@example.com", hashed_password="x", is_active=True, is_admin=True))
+        conn.execute(tables["web_reports"].insert().values(
+            user_id=1, domain="example.com", port=443, suspicious_score=0, category="normal",
+            is_blocked=False, is_whitelisted=False))
+        conn.execute(tables["network_reports"].insert().values(
+            user_id=1, host="10.0.0.1", port=22, is_open=True, connection_count=0, status="open"))
+        conn.execute(tables["malware_reports"].insert().values(
+            user_id=1, file_path="/tmp/a.exe", file_name="a.exe", suspicious_score=7,
+            malware_detected=True, status="detected"))
+
+    run_migrations(engine)
+    yield api_client(engine)
+    engine.dispose()
+
+@pytest.mark.parametrize("report_type", ["web", "network", "malware"])
+def test_lists_reports_after_upgrade(upgraded_client, report_type):
+    response = upgraded_client.get(f"/api/v1/{report_type}/")
+    assert response.status_code == 200, response.text
+    assert response.json()["total"] == 1
+
+def test_upgraded_web_report_counts_one_connection(upgraded_client):
+    report = upgraded_client.get("/api/v1/web/").json()["items"][0]
+    assert report["connection_count"] == 1
+
+def test_upgraded_reports_fill_dedupe_columns(upgraded_client):
+    for report_type in ("web", "network"):
+        report = upgraded_client.get(f"/api/v1/{report_type}/").json()["items"][0]
+        assert report["hit_count"] == 1
+        assert report["first_seen"] == report["last_seen"] == report["created_at"]
+
+def test_backfills_nulls_left_by_earlier_upgrades(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'partial.db'}")
+    run_migrations(engine)
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO users (id, username, email, hashed_password) VALUES (1, 'a', 'a@x', 'x')"))
+        conn.execute(text("INSERT INTO web_reports (user_id, domain) VALUES (1, 'example.com')"))
+        conn.execute(text("INSERT INTO network_reports (user_id, host, port) VALUES (1, '10.0.0.1', 22)"))
+        # What migrations 1 and 2 left behind before they filled their columns
+        conn.execute(schema_migrations.delete().where(schema_migrations.c.version == 6))
+
+    run_migrations(engine)
+
+    with engine.connect() as conn:
+        web = conn.execute(text("SELECT connection_count, hit_count, first_seen, last_seen FROM web_reports")).one()
+        network = conn.execute(text("SELECT hit_count, first_seen, last_seen FROM network_reports")).one()
+    assert web.connection_count == 1 and web.hit_count == 1
+    assert network.hit_count == 1
+    assert None not in (web.first_seen, web.last_seen, network.first_seen, network.last_seen)
+    engine.dispose()
@@ -0,0 +1,34 @@
+"""
+Keyset pagination over the report list endpoints
+"""
+
+import pytest
+from sqlalchemy import text
+from pagination import encode_cursor
+
+@pytest.mark.parametrize("stored_created_at", [None, "2024-01-01 10:00:00"])
+def test_cursor_pages_cover_every_report_once(engine, api_client, stored_created_at):
+    client = api_client(engine)
+    client.post("/api/v1/web/bulk", json=[{"domain": f"{n}.example", "port": 443} for n in range(5)])
+    if stored_created_at:
+        # Whole-second timestamps, as CURRENT_TIMESTAMP defaults store them
+        with engine.begin() as conn:
+            conn.execute(text("UPDATE web_reports SET created_at = :created_at"), {"created_at": stored_created_at})
+
+    seen, cursor = [], ""
+    while cursor is not None:
+        page = client.get("/api/v1/web/", params={"limit": 2, "cursor": cursor}).json()
+        seen += [report["id"] for report in page["items"]]
+        cursor = page["next_cursor"]
+    assert seen == sorted(seen, reverse=True) and len(set(seen)) == 5
+
+@pytest.mark.parametrize("cursor", [
+    "WzEsMl0",  # [1, 2]
+    encode_cursor("yesterday", 1),
+    encode_cursor("2024-01-01 10:00:00", "x"),
+    "not base64!",
+])
+def test_malformed_cursor_is_rejected(engine, api_client, cursor):
+    response = api_client(engine).get("/api/v1/web/", params={"cursor": cursor})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid cursor"
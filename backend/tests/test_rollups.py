@@ -0,0 +1,158 @@
+"""
+Stats rollups kept in step with report ingest, edits and deletes
+"""
+
+from datetime import timedelta
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from config import settings
+from migrations import run_migrations, schema_migrations
+from models import WebReport, WebRollup, WebDomainRollup
+from rollups import DAY, HOUR, ROLLUPS, _hit_columns, bucket_start, prune_rollups, rebuild_rollups, utcnow
+
+WEB_REPORTS = [
+    {"domain": "a.example", "port": 443, "category": "normal", "suspicious_score": 1},
+    {"domain": "a.example", "port": 443, "category": "normal", "suspicious_score": 1},
+    {"domain": "b.example", "port": 443, "category": "suspicious", "suspicious_score": 7},
+    {"domain": "c.example", "port": 80, "is_blocked": True, "category": "blocked"},
+    {"domain": "d.example", "port": 80, "is_whitelisted": True},
+]
+
+def counts(db):
+    """Non-empty buckets of every rollup, keyed by rollup_key"""
+    return {
+        rollup.__tablename__: {
+            bucket.rollup_key: tuple(getattr(bucket, name) for name in _hit_columns(rollup))
+            for bucket in db.query(rollup) if bucket.hits
+        }
+        for _, rollups in ROLLUPS.values() for rollup, _ in rollups
+    }
+
+def assert_matches_rebuild(engine):
+    with Session(engine) as db:
+        incremental = counts(db)
+        rebuild_rollups(db)
+        assert counts(db) == incremental
+        db.rollback()
+
+def test_stats_count_ingested_reports(engine, api_client):
+    client = api_client(engine)
+    assert client.post("/api/v1/web/bulk", json=WEB_REPORTS).json()["created"] == 5
+    client.post("/api/v1/network/", json={"host": "10.0.0.1", "port": 22, "is_open": True})
+    client.post("/api/v1/network/bulk", json=[{"host": "10.0.0.2", "port": 22}, {"host": "10.0.0.2", "port": 80}])
+    client.post("/api/v1/malware/bulk", json=[
+        {"file_path": "/tmp/a.exe", "file_name": "a.exe", "suspicious_score": 8, "malware_detected": True},
+        {"file_path": "/tmp/b.EXE", "file_name": "b.EXE"},
+        {"file_path": "/tmp/c", "file_name": "c"},
+    ])
+
+    web = client.get("/api/v1/web/stats/summary?days=1").json()
+    assert (web["total_visits"], web["blocked_visits"], web["suspicious_visits"], web["whitelisted_visits"]) == (5, 1, 1, 1)
+    assert web["top_domains"][0] == ["a.example", 2]
+    assert web["category_breakdown"] == {"blocked": 1, "normal": 2, "suspicious": 1, "unknown": 1}
+
+    network = client.get("/api/v1/network/stats/summary").json()
+    assert (network["total_scans"], network["open_ports"], network["closed_ports"]) == (3, 1, 2)
+    assert network["top_ports"] == [[22, 2], [80, 1]]
+
+    malware = client.get("/api/v1/malware/stats/summary").json()
+    assert (malware["total_reports"], malware["malware_detected"], malware["high_risk_files"]) == (3, 1, 1)
+    assert malware["top_file_types"] == [["exe", 2], ["no_extension", 1]]
+    assert_matches_rebuild(engine)
+
+def test_buckets_are_on_utc(engine, api_client):
+    client = api_client(engine)
+    before = utcnow()
+    client.post("/api/v1/web/", json=WEB_REPORTS[0])
+
+    with Session(engine) as db:
+        created_at = db.query(WebReport.created_at).scalar()
+        # Ingest stamps created_at in UTC, so a report lands in the buckets of its stored time
+        assert before - timedelta(seconds=1) <= created_at <= utcnow()
+        assert sorted(db.query(WebRollup.resolution, WebRollup.bucket_start)) == [
+            (HOUR, bucket_start(created_at, HOUR)), (DAY, bucket_start(created_at, DAY))]
+        assert db.query(WebDomainRollup).one().bucket_start == bucket_start(created_at, DAY)
+
+def test_edits_and_deletes_move_counts(engine, api_client):
+    client = api_client(engine)
+    client.post("/api/v1/web/bulk", json=WEB_REPORTS)
+    client.post("/api/v1/malware/", json={"file_path": "/tmp/a.exe", "file_name": "a.exe"})
+    ids = {report["domain"]: report["id"] for report in client.get("/api/v1/web/").json()["items"]}
+
+    client.put(f"/api/v1/web/{ids['d.example']}", json={"is_blocked": True, "category": "blocked"})
+    client.post("/api/v1/web/block-domain?domain=a.example")
+    client.post("/api/v1/web/whitelist-domain?domain=c.example")
+    client.delete(f"/api/v1/web/{ids['b.example']}")
+    client.delete(f"/api/v1/malware/{client.get('/api/v1/malware/').json()['items'][0]['id']}")
+
+    web = client.get("/api/v1/web/stats/summary").json()
+    assert (web["total_visits"], web["blocked_visits"], web["suspicious_visits"], web["whitelisted_visits"]) == (4, 3, 0, 2)
+    assert web["category_breakdown"] == {"allowed": 1, "blocked": 3}
+    top = {row["domain"]: row for row in client.get("/api/v1/web/domains/top").json()}
+    assert (top["a.example"]["visits"], top["a.example"]["blocked"]) == (2, 2)
+    assert "b.example" not in top
+    assert client.get("/api/v1/malware/stats/summary").json()["total_reports"] == 0
+    assert_matches_rebuild(engine)
+
+def age_reports(engine, domain: str, hours: int):
+    with engine.begin() as conn:
+        conn.execute(text(f"UPDATE web_reports SET created_at = datetime(created_at, '-{hours} hours') "
+                          f"WHERE domain = '{domain}'"))
+    with Session(engine) as db:
+        rebuild_rollups(db)
+        db.commit()
+
+def test_window_starts_on_the_hour(engine, api_client):
+    client = api_client(engine)
+    client.post("/api/v1/web/bulk", json=WEB_REPORTS)
+    age_reports(engine, "a.example", 30)
+    age_reports(engine, "b.example", 20)
+
+    web = client.get("/api/v1/web/stats/summary?days=1").json()
+    assert web["total_visits"] == 3
+    assert web["category_breakdown"] == {"blocked": 1, "suspicious": 1, "unknown": 1}
+    assert client.get("/api/v1/web/stats/summary?days=2").json()["total_visits"] == 5
+
+def test_prune_drops_hours_past_retention(engine, api_client, monkeypatch):
+    client = api_client(engine)
+    client.post("/api/v1/web/bulk", json=WEB_REPORTS)
+    age_reports(engine, "a.example", 72)
+    before = client.get("/api/v1/web/stats/summary?days=7").json()
+
+    monkeypatch.setattr(settings, "ROLLUP_HOUR_RETENTION_DAYS", 1)
+    with Session(engine) as db:
+        assert prune_rollups(db) == 1
+        cutoff = bucket_start(utcnow() - timedelta(days=1), DAY)
+        assert db.query(WebRollup).filter(WebRollup.resolution == HOUR, WebRollup.bucket_start < cutoff).count() == 0
+    assert client.get("/api/v1/web/stats/summary?days=7").json() == before
+
+    # Removing a report from a day without hourly buckets uncounts it from that day
+    report_id = next(report["id"] for report in client.get("/api/v1/web/").json()["items"]
+                     if report["domain"] == "a.example")
+    client.delete(f"/api/v1/web/{report_id}")
+    after = client.get("/api/v1/web/stats/summary?days=7").json()
+    assert after["total_visits"] == before["total_visits"] - 1
+    assert after["category_breakdown"]["normal"] == before["category_breakdown"]["normal"] - 1
+    assert_matches_rebuild(engine)
+
+def test_migration_replaces_dimension_rollups(tmp_path):
+    from sqlalchemy import create_engine
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    run_migrations(engine)
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO users (id, username, email, hashed_password) VALUES (1, 'u', 'u@x', 'x')"))
+        conn.execute(text("INSERT INTO web_reports (user_id, domain, category, hit_count) "
+                          "VALUES (1, 'a.example', 'normal', 3)"))
+        # The rollup table as the first rollup release created it, before migration 7
+        conn.execute(text("DROP TABLE web_rollups"))
+        conn.execute(text("CREATE TABLE web_rollups (id INTEGER PRIMARY KEY, resolution INTEGER NOT NULL, "
+                          "bucket_start DATETIME NOT NULL, user_id INTEGER, domain VARCHAR(255) NOT NULL, "
+                          "category VARCHAR(50) NOT NULL, score_band INTEGER NOT NULL, is_blocked BOOLEAN, "
+                          "is_whitelisted BOOLEAN, hits INTEGER NOT NULL, last_seen DATETIME, rollup_key VARCHAR(40))"))
+        conn.execute(schema_migrations.delete().where(schema_migrations.c.version == 7))
+
+    run_migrations(engine)
+    with Session(engine) as db:
+        assert [(bucket.category, bucket.hits) for bucket in db.query(WebRollup)] == [("normal", 3)] * 2
+        assert [(bucket.domain, bucket.hits) for bucket in db.query(WebDomainRollup)] == [("a.example", 3)]
+    engine.dispose()